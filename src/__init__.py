@@ -1,22 +1,157 @@
+from collections.abc import Callable
+import functools
 from http import HTTPStatus
+import mimetypes
+import os
+import time
 
 from flask import (
-    Flask, Response, redirect, render_template, request, url_for,
+    Flask, Response, g, redirect, render_template, request,
+    stream_with_context, url_for,
 )
 
-from redcode import machine
+from redcode import assets, errors, lobby, machine, metrics
+from redcode.broadcast import Broadcast
+from redcode.code import validate_lines
 
 
 __all__ = ['create_app']
 
 
 app = create_app = Flask(__name__)
-INSTANCE = machine.Machine(allow_single_process=True)
-UPLOADED = {}
+ASSETS = assets.AssetStore(app.static_folder)
+
+REQUEST_SECONDS = metrics.Histogram(
+    "redcode_http_request_seconds", "HTTP request latency",
+    labelnames=("endpoint", "status"),
+)
+RENDER_SECONDS = metrics.Histogram(
+    "redcode_render_battle_seconds", "Time to simulate and render a battle",
+)
+BATTLES_IN_PROGRESS = metrics.Gauge(
+    "redcode_battles_in_progress", "Battles being simulated or rendered",
+)
+UPLOADS = metrics.Counter(
+    "redcode_uploads_total", "Code uploads by outcome",
+    labelnames=("outcome",),
+)
+UPLOADED_PLAYERS = metrics.Gauge(
+    "redcode_uploaded_players", "Players waiting for the next battle",
+)
+OPEN_ROOMS = metrics.Gauge(
+    "redcode_open_rooms", "Rooms with a warrior registry",
+)
+SPECTATORS = metrics.Gauge(
+    "redcode_live_spectators", "Clients streaming a live battle",
+)
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response: Response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.labels(
+            endpoint=request.endpoint or 'unknown',
+            status=response.status_code,
+        ).observe(time.perf_counter() - started)
+    return response
+
+
+@app.after_request
+def compress_response(response: Response):
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or not 200 <= response.status_code < 300
+        or response.status_code == HTTPStatus.NO_CONTENT
+        or not response.mimetype.startswith(assets.COMPRESSIBLE)
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = assets.negotiate(
+        request.headers.get('Accept-Encoding'), assets.encodings(),
+    )
+    data = response.get_data()
+    if encoding is None or len(data) < assets.MIN_COMPRESS_SIZE:
+        return response
+    response.set_data(assets.compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@app.context_processor
+def asset_urls():
+    def asset_url(filename: str) -> str:
+        return url_for('asset', name=ASSETS[filename].hashed_name)
+    return {'asset_url': asset_url}
+
+
+def mimetype_of(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
 
 
-def render_battle(instance: machine.Machine):
-    instance.run()
+@app.route('/assets/<path:name>')
+def asset(name: str):
+    found = ASSETS.get(name)
+    if found is None:
+        return 'No such asset', HTTPStatus.NOT_FOUND
+
+    encoding = assets.negotiate(
+        request.headers.get('Accept-Encoding'), tuple(found.compressed),
+    )
+    response = Response(
+        found.body(encoding), mimetype=mimetype_of(found.filename),
+    )
+    response.headers['Cache-Control'] = assets.IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    # Every encoding is a different representation, with its own tag
+    etag = f'{found.digest}-{encoding}' if encoding else found.digest
+    response.set_etag(etag)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    return response.make_conditional(request)
+
+
+def battle_etag(live: Broadcast) -> str:
+    # Same uploads and seed mean the same battle, so the page can't change
+    return f'{live.battle_id}-{ASSETS.version}'
+
+
+def not_modified(etag: str) -> Response | None:
+    if not assets.etag_matches(request.headers.get('If-None-Match'), etag):
+        return None
+    response = Response(status=HTTPStatus.NOT_MODIFIED)
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def cacheable(body, etag: str) -> Response:
+    response = app.make_response(body)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate
+    return response
+
+
+def render_battle(
+    instance: machine.Machine, history: Callable[[], str] | None = None,
+):
+    """The battle page, timed from the wait for the simulation to the end"""
+    with BATTLES_IN_PROGRESS.track_inprogress(), RENDER_SECONDS.time():
+        return _render_battle(instance, history)
+
+
+def _render_battle(
+    instance: machine.Machine, history: Callable[[], str] | None,
+):
+    if instance.start_state is None:
+        instance.run()
     assert instance.start_state is not None
 
     return render_template(
@@ -28,7 +163,7 @@ def render_battle(instance: machine.Machine):
         memory_size=len(instance.memory),
         start_map=instance.start_map,
         ips=instance.start_state.ips,
-        history=instance.json_history,
+        history=instance.json_history if history is None else history(),
     )
 
 
@@ -40,22 +175,139 @@ def bad_code_sent(e: ExceptionGroup):
     )
 
 
-@app.route('/battle')
-def battle(instance: machine.Machine = INSTANCE):
-    instance = machine.Machine(allow_single_process=False)
-    for player_name, code in UPLOADED.items():
-        try:
-            instance.load_code(code, player_name)
-        except ExceptionGroup as e:
-            return bad_code_sent(e)
-    return render_battle(instance)
+# Heatmaps cost every tick and turn off the compiled engine, so they're off
+# unless REDCODE_HEATMAP=1
+HEATMAP = os.environ.get('REDCODE_HEATMAP', '0') == '1'
+LOBBY = lobby.Lobby(
+    functools.partial(lobby.build_battle, heatmap=HEATMAP),
+    shard=int(os.environ.get('REDCODE_SHARD', '0')),
+    shards=int(os.environ.get('REDCODE_SHARDS', '1')),
+)
+LOBBY_ERRORS = {
+    errors.BadRoomName: HTTPStatus.NOT_FOUND,
+    errors.NoSuchRoom: HTTPStatus.NOT_FOUND,
+    errors.WrongShard: HTTPStatus.MISDIRECTED_REQUEST,
+    errors.TooManyRooms: HTTPStatus.SERVICE_UNAVAILABLE,
+    errors.PlayerExists: HTTPStatus.CONFLICT,
+}
 
 
-@app.route('/reset')
-def reset(instance: machine.Machine = INSTANCE):
-    instance.reset()
-    UPLOADED.clear()
-    return redirect(url_for('battle'))
+@app.errorhandler(errors.LobbyError)
+def lobby_error(e: errors.LobbyError):
+    return str(e), LOBBY_ERRORS.get(type(e), HTTPStatus.BAD_REQUEST)
+
+
+def room_route(rule: str, **options):
+    """Serve a view for the default room, and under /rooms/<room>"""
+    def register(view):
+        app.route(rule, defaults={'room': lobby.DEFAULT_ROOM}, **options)(view)
+        return app.route(f'/rooms/<room>{rule}', **options)(view)
+    return register
+
+
+@room_route('/battle')
+def battle(room: str):
+    try:
+        live = LOBBY.existing(room).battle()
+    except ExceptionGroup as e:
+        return bad_code_sent(e)
+
+    etag = battle_etag(live)
+    if (response := not_modified(etag)) is not None:
+        return response
+    # The history is serialized once per battle, not once per viewer
+    return cacheable(
+        render_battle(live.machine, lambda: live.json_history), etag,
+    )
+
+
+@room_route('/battle/heatmap')
+def battle_heatmap(room: str):
+    try:
+        live = LOBBY.existing(room).battle()
+    except ExceptionGroup as e:
+        return bad_code_sent(e)
+    instance = live.machine
+    if instance.heatmap is None:
+        return 'Heatmaps are off', HTTPStatus.NOT_FOUND
+    etag = battle_etag(live)
+    if (response := not_modified(etag)) is not None:
+        return response
+    live.wait()
+    return cacheable({
+        'players': [process.name for process in instance.processes],
+        **instance.heatmap.to_dict(),
+    }, etag)
+
+
+@room_route('/battle/cells/<int:cell>')
+def battle_cell(room: str, cell: int):
+    try:
+        live = LOBBY.existing(room).battle()
+    except ExceptionGroup as e:
+        return bad_code_sent(e)
+
+    before = request.args.get('before', type=int)
+    changes = live.changes
+    last_write = changes.last_write(cell, before)
+    next_write = None
+    if before is not None:
+        next_write = changes.next_write(cell, after=before - 1)
+    history = live.machine.history
+    return {
+        'cell': cell % changes.memory_size,
+        'indexed_ticks': changes.ticks,
+        'last_write': last_write,
+        'next_write': next_write,
+        'owner': changes.owner(cell, before),
+        'value': None if last_write is None else history[last_write].value,
+        'writes': len(changes.writes(cell)),
+    }
+
+
+@room_route('/battle/players/<int:pid>/writes')
+def battle_player_writes(room: str, pid: int):
+    try:
+        live = LOBBY.existing(room).battle()
+    except ExceptionGroup as e:
+        return bad_code_sent(e)
+
+    start = request.args.get('start', 0, type=int)
+    end = request.args.get('end', type=int)
+    history = live.machine.history
+    ticks = live.changes.player_writes(pid, start, end)
+    return {
+        'pid': pid,
+        'writes': [[tick, history[tick].index] for tick in ticks],
+    }
+
+
+@room_route('/battle/stream')
+def battle_stream(room: str):
+    try:
+        live = LOBBY.existing(room).battle()
+    except ExceptionGroup as e:
+        return bad_code_sent(e)
+
+    subscriber = live.subscribe()
+
+    @stream_with_context
+    def stream():
+        with SPECTATORS.track_inprogress():
+            yield from subscriber.events(timeout=15)
+
+    return Response(
+        stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@room_route('/reset')
+def reset(room: str):
+    LOBBY.existing(room).reset()
+    UPLOADED_PLAYERS.set(LOBBY.players)
+    return redirect(url_for('battle', room=room))
 
 
 @app.route('/test', methods=['POST'])
@@ -67,33 +319,73 @@ def test_run():
     try:
         instance.load_code(code, player_name)
     except ExceptionGroup as e:
+        UPLOADS.labels(outcome='test_invalid').inc()
         return bad_code_sent(e)
 
+    UPLOADS.labels(outcome='test').inc()
     return render_battle(instance)
 
 
-@app.route('/code')
-def code():
-    return render_template('code.html')
+@app.route('/code/validate', methods=['POST'])
+def code_validate():
+    # Editors send the whole program on every keystroke, only the lines this
+    # client hasn't sent before are actually checked
+    if request.is_json:
+        source = (request.get_json(silent=True) or {}).get('code', '')
+    else:
+        source = request.form.get('code', '')
+    found = validate_lines(source, client=request.remote_addr)
+    if request.headers.get('HX-Request'):
+        if not found:
+            return ''
+        return render_template('partials/errors.html', errors=found)
+    return {
+        'valid': not found,
+        'errors': [
+            {
+                'type': type(error).__name__,
+                'line': error.line_index,
+                'message': error.msg,
+            }
+            for error in found
+        ],
+    }
+
 
+@room_route('/code')
+def code(room: str):
+    LOBBY.check(room)  # The room itself is opened by the first upload
+    return render_template('code.html', room=room)
 
-@app.route('/code/send', methods=['POST'])
-def code_send(instance: machine.Machine = INSTANCE):
+
+@room_route('/code/send', methods=['POST'])
+def code_send(room: str):
     player_name = request.form['player-name']
     code = request.form['code']
     try:
-        instance.load_code(code, player_name)
+        LOBBY.room(room).submit(player_name, code)
     except ExceptionGroup as e:
+        UPLOADS.labels(outcome='invalid').inc()
         return bad_code_sent(e)
+    except errors.PlayerExists as e:
+        UPLOADS.labels(outcome='conflict').inc()
+        return str(e), HTTPStatus.CONFLICT
 
-    if player_name in UPLOADED:
-        return f'We already have code for {player_name}', HTTPStatus.CONFLICT
-
-    UPLOADED[player_name] = code
+    UPLOADS.labels(outcome='accepted').inc()
+    UPLOADED_PLAYERS.set(LOBBY.players)
+    OPEN_ROOMS.set(len(LOBBY))
     resp = Response()
-    resp.headers['HX-Redirect'] = '/wait'
+    resp.headers['HX-Redirect'] = url_for('battle', room=room)
     return resp
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(
+        metrics.REGISTRY.render(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,4 @@
+from redcode.cli import main
+
+
+raise SystemExit(main())
@@ -0,0 +1,166 @@
+"""Compiled warriors: a binary archive of encoded programs.
+
+Layout (little endian):
+    header   magic, version, warrior count
+    index    per warrior: words offset, word count, name offset, name length
+    hashes   per warrior: 32 bytes of the program's SHA-256
+    names    UTF-8 names, back to back
+    words    32-bit encoded instructions (`int(Instruction)`), 4-byte aligned
+
+An `Archive` memory-maps the file and copies a warrior's words straight out
+of the mapping, so loading a warrior never parses its source.
+"""
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+
+from redcode.code import parse_code
+from redcode.errors import ArchiveError
+from redcode.instruction import Instruction, Mode, program_hash
+
+
+MAGIC = b"RCWA"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHI")  # magic, version, reserved, count
+_ENTRY = struct.Struct("<QIII")
+_HASH_SIZE = 32
+
+
+def compile_source(code: str) -> list[int]:
+    return [int(instruction) for instruction in parse_code(code)]
+
+
+def disassemble(words: Iterable[int]) -> str:
+    lines = []
+    for word in words:
+        instruction = Instruction.from_int(word)
+        b = f"{Mode(instruction.mode_b)}{instruction.b}"
+        implicit_a = instruction.mode_a == Mode.IMMEDIATE and not instruction.a
+        if len(instruction.ARGUMENTS) == 1 and implicit_a:
+            lines.append(f"{instruction.name} {b}")
+        else:
+            a = f"{Mode(instruction.mode_a)}{instruction.a}"
+            lines.append(f"{instruction.name} {a}, {b}")
+    return "\n".join(lines) + "\n"
+
+
+Warriors = Iterable[tuple[str, Sequence[int | Instruction]]]
+
+
+def assemble(warriors: Warriors) -> bytes:
+    warriors = [
+        (name, [int(word) % Instruction.SIZE for word in words])
+        for name, words in warriors
+    ]
+    names = [name.encode() for name, _ in warriors]
+    count = len(warriors)
+
+    names_offset = _HEADER.size + count * (_ENTRY.size + _HASH_SIZE)
+    words_offset = names_offset + sum(map(len, names))
+    words_offset += -words_offset % 4  # Align the words
+
+    entries, hashes, chunks = [], [], []
+    name_at, word_at = names_offset, words_offset
+    for (_, words), name in zip(warriors, names):
+        entries.append(_ENTRY.pack(word_at, len(words), name_at, len(name)))
+        hashes.append(bytes.fromhex(program_hash(words)))
+        chunks.append(struct.pack(f"<{len(words)}I", *words))
+        name_at += len(name)
+        word_at += 4 * len(words)
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, count)
+    padding = b"\0" * (words_offset - name_at)
+    return b"".join([header, *entries, *hashes, *names, padding, *chunks])
+
+
+def write(path: str | Path, warriors: Warriors) -> None:
+    Path(path).write_bytes(assemble(warriors))
+
+
+class Archive:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:  # mmap refuses empty files
+                raise ArchiveError(f"Truncated archive {self.path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            self._read_index()
+        except (ArchiveError, struct.error, ValueError) as e:
+            self.close()
+            if isinstance(e, ArchiveError):
+                raise
+            raise ArchiveError(f"Corrupted archive {self.path}: {e}")
+
+    def _read_index(self) -> None:
+        magic, version, _, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ArchiveError(f"Not a warrior archive ({magic=})")
+        if version != VERSION:
+            raise ArchiveError(f"Unsupported archive {version=}")
+
+        hashes_at = _HEADER.size + count * _ENTRY.size
+        self._entries: list[tuple[int, int]] = []
+        self._hashes: list[str] = []
+        self._names: list[str] = []
+        self._by_name: dict[str, int] = {}
+        for i in range(count):
+            word_at, length, name_at, name_length = _ENTRY.unpack_from(
+                self._mmap, _HEADER.size + i * _ENTRY.size,
+            )
+            if word_at % 4 or word_at + 4 * length > len(self._mmap):
+                raise ArchiveError(f"Bad words range for warrior {i}")
+            name = bytes(self._view[name_at:name_at + name_length]).decode()
+            hash_at = hashes_at + i * _HASH_SIZE
+            self._hashes.append(self._view[hash_at:hash_at + 32].hex())
+            self._entries.append((word_at, length))
+            self._names.append(name)
+            self._by_name.setdefault(name, i)
+
+    def close(self) -> None:
+        if self._mmap.closed:
+            return
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._names)
+
+    def name(self, index: int) -> str:
+        return self._names[index]
+
+    def hash(self, index: int) -> str:
+        return self._hashes[index]
+
+    def words(self, index: int) -> array:
+        """A copy of the words, the archive can be closed while it's used"""
+        word_at, length = self._entries[index]
+        words = array("I")
+        words.frombytes(self._view[word_at:word_at + 4 * length])
+        if sys.byteorder != "little":
+            words.byteswap()
+        return words
+
+    def __getitem__(self, name: str) -> array:
+        return self.words(self._by_name[name])
+
+    def __iter__(self) -> Iterator[tuple[str, array]]:
+        for index, name in enumerate(self._names):
+            yield name, self.words(index)
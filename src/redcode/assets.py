@@ -0,0 +1,124 @@
+"""Content-hashed, precompressed static assets and HTTP encoding helpers.
+
+Every asset is read and compressed once, when the store is built, so serving
+it is a dictionary lookup. The content hash is part of the asset's public
+name, which lets clients cache it forever.
+"""
+from dataclasses import dataclass, field
+import gzip
+import hashlib
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is always available
+    brotli = None
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+MIN_COMPRESS_SIZE = 1024  # Bytes, smaller bodies aren't worth the headers
+
+COMPRESSIBLE = (
+    "text/", "application/json", "application/javascript", "image/svg",
+)
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Static assets are compressed once, so they get the best ratio"""
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11 if static else 5)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding {encoding!r}")
+
+
+def encodings() -> tuple[str, ...]:
+    """Supported encodings, preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(
+    accept_encoding: str | None, available: tuple[str, ...],
+) -> str | None:
+    accepted: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in available:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or f'"{etag}"' in tags
+
+
+def digest(data: bytes, length: int = 12) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+@dataclass(frozen=True, slots=True)
+class Asset:
+    filename: str
+    hashed_name: str
+    digest: str
+    data: bytes
+    compressed: dict[str, bytes] = field(default_factory=dict)
+
+    def body(self, encoding: str | None) -> bytes:
+        return self.compressed.get(encoding, self.data) if encoding else (
+            self.data
+        )
+
+
+class AssetStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._by_filename: dict[str, Asset] = {}
+        self._by_hashed_name: dict[str, Asset] = {}
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file():
+                self._add(path)
+        self.version = digest(
+            "".join(a.digest for a in self._by_filename.values()).encode(),
+        )
+
+    def _add(self, path: Path) -> None:
+        data = path.read_bytes()
+        filename = path.relative_to(self.root).as_posix()
+        content_digest = digest(data)
+        stem, dot, suffix = filename.rpartition(".")
+        hashed_name = (
+            f"{stem}.{content_digest}.{suffix}" if dot
+            else f"{filename}.{content_digest}"
+        )
+        compressed = {}
+        for encoding in encodings():
+            body = compress(data, encoding, static=True)
+            if len(body) < len(data):
+                compressed[encoding] = body
+        asset = Asset(filename, hashed_name, content_digest, data, compressed)
+        self._by_filename[filename] = asset
+        self._by_hashed_name[hashed_name] = asset
+
+    def __len__(self) -> int:
+        return len(self._by_filename)
+
+    def __getitem__(self, filename: str) -> Asset:
+        return self._by_filename[filename]
+
+    def get(self, hashed_name: str) -> Asset | None:
+        return self._by_hashed_name.get(hashed_name)
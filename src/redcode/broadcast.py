@@ -0,0 +1,256 @@
+"""Simulate a battle once and fan its progress out to many spectators.
+
+Every event is serialized a single time, as a server-sent event, and the
+same string is handed to all subscribers. A subscriber that falls too far
+behind has its pending deltas dropped and receives a fresh snapshot instead.
+"""
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterator
+import json
+import threading
+
+from redcode import config
+from redcode.changes import ChangeIndex
+from redcode.machine import Machine, as_move
+from redcode.replay import BattleRecord
+
+
+KEEPALIVE = ": keepalive\n\n"
+
+
+def format_sse(event: str, data: object) -> str:
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class Subscriber:
+    def __init__(self, broadcast: "Broadcast", max_pending: int):
+        self.broadcast = broadcast
+        self.coalesced = 0  # Times we dropped deltas for a snapshot
+        self._max_pending = max_pending
+        self._pending: deque[str] = deque()
+        self._needs_snapshot = True
+        self._closed = False
+
+    def _push(self, event: str) -> None:
+        if self._needs_snapshot:
+            return  # The snapshot will include this event anyway
+        if len(self._pending) >= self._max_pending:
+            self._pending.clear()
+            self._needs_snapshot = True
+            self.coalesced += 1
+            return
+        self._pending.append(event)
+
+    def _ready(self) -> bool:
+        return (
+            self._closed or self._needs_snapshot or bool(self._pending)
+            or self.broadcast.done
+        )
+
+    def _take(self) -> list[str]:
+        if self._needs_snapshot:
+            self._needs_snapshot = False
+            self._pending.clear()
+            return [self.broadcast._snapshot_event()]
+        events = list(self._pending)
+        self._pending.clear()
+        return events
+
+    def close(self) -> None:
+        self.broadcast.unsubscribe(self)
+
+    def events(self, timeout: float | None = None) -> Iterator[str]:
+        condition = self.broadcast._condition
+        try:
+            while True:
+                with condition:
+                    if not condition.wait_for(self._ready, timeout):
+                        events = [KEEPALIVE]
+                    elif self._closed:
+                        return
+                    else:
+                        events = self._take()
+                    finished = self.broadcast.done and not events
+                if finished:
+                    yield self.broadcast._end_event()
+                    return
+                yield from events
+        finally:
+            self.close()
+
+
+class Broadcast:
+    def __init__(
+        self,
+        key: Hashable,
+        machine: Machine,
+        max_ticks: int = config.MAX_TICKS,
+        chunk_rounds: int = 50,
+        max_pending: int = 64,
+    ):
+        self.key = key
+        self.machine = machine
+        self.done = False
+        self._chunk_rounds = chunk_rounds
+        self._max_pending = max_pending
+        self._condition = threading.Condition()
+        self._subscribers: list[Subscriber] = []
+        self._published = 0
+        self._snapshot: tuple[int, str] | None = None
+        self._json_history: str | None = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._simulate, daemon=True)
+        machine.run(max_ticks, budget=0)  # Captures the start state
+        self.changes = ChangeIndex(len(machine.memory), machine.start_map)
+        # Fixed by the setup, so it never reads the running battle's state
+        self.battle_id = BattleRecord.setup(machine).battle_id
+
+    @property
+    def spectators(self) -> int:
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    @property
+    def json_history(self) -> str:
+        """The whole history once the battle ends, serialized only once"""
+        self._finished.wait()
+        with self._condition:
+            if self._json_history is None:
+                self._json_history = self.machine.json_history
+            return self._json_history
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self, self._max_pending)
+        with self._condition:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._condition:
+            subscriber._closed = True
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            self._condition.notify_all()
+
+    def _moves(self, start: int, end: int) -> list[dict | None]:
+        # Called once the change index covers `end`, to find prior owners
+        owner, encoding = self.changes.owner, self.machine.encoding
+        return [
+            diff and as_move(
+                diff,
+                None if diff.index is None else owner(diff.index, tick),
+                encoding,
+            )
+            for tick, diff in enumerate(self.machine.history[start:end], start)
+        ]
+
+    def _snapshot_event(self) -> str:
+        # Called with the condition held, so _published can't move
+        cached = self._snapshot
+        if cached is not None and cached[0] == self._published:
+            return cached[1]
+
+        start = self.machine.start_state
+        assert start is not None
+        event = format_sse("snapshot", {
+            "players": [process.name for process in start.processes],
+            "memory": json.loads(start.memory.as_json()),
+            "start_map": start.start_map,
+            "ips": start.ips,
+            "position": self._published,
+            "moves": self._moves(0, self._published),
+        })
+        self._snapshot = (self._published, event)
+        return event
+
+    def _end_event(self) -> str:
+        return format_sse("end", {
+            "position": self._published,
+            "winners": [p.name for p in self.machine.survivors],
+        })
+
+    def _publish(self) -> None:
+        end = len(self.machine.history)
+        self.changes.sync(self.machine.history)
+        event = format_sse("delta", {
+            "position": self._published,
+            "moves": self._moves(self._published, end),
+        })
+        with self._condition:
+            self._published = end
+            for subscriber in self._subscribers:
+                subscriber._push(event)
+            self._condition.notify_all()
+
+    def _simulate(self) -> None:
+        try:
+            while not self.machine.finished:
+                self.machine.resume(self._chunk_rounds)
+                self._publish()
+        finally:
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+            self._finished.set()
+
+
+class BroadcastHub:
+    """Keeps one broadcast per battle, shared by all of its spectators"""
+
+    def __init__(
+        self,
+        max_finished: int = 16,
+        max_ticks: int = config.MAX_TICKS,
+        chunk_rounds: int = 50,
+        max_pending: int = 64,
+    ):
+        self._broadcasts: OrderedDict[Hashable, Broadcast] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_finished = max_finished
+        self._max_ticks = max_ticks
+        self._chunk_rounds = chunk_rounds
+        self._max_pending = max_pending
+
+    def start(
+        self, key: Hashable, factory: Callable[[], Machine],
+    ) -> Broadcast:
+        with self._lock:
+            broadcast = self._broadcasts.get(key)
+            if broadcast is not None:
+                self._broadcasts.move_to_end(key)
+                return broadcast
+
+            broadcast = Broadcast(
+                key, factory(),
+                max_ticks=self._max_ticks,
+                chunk_rounds=self._chunk_rounds,
+                max_pending=self._max_pending,
+            )
+            self._broadcasts[key] = broadcast
+            self._evict()
+        broadcast.start()
+        return broadcast
+
+    def _evict(self) -> None:
+        finished = [
+            key for key, broadcast in self._broadcasts.items()
+            if broadcast.done and not broadcast.spectators
+        ]
+        for key in finished[:max(0, len(finished) - self._max_finished)]:
+            del self._broadcasts[key]
+
+    def get(self, key: Hashable) -> Broadcast | None:
+        return self._broadcasts.get(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._broadcasts.clear()
+
+    def __len__(self) -> int:
+        return len(self._broadcasts)
@@ -0,0 +1,64 @@
+"""Inverted index of a battle's history: who wrote which cell, and when.
+
+Ticks are positions in `Machine.history`. The index is fed incrementally, so
+it can follow a battle that is still running.
+"""
+import bisect
+from collections.abc import Sequence
+import threading
+
+from redcode.process import Diff
+
+
+class ChangeIndex:
+    def __init__(self, memory_size: int, start_map: Sequence[int | None] = ()):
+        self.memory_size = memory_size
+        self.start_map = list(start_map) or [None] * memory_size
+        self.ticks = 0  # History entries indexed so far
+        self._cells: list[list[int]] = [[] for _ in range(memory_size)]
+        self._writers: list[list[int]] = [[] for _ in range(memory_size)]
+        self._players: dict[int, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, history: Sequence[Diff | None]) -> None:
+        """Index the entries appended to `history` since the last sync"""
+        with self._lock:
+            end = len(history)
+            # Slicing raises HistoryEvicted if entries were lost unindexed
+            for tick, diff in enumerate(history[self.ticks:end], self.ticks):
+                if diff is None or diff.index is None:
+                    continue
+                self._cells[diff.index].append(tick)
+                self._writers[diff.index].append(diff.pid)
+                self._players.setdefault(diff.pid, []).append(tick)
+            self.ticks = max(self.ticks, end)
+
+    def writes(self, cell: int) -> list[int]:
+        return self._cells[cell % self.memory_size]
+
+    def last_write(self, cell: int, before: int | None = None) -> int | None:
+        """The last tick before `before` (or ever) that wrote to `cell`"""
+        ticks = self.writes(cell)
+        i = len(ticks) if before is None else bisect.bisect_left(ticks, before)
+        return ticks[i - 1] if i else None
+
+    def next_write(self, cell: int, after: int = -1) -> int | None:
+        ticks = self.writes(cell)
+        i = bisect.bisect_right(ticks, after)
+        return ticks[i] if i < len(ticks) else None
+
+    def owner(self, cell: int, before: int | None = None) -> int | None:
+        """The process that last wrote to `cell`, or the one loaded there"""
+        cell %= self.memory_size
+        ticks = self._cells[cell]
+        i = len(ticks) if before is None else bisect.bisect_left(ticks, before)
+        return self._writers[cell][i - 1] if i else self.start_map[cell]
+
+    def player_writes(
+        self, pid: int, start: int = 0, end: int | None = None,
+    ) -> list[int]:
+        """Ticks in [start, end) where process `pid` wrote to memory"""
+        ticks = self._players.get(pid, [])
+        low = bisect.bisect_left(ticks, start)
+        high = len(ticks) if end is None else bisect.bisect_left(ticks, end)
+        return ticks[low:high]
@@ -0,0 +1,206 @@
+"""Compact binary checkpoints of a running machine.
+
+Layout (little endian):
+    header       magic, version, flags, memory size, ticks, max ticks, seed,
+                 process count, program count, history tail length
+    rng state    625 words + gauss flag and value (only if flag is set)
+    core         one signed 64-bit word per memory cell
+    start map    one signed 32-bit pid per memory cell (-1 for none)
+    processes    id, parent id, code start, ip, alive, name, death reason
+    programs     name, word count, 32-bit encoded instructions
+    history      kind (0 = None), pid, ip, index (-1 for none), previous ip
+                 (-1 for none), overwritten word, value
+"""
+from pathlib import Path
+import random
+import struct
+
+from redcode.errors import CheckpointError
+from redcode.history import Tail
+from redcode.machine import Machine
+from redcode.memory import Sectors
+from redcode.process import Diff, Process
+
+
+MAGIC = b"RCCP"
+VERSION = 2
+
+_ALLOW_SINGLE_PROCESS = 0b01
+_HAS_RANDOM = 0b10
+
+_HEADER = struct.Struct("<4sBBIIIqIII")
+_RANDOM_GAUSS = struct.Struct("<?d")
+_PROCESS = struct.Struct("<IiII?")
+_DIFF = struct.Struct("<BIIiiq")
+_STRING_LENGTH = struct.Struct("<H")
+_COUNT = struct.Struct("<I")
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._offset = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        try:
+            values = fmt.unpack_from(self._data, self._offset)
+        except struct.error as e:
+            raise CheckpointError(f"Truncated checkpoint: {e}")
+        self._offset += fmt.size
+        return values
+
+    def array(self, code: str, count: int) -> tuple[int, ...]:
+        return self.unpack(struct.Struct(f"<{count}{code}"))
+
+    def string(self) -> str:
+        length, = self.unpack(_STRING_LENGTH)
+        raw = self._data[self._offset:self._offset + length]
+        self._offset += length
+        return bytes(raw).decode()
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode()
+    return _STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def _pack_random(rng: random.Random) -> bytes:
+    _, state, gauss_next = rng.getstate()
+    packed = struct.pack(f"<{len(state)}I", *state)
+    has_gauss = gauss_next is not None
+    return packed + _RANDOM_GAUSS.pack(has_gauss, gauss_next or 0.0)
+
+
+def _unpack_random(reader: _Reader) -> random.Random:
+    state = reader.array("I", 625)
+    has_gauss, gauss_next = reader.unpack(_RANDOM_GAUSS)
+    rng = random.Random()
+    rng.setstate((3, state, gauss_next if has_gauss else None))
+    return rng
+
+
+def dumps(machine: Machine, history_tail: int = 0) -> bytes:
+    if not machine.encoding.is_standard:
+        raise CheckpointError(f"Can't checkpoint {machine.encoding} words")
+
+    memory = machine.memory
+    size = len(memory)
+    history = machine.history[-history_tail:] if history_tail else []
+    flags = _ALLOW_SINGLE_PROCESS if machine._allow_single_process else 0
+    if memory._random is not None:
+        flags |= _HAS_RANDOM
+
+    try:
+        chunks = [_HEADER.pack(
+            MAGIC, VERSION, flags, size, machine._ticks, machine.max_ticks,
+            machine.seed, len(machine.processes), len(machine.programs),
+            len(history),
+        )]
+        if memory._random is not None:
+            chunks.append(_pack_random(memory._random))
+        chunks.append(struct.pack(f"<{size}q", *map(int, memory._data)))
+    except struct.error as e:
+        raise CheckpointError(f"Machine state can't be checkpointed: {e}")
+
+    start_map = [-1 if pid is None else pid for pid in machine.start_map]
+    chunks.append(struct.pack(f"<{size}i", *start_map))
+
+    for process in machine.processes:
+        parent_id = -1 if process._parent_id is None else process._parent_id
+        chunks.append(_PROCESS.pack(
+            process._id, parent_id, process._code_start, process._ip,
+            process.is_alive,
+        ))
+        chunks.append(_pack_string(process.name))
+        chunks.append(_pack_string(process._reason))
+
+    for name, words in machine.programs:
+        chunks.append(_pack_string(name))
+        chunks.append(_COUNT.pack(len(words)))
+        chunks.append(struct.pack(f"<{len(words)}I", *words))
+
+    for diff in history:
+        if diff is None:
+            chunks.append(_DIFF.pack(0, 0, 0, -1, -1, 0))
+            chunks.append(_pack_string(""))
+            continue
+        index = -1 if diff.index is None else diff.index
+        prev_ip = -1 if diff.prev_ip is None else diff.prev_ip
+        chunks.append(_DIFF.pack(
+            1, diff.pid, diff.ip, index, prev_ip, diff.prev_word or 0,
+        ))
+        chunks.append(_pack_string(diff.value or ""))
+
+    return b"".join(chunks)
+
+
+def loads(data: bytes) -> Machine:
+    reader = _Reader(data)
+    (
+        magic, version, flags, size, ticks, max_ticks, seed,
+        process_count, program_count, history_count,
+    ) = reader.unpack(_HEADER)
+    if magic != MAGIC:
+        raise CheckpointError(f"Not a checkpoint ({magic=})")
+    if version != VERSION:
+        raise CheckpointError(f"Unsupported checkpoint {version=}")
+
+    if history_count > ticks:
+        raise CheckpointError(f"{history_count} history entries for {ticks=}")
+
+    machine = Machine(
+        memory_size=size,
+        allow_single_process=bool(flags & _ALLOW_SINGLE_PROCESS),
+        seed=seed,
+        history=Tail(ticks - history_count),  # Still addressed by tick
+    )
+    memory = machine.memory
+    memory._random = _unpack_random(reader) if flags & _HAS_RANDOM else None
+    memory._data = list(reader.array("q", size))
+    memory._free = Sectors([])  # Resumed battles don't allocate new code
+    machine.start_map = [
+        None if pid == -1 else pid for pid in reader.array("i", size)
+    ]
+
+    for _ in range(process_count):
+        proc_id, parent_id, code_start, ip, alive = reader.unpack(_PROCESS)
+        process = Process(
+            proc_id, code_start, memory,
+            name=reader.string(), alive=alive,
+            parent_id=None if parent_id == -1 else parent_id,
+            table=machine.table,
+        )
+        process._ip = ip
+        process._reason = reader.string()
+        machine.processes.append(process)
+
+    for _ in range(program_count):
+        name = reader.string()
+        count, = reader.unpack(_COUNT)
+        machine.programs.append((name, list(reader.array("I", count))))
+
+    for _ in range(history_count):
+        kind, pid, ip, index, prev_ip, prev_word = reader.unpack(_DIFF)
+        value = reader.string()
+        if kind == 0:
+            machine._history.append(None)
+            continue
+        machine._history.append(Diff(
+            pid, ip,
+            None if index == -1 else index,
+            value,
+            None if prev_ip == -1 else prev_ip,
+            None if index == -1 else prev_word,
+        ))
+
+    machine._ticks = ticks
+    machine.max_ticks = max_ticks
+    return machine
+
+
+def dump(machine: Machine, path: str | Path, history_tail: int = 0) -> None:
+    Path(path).write_bytes(dumps(machine, history_tail))
+
+
+def load(path: str | Path) -> Machine:
+    return loads(Path(path).read_bytes())
@@ -0,0 +1,272 @@
+"""Headless battles, tournaments and benchmarks: `python -m redcode`.
+
+Only engine modules are imported, so starting a process stays cheap. Every
+command prints a single JSON document to stdout.
+"""
+import argparse
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+import json
+from pathlib import Path
+import random
+import sqlite3
+import time
+
+from redcode import config
+from redcode.archive import Archive
+from redcode.errors import ArchiveError
+from redcode.library import Diagnostic, parse_file, scan
+from redcode.machine import Machine
+from redcode.replay import BattleRecord
+from redcode.scores import ScoreStore
+from redcode.tournament import (
+    EarlyStop, incremental_round_robin, round_robin, simulations,
+)
+
+
+Warriors = list[tuple[str, list[int]]]
+
+
+class UsageError(Exception):
+    pass
+
+
+def _expand(paths: Sequence[str]) -> list[Path]:
+    expanded = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            expanded.extend(scan(path))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def load_warriors(
+    paths: Sequence[str], sources: list[str] | None = None,
+) -> Warriors:
+    """Warriors in `paths`, with where each came from added to `sources`"""
+    warriors: Warriors = []
+    found: list[str] = []
+    for path in _expand(paths):
+        if path.suffix == ".rcwa":
+            try:
+                with Archive(path) as archive:
+                    for name, words in archive:
+                        warriors.append((name, list(words)))
+                        found.append(f"{path}:{name}")
+            except (OSError, ArchiveError) as e:
+                raise UsageError(f"{path}: {e}")
+            continue
+
+        result = parse_file(path)
+        if isinstance(result, Diagnostic):
+            raise UsageError(str(result))
+        warriors.append((result.name, list(result.words)))
+        found.append(str(path))
+    if sources is not None:
+        sources.extend(found)
+    return warriors
+
+
+def _seeds(seed: int | None, rounds: int) -> list[int]:
+    rng = random.Random(seed)
+    return [rng.randrange(1 << 32) for _ in range(rounds)]
+
+
+def _battle_job(job: tuple) -> dict:
+    warriors, seed, memory_size, max_ticks, compiled, heatmap = job
+    machine = Machine(
+        memory_size, seed=seed, compiled=compiled, heatmap=heatmap,
+    )
+    for name, words in warriors:
+        machine.load_program(words, name)
+    start = time.perf_counter()
+    machine.run(max_ticks)
+    seconds = time.perf_counter() - start
+    record = BattleRecord.from_machine(machine)
+    result = {
+        "battle_id": record.battle_id,
+        "seed": record.seed,
+        "winners": list(record.winners),
+        # Names can repeat, each warrior is its own process
+        "winner_indices": [process._id for process in machine.survivors],
+        "ticks": record.ticks,
+        "seconds": seconds,
+    }
+    if machine.heatmap is not None:
+        result["heatmap"] = machine.heatmap.to_dict()
+    return result
+
+
+def _battles(args: argparse.Namespace, warriors: Warriors) -> list[dict]:
+    jobs = [
+        (
+            warriors, seed, args.memory_size, args.max_ticks, args.compiled,
+            args.heatmap,
+        )
+        for seed in _seeds(args.seed, args.rounds)
+    ]
+    if args.jobs == 1 or len(jobs) <= 1:
+        return list(map(_battle_job, jobs))
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        return list(pool.map(_battle_job, jobs))
+
+
+def battle(args: argparse.Namespace) -> dict:
+    sources: list[str] = []
+    warriors = load_warriors(args.warriors, sources)
+    if len(warriors) < 2:
+        raise UsageError("A battle needs at least two warriors")
+
+    battles = _battles(args, warriors)
+    wins = [0] * len(warriors)  # By index, names of files may collide
+    for result in battles:
+        del result["seconds"]
+        if len(result["winner_indices"]) == 1:
+            wins[result["winner_indices"][0]] += 1
+    return {
+        "warriors": [
+            {"name": name, "path": source, "wins": count}
+            for (name, _), source, count in zip(warriors, sources, wins)
+        ],
+        "rounds": battles,
+    }
+
+
+def tournament(args: argparse.Namespace) -> dict:
+    warriors = load_warriors(args.warriors)
+    if len(warriors) < 2:
+        raise UsageError("A tournament needs at least two warriors")
+
+    stop = None
+    if args.early_stop is not None:
+        try:
+            stop = EarlyStop(args.early_stop, min_rounds=args.min_rounds)
+        except ValueError as e:
+            raise UsageError(str(e))
+
+    start = time.perf_counter()
+    if args.scores is not None:
+        try:
+            scores = ScoreStore(args.scores)
+        except sqlite3.Error as e:
+            raise UsageError(f"{args.scores}: {e}")
+        with scores:
+            standings, played = incremental_round_robin(
+                warriors,
+                scores,
+                rounds=args.rounds,
+                memory_size=args.memory_size,
+                max_ticks=args.max_ticks,
+                seed=args.seed if args.seed is not None else 0,
+                jobs=args.jobs,
+                compiled=args.compiled,
+                stop=stop,
+            )
+    else:
+        standings = round_robin(
+            warriors,
+            rounds=args.rounds,
+            memory_size=args.memory_size,
+            max_ticks=args.max_ticks,
+            seed=args.seed if args.seed is not None else _seeds(None, 1)[0],
+            jobs=args.jobs,
+            compiled=args.compiled,
+            stop=stop,
+        )
+        played = simulations(standings)
+    baseline = len(warriors) * (len(warriors) - 1) // 2 * args.rounds
+    return {
+        "standings": [standing.to_dict() for standing in standings],
+        "simulations": played,
+        "simulations_saved": baseline - played,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def benchmark(args: argparse.Namespace) -> dict:
+    warriors = load_warriors(args.warriors)
+    start = time.perf_counter()
+    battles = _battles(args, warriors)
+    wall = time.perf_counter() - start
+    ticks = sum(result["ticks"] for result in battles)
+    busy = sum(result["seconds"] for result in battles)
+    return {
+        "battles": len(battles),
+        "ticks": ticks,
+        "seconds": wall,
+        "battles_per_second": len(battles) / wall if wall else 0.0,
+        "ticks_per_second": ticks / busy if busy else 0.0,
+        "compiled": args.compiled,
+        "heatmap": args.heatmap,
+    }
+
+
+def validate(args: argparse.Namespace) -> dict:
+    results = []
+    for path in _expand(args.warriors):
+        result = parse_file(path)
+        errors = result.errors if isinstance(result, Diagnostic) else ()
+        results.append({
+            "path": str(path), "valid": not errors, "errors": list(errors),
+        })
+    return {"valid": all(r["valid"] for r in results), "files": results}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m redcode")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    engine = argparse.ArgumentParser(add_help=False)
+    engine.add_argument("warriors", nargs="+", help="Files or directories")
+    engine.add_argument("--rounds", type=int, default=1)
+    engine.add_argument("--seed", type=int, default=None)
+    engine.add_argument("--jobs", type=int, default=1)
+    engine.add_argument(
+        "--memory-size", type=int, default=config.MEMORY_SIZE,
+    )
+    engine.add_argument("--max-ticks", type=int, default=config.MAX_TICKS)
+    engine.add_argument("--compiled", action="store_true")
+    engine.set_defaults(heatmap=False)
+
+    for name, command in [
+        ("battle", battle),
+        ("tournament", tournament),
+        ("benchmark", benchmark),
+    ]:
+        sub = commands.add_parser(name, parents=[engine])
+        sub.set_defaults(func=command)
+        if name != "tournament":
+            sub.add_argument(
+                "--heatmap", action="store_true",
+                help="Include per-cell read/write/execute counters",
+            )
+        else:
+            sub.add_argument(
+                "--early-stop", type=float, default=None,
+                metavar="CONFIDENCE",
+                help="Stop a pairing once its result has this confidence",
+            )
+            sub.add_argument("--min-rounds", type=int, default=10)
+            sub.add_argument(
+                "--scores", default=None, metavar="PATH",
+                help="SQLite file of stored pairings, only new ones are "
+                "played (the seed defaults to 0)",
+            )
+
+    sub = commands.add_parser("validate")
+    sub.add_argument("warriors", nargs="+", help="Files or directories")
+    sub.set_defaults(func=validate)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        output = args.func(args)
+    except UsageError as e:
+        print(json.dumps({"error": str(e)}))
+        return 2
+
+    print(json.dumps(output))
+    return 0 if output.get("valid", True) else 1
@@ -1,3 +1,6 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+import threading
 from typing import NamedTuple
 
 from redcode.config import MAX_PROGRAM_SIZE, COMMENT_SIGN
@@ -5,7 +8,7 @@ from redcode.errors import (
     EmptyCode, InvalidArgumentsLength, InvalidOpcodeName, OperandPrefixError,
     OperandValueError, ParseError, PartialParseError, SizeLimitExceeded,
 )
-from redcode.instruction import Instruction, Mode
+from redcode.instruction import Encoding, Instruction, Mode, program_hash
 
 
 class Line(NamedTuple):
@@ -25,9 +28,12 @@ class Parser:
         self,
         code: str,
         instruction_limit: int | None = MAX_PROGRAM_SIZE,
+        encoding: Encoding | None = None,  # None for the standard one
+        validate: bool = True,  # False if the caller already did
     ):
         self.code = self.basic_cleanup(code)
-        if not Validator(code).is_valid():
+        self.encoding = encoding
+        if validate and not Validator(code).is_valid():
             raise ParseError("Invalid code, be sure to run Validator first")
         self.instructions = []
         self._max_size = instruction_limit  # Pass None to disable
@@ -73,7 +79,7 @@ class Parser:
         operands = []
         for param in params[1:]:
             operands.extend(self.operand(param))
-        return opcode(*operands)
+        return opcode(*operands, encoding=self.encoding)
 
     def parse(self) -> list[Instruction]:
         for i, line in enumerate(self.code, 1):
@@ -154,3 +160,124 @@ class Validator:
             return False
         else:
             return not self._exceptions
+
+
+def parse_code(
+    code: str,
+    encoding: Encoding | None = None,
+    instruction_limit: int | None = MAX_PROGRAM_SIZE,
+) -> list[Instruction]:
+    """Validate and parse `code`, raising every validation error at once"""
+    validator = Validator(code)
+    if not validator.is_valid():
+        raise ExceptionGroup("Code parsing failed", validator.errors)
+    parser = Parser(code, instruction_limit, encoding, validate=False)
+    return parser.parse()
+
+
+def canonical_hash(code: str) -> str:
+    """Identity of a program, whatever its comments, spacing, letter case or
+    the way its offsets are written (-1 and 4095 are the same offset).
+
+    Operand modes are kept: `DAT 0` and `DAT #0` are different words, which
+    other programs can read and compare.
+    """
+    return program_hash(parse_code(code))
+
+
+CACHED_CLIENTS = 256  # Editors whose checked lines are kept
+CACHED_LINES = 2 * MAX_PROGRAM_SIZE  # Distinct lines per editor
+
+_LINE_CHECKER = Validator("")
+
+LineCheck = tuple[type[ParseError], str] | None
+
+
+def _check_line(content: str) -> LineCheck:
+    try:
+        _LINE_CHECKER._parse_instruction(Line(0, content))
+    except ParseError as e:
+        return type(e), e.msg
+    except PartialParseError as e:
+        return e.error, e.msg
+    return None
+
+
+class LineCache:
+    """Checked lines, kept per client so that no client can flush the lines
+    of another one, only its own
+    """
+
+    def __init__(
+        self, clients: int = CACHED_CLIENTS, lines: int = CACHED_LINES,
+    ):
+        self.clients = clients
+        self.lines = lines
+        self.misses = 0
+        self._cache: OrderedDict[Hashable, OrderedDict[str, LineCheck]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def check(self, client: Hashable, content: str) -> LineCheck:
+        with self._lock:
+            lines = self._cache.get(client)
+            if lines is not None and content in lines:
+                self._cache.move_to_end(client)
+                lines.move_to_end(content)
+                return lines[content]
+            self.misses += 1
+
+        result = _check_line(content)  # Outside the lock, it's the slow part
+        with self._lock:
+            lines = self._cache.setdefault(client, OrderedDict())
+            self._cache.move_to_end(client)
+            lines[content] = result
+            if len(lines) > self.lines:
+                lines.popitem(last=False)
+            if len(self._cache) > self.clients:
+                self._cache.popitem(last=False)
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(map(len, self._cache.values()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.misses = 0
+
+
+LINE_CACHE = LineCache()
+
+
+def validate_lines(
+    code: str,
+    instruction_limit: int | None = MAX_PROGRAM_SIZE,
+    client: Hashable = None,
+) -> list[ParseError]:
+    """The errors `Validator` finds, but the lines `client` already sent are
+    not checked again, so revalidating an edited program only checks the
+    changed lines.
+    """
+    lines = Parser.basic_cleanup(code)
+    if "".join(lines).strip() == "":
+        return [EmptyCode("Empty code")]
+
+    # Oversized programs are rejected whole, before any line is checked
+    size = sum(1 for line in lines if line.strip())
+    if instruction_limit is not None and size > instruction_limit:
+        return [SizeLimitExceeded(
+            f"Program size exceeded: {size} > {instruction_limit}",
+        )]
+
+    errors = []
+    for i, line in enumerate(lines, 1):
+        if not line:
+            continue
+        result = LINE_CACHE.check(client, line)
+        if result is not None:
+            error, msg = result
+            errors.append(error(msg, i, line))
+    return errors
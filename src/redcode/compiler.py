@@ -0,0 +1,250 @@
+"""Optional engine that compiles hot straight-line code to Python functions.
+
+Starting at a hot address, instructions are collected until the first one
+that may branch (or can't be specialized), and Python source is generated for
+the whole block, with every relative address folded into a constant. Each
+instruction still becomes its own step function, so a process keeps executing
+exactly one instruction per tick and round-robin scheduling is untouched.
+
+A step only depends on the word it was compiled from, so overwriting a cell
+(through `Memory.__setitem__`) just drops the step compiled for that cell.
+Anything that isn't specialized falls back to the reference `Process.tick`.
+"""
+from collections.abc import Callable
+
+from redcode.errors import RedcodeRuntimeError
+from redcode.instruction import (
+    Add, Cmp, Djz, Instruction, Jmp, Jmz, Mode, Mov, Sub,
+)
+from redcode.memory import Memory
+from redcode.process import Diff, Process
+
+
+Step = Callable[[], tuple[int, int | None, str]]
+
+HOT_THRESHOLD = 4  # Executions of an address before it's compiled
+MAX_BLOCK_SIZE = 16
+_CACHE_LIMIT = 1 << 16
+
+_BRANCHES = (Jmp, Jmz, Djz, Cmp)
+_TEXT: dict[int, str] = {}  # Encoded word -> its textual representation
+_FACTORIES: dict[tuple, Callable] = {}  # (start, size, words) -> factory
+
+
+def _text(word: int) -> str:
+    text = _TEXT.get(word)
+    if text is None:
+        text = str(Instruction.from_int(word))  # Might raise, like memory[i]
+        if len(_TEXT) >= _CACHE_LIMIT:
+            _TEXT.clear()
+        _TEXT[word] = text
+    return text
+
+
+def _helpers(data: list) -> tuple[Callable, Callable]:
+    def load(pointer: int) -> int:
+        word = int(data[pointer]) % Instruction.SIZE
+        if word not in _TEXT:
+            _text(word)
+        return word
+
+    def text_at(index: int) -> str:
+        word = int(data[index]) % Instruction.SIZE
+        try:
+            return _TEXT.get(word) or _text(word)
+        except RedcodeRuntimeError:
+            return "???"
+
+    return load, text_at
+
+
+def _compilable(instruction: Instruction) -> bool:
+    # Immediate addresses raise BadMode, leave that to the reference engine
+    if isinstance(instruction, (Mov, Add, Sub, Jmp)):
+        return instruction.mode_b != Mode.IMMEDIATE
+    if isinstance(instruction, Djz):
+        return instruction.mode_a != Mode.IMMEDIATE
+    return isinstance(instruction, (Jmz, Cmp))
+
+
+def _address(mode: int, value: int, ip: int, size: int) -> str:
+    pointer = (ip + value) % size
+    if mode == Mode.RELATIVE:
+        return f"{pointer}"
+    return f"({pointer} + load({pointer})) % {size}"
+
+
+def _value(mode: int, value: int, ip: int, size: int) -> str:
+    if mode == Mode.IMMEDIATE:
+        return f"{value}"
+    return f"int(data[{_address(mode, value, ip, size)}])"
+
+
+def _step_source(
+    name: str, instruction: Instruction, ip: int, size: int,
+) -> list[str]:
+    i = instruction
+    next_ip = (ip + 1) % size
+    if isinstance(i, Mov):
+        body = [
+            f"a = {_value(i.mode_a, i.a, ip, size)}",
+            f"b = {_address(i.mode_b, i.b, ip, size)}",
+            "store(b, a)",
+            f"return {next_ip}, b, text_at(b)",
+        ]
+    elif isinstance(i, (Add, Sub)):
+        answer = "a + int(data[b])" if isinstance(i, Add) else (
+            "int(data[b]) - a"
+        )
+        body = [
+            f"a = {_value(i.mode_a, i.a, ip, size)}",
+            f"b = {_address(i.mode_b, i.b, ip, size)}",
+            f"store(b, {answer})",
+            f"return {next_ip}, b, text_at(b)",
+        ]
+    elif isinstance(i, Jmp):
+        body = [
+            f"return {_address(i.mode_b, i.b, ip, size)}, None, '???'",
+        ]
+    elif isinstance(i, Jmz):
+        body = [
+            f"a = {_value(i.mode_a, i.a, ip, size)}",
+            f"b = {_value(i.mode_b, i.b, ip, size)}",
+            f"return (b % {size} if a == 0 else {next_ip}), None, '???'",
+        ]
+    elif isinstance(i, Djz):
+        body = [
+            f"a = {_address(i.mode_a, i.a, ip, size)}",
+            "answer = int(data[a]) - 1",
+            f"b = {_value(i.mode_b, i.b, ip, size)}",
+            "store(a, answer)",
+            f"return (b % {size} if answer == 0 else {next_ip}), a, "
+            "text_at(a)",
+        ]
+    elif isinstance(i, Cmp):
+        body = [
+            f"a = {_value(i.mode_a, i.a, ip, size)}",
+            f"b = {_value(i.mode_b, i.b, ip, size)}",
+            f"return ({(ip + 2) % size} if a == b else {next_ip}), None, "
+            "'???'",
+        ]
+    else:
+        raise TypeError(f"Can't compile {instruction!r}")
+
+    return [f"    def {name}():", *(f"        {line}" for line in body)]
+
+
+def _factory(start: int, size: int, words: tuple[int, ...]) -> Callable:
+    key = (start, size, words)
+    factory = _FACTORIES.get(key)
+    if factory is not None:
+        return factory
+
+    lines = ["def make(data, store, load, text_at):"]
+    names = []
+    for offset, word in enumerate(words):
+        name = f"step_{offset}"
+        ip = (start + offset) % size
+        lines.extend(_step_source(name, Instruction.from_int(word), ip, size))
+        names.append(name)
+    lines.append(f"    return ({', '.join(names)},)")
+
+    namespace: dict = {}
+    exec(compile("\n".join(lines), f"<block {start}>", "exec"), namespace)
+    factory = namespace["make"]
+    if len(_FACTORIES) >= _CACHE_LIMIT:
+        _FACTORIES.clear()
+    _FACTORIES[key] = factory
+    return factory
+
+
+class BlockCompiler:
+    def __init__(
+        self,
+        memory: Memory,
+        hot_threshold: int = HOT_THRESHOLD,
+        max_block_size: int = MAX_BLOCK_SIZE,
+    ):
+        self._memory = memory
+        self._data = memory._data
+        self._hot_threshold = hot_threshold
+        self._max_block_size = max_block_size
+        self._steps: dict[int, Step] = {}
+        self._heat: dict[int, int] = {}
+        self._helpers = _helpers(self._data)
+        memory.on_write = self.invalidate
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def invalidate(self, index: int) -> None:
+        # Rewritten cells cool down too, so imps never look hot
+        self._steps.pop(index, None)
+        self._heat.pop(index, None)
+
+    def step(self, ip: int) -> Step | None:
+        step = self._steps.get(ip)
+        if step is not None:
+            return step
+
+        heat = self._heat.get(ip, 0) + 1
+        if heat < self._hot_threshold:
+            self._heat[ip] = heat
+            return None
+
+        self._heat[ip] = 0
+        self._compile_block(ip)
+        return self._steps.get(ip)
+
+    def _block_words(self, start: int) -> tuple[int, ...]:
+        size = len(self._memory)
+        words = []
+        for offset in range(min(self._max_block_size, size)):
+            word = int(self._data[(start + offset) % size]) % Instruction.SIZE
+            try:
+                instruction = Instruction.from_int(word)
+            except RedcodeRuntimeError:
+                break
+            if not _compilable(instruction):
+                break
+            words.append(word)
+            if isinstance(instruction, _BRANCHES):
+                break
+        return tuple(words)
+
+    def _compile_block(self, start: int) -> None:
+        words = self._block_words(start)
+        if not words:
+            return
+
+        size = len(self._memory)
+        factory = _factory(start, size, words)
+        steps = factory(self._data, self._memory.__setitem__, *self._helpers)
+        for offset, step in enumerate(steps):
+            self._steps[(start + offset) % size] = step
+
+
+class CompiledProcess(Process):
+    def __init__(self, *args, compiler: BlockCompiler, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiler = compiler
+
+    def tick(self) -> Diff | None:
+        table, slot = self._table, self._slot
+        if not table.alive[slot]:
+            return super().tick()
+
+        ip = table.ips[slot]
+        step = self._compiler.step(ip)
+        if step is None:
+            return super().tick()
+
+        try:
+            next_ip, mem, value = step()
+        except RedcodeRuntimeError as e:
+            self._reason = str(e)
+            self.die()
+            return None
+        table.ips[slot] = next_ip
+        prev_word = None if mem is None else int(self._memory.overwritten)
+        return Diff(self._id, next_ip, mem, value, ip, prev_word)
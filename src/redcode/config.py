@@ -1,5 +1,7 @@
 MEMORY_SIZE: int = 1024
 MAX_PROGRAM_SIZE = 100  # Instructions
 MAX_TICKS: int = 8000
+HISTORY_POLICY = "all"  # "all", "ring" (last entries) or "spill" (to disk)
+HISTORY_SIZE = 4096  # Entries in the ring, or per spilled chunk
 
 COMMENT_SIGN = ";"
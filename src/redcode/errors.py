@@ -6,6 +6,46 @@ class MachineAlreadyRunning(RedcodeError):
     pass
 
 
+class CheckpointError(RedcodeError):
+    pass
+
+
+class ArchiveError(RedcodeError):
+    pass
+
+
+class HistoryEvicted(RedcodeError, IndexError):
+    pass
+
+
+class SharedCoreTimeout(RedcodeError, TimeoutError):
+    pass
+
+
+class LobbyError(RedcodeError):
+    pass
+
+
+class BadRoomName(LobbyError):
+    pass
+
+
+class TooManyRooms(LobbyError):
+    pass
+
+
+class NoSuchRoom(LobbyError):
+    pass
+
+
+class WrongShard(LobbyError):
+    pass
+
+
+class PlayerExists(LobbyError):
+    pass
+
+
 class ParseError(RedcodeError):
     def __init__(
         self, msg: str, line_index: int | None = None, line: str | None = None,
@@ -32,6 +72,10 @@ class EmptyCode(ParseError):
     pass
 
 
+class SizeLimitExceeded(ParseError):
+    pass
+
+
 class OperandPrefixError(ParseError):
     pass
 
@@ -49,10 +93,6 @@ class PartialParseError(RedcodeError):
         return self.error(self.msg, line_index, line)
 
 
-class SizeLimitExceeded(RedcodeError):
-    pass
-
-
 class RedcodeOutOfMemoryError(RedcodeError):
     pass
 
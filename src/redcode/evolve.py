@@ -0,0 +1,242 @@
+"""Genetic evolution of warriors, working directly on encoded programs"""
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+import random
+import time
+
+from redcode import config
+from redcode.instruction import Instruction, Mode, program_hash
+from redcode.tournament import duel
+
+
+Genome = tuple[int, ...]
+
+# Abstract bases register themselves with the inherited OPCODE = -1
+OPCODES = sorted(opcode for opcode in Instruction._opcodes if opcode >= 0)
+MODES = Mode.values()
+
+
+def random_instruction(rng: random.Random, reach: int = 64) -> int:
+    cls = Instruction._opcodes[rng.choice(OPCODES)]
+    a = rng.randint(-reach, reach)
+    b = rng.randint(-reach, reach)
+    if len(cls.ARGUMENTS) == 1:
+        return int(cls(Mode.IMMEDIATE, 0, rng.choice(MODES), b))
+    return int(cls(rng.choice(MODES), a, rng.choice(MODES), b))
+
+
+def random_genome(rng: random.Random, max_size: int = 8) -> Genome:
+    size = rng.randint(1, max_size)
+    return tuple(random_instruction(rng) for _ in range(size))
+
+
+def _mutate_word(word: int, rng: random.Random) -> int:
+    instruction = Instruction.from_int(word)
+    opcode, mode_a, a = instruction.opcode, instruction.mode_a, instruction.a
+    mode_b, b = instruction.mode_b, instruction.b
+    choice = rng.randrange(5)
+    if choice == 0:
+        return random_instruction(rng)
+    elif choice == 1:
+        opcode = rng.choice(OPCODES)
+    elif choice == 2:
+        mode_a, mode_b = rng.choice(MODES), rng.choice(MODES)
+    elif choice == 3:
+        a += rng.randint(-8, 8)
+    else:
+        b += rng.randint(-8, 8)
+
+    cls = Instruction._opcodes[opcode]
+    if len(cls.ARGUMENTS) == 1:
+        mode_a, a = Mode.IMMEDIATE, 0
+    return int(cls(mode_a, a, mode_b, b))
+
+
+def mutate(
+    genome: Genome,
+    rng: random.Random,
+    rate: float = 0.1,
+    max_size: int = config.MAX_PROGRAM_SIZE,
+) -> Genome:
+    words = [
+        _mutate_word(word, rng) if rng.random() < rate else word
+        for word in genome
+    ]
+    if rng.random() < rate and len(words) < max_size:
+        words.insert(rng.randint(0, len(words)), random_instruction(rng))
+    if rng.random() < rate and len(words) > 1:
+        del words[rng.randrange(len(words))]
+    return tuple(words)
+
+
+def crossover(
+    first: Genome,
+    second: Genome,
+    rng: random.Random,
+    max_size: int = config.MAX_PROGRAM_SIZE,
+) -> Genome:
+    cut_first = rng.randint(1, len(first))
+    cut_second = rng.randint(0, len(second))
+    child = first[:cut_first] + second[cut_second:]
+    return child[:max_size]
+
+
+def evaluate(
+    genome: Genome,
+    opponents: Sequence[Genome],
+    rounds: int = 4,
+    memory_size: int = config.MEMORY_SIZE,
+    max_ticks: int = config.MAX_TICKS,
+    seed: int = 0,
+) -> float:
+    """Average points per battle (3 for a win, 1 for a tie)"""
+    points = 0
+    for opponent in opponents:
+        for round_number in range(rounds):
+            outcome = duel(
+                genome, opponent, memory_size, max_ticks,
+                seed=seed + round_number,
+            )
+            points += outcome.points
+    return points / max(1, len(opponents) * rounds)
+
+
+def _evaluate_job(job: tuple) -> float:
+    return evaluate(*job)
+
+
+@dataclass
+class EvolutionStats:
+    generation: int = 0
+    evaluations: int = 0
+    cache_hits: int = 0
+    seconds: float = 0.0
+    best_score: float = 0.0
+    history: list[float] = field(default_factory=list)
+
+    @property
+    def evaluations_per_second(self) -> float:
+        return self.evaluations / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"Generation {self.generation}: best={self.best_score:.3f} "
+            f"evaluations={self.evaluations} cache_hits={self.cache_hits} "
+            f"({self.evaluations_per_second:.1f} evaluations/s)"
+        )
+
+
+class Evolver:
+    def __init__(
+        self,
+        opponents: Sequence[Sequence[int | Instruction]],
+        population_size: int = 32,
+        rounds: int = 4,
+        mutation_rate: float = 0.1,
+        elite: int = 2,
+        memory_size: int = config.MEMORY_SIZE,
+        max_ticks: int = config.MAX_TICKS,
+        jobs: int | None = None,
+        seed: int | None = None,
+        population: Sequence[Sequence[int | Instruction]] = (),
+    ):
+        if not opponents:
+            raise ValueError("At least one opponent is needed")
+
+        self.opponents = [tuple(map(int, o)) for o in opponents]
+        self.rounds = rounds
+        self.mutation_rate = mutation_rate
+        self.elite = elite
+        self.memory_size = memory_size
+        self.max_ticks = max_ticks
+        self.jobs = jobs
+        self.stats = EvolutionStats()
+        self.fitness: dict[str, float] = {}  # By program hash
+        self._rng = random.Random(seed)
+        self._pool: Executor | None = None
+        self.population: list[Genome] = [
+            tuple(map(int, p)) for p in population
+        ][:population_size]
+        while len(self.population) < population_size:
+            self.population.append(random_genome(self._rng))
+
+    def _job(self, genome: Genome) -> tuple:
+        return (
+            genome, self.opponents, self.rounds, self.memory_size,
+            self.max_ticks,
+        )
+
+    def score(self, genomes: Sequence[Genome]) -> list[float]:
+        missing = {}
+        for genome in genomes:
+            key = program_hash(genome)
+            if key in self.fitness or key in missing:
+                self.stats.cache_hits += 1
+            else:
+                missing[key] = genome
+
+        start = time.perf_counter()
+        jobs = [self._job(genome) for genome in missing.values()]
+        if self.jobs == 1 or len(jobs) <= 1:
+            scores = list(map(_evaluate_job, jobs))
+        else:
+            pool = self._executor()
+            scores = list(pool.map(_evaluate_job, jobs, chunksize=4))
+        self.stats.seconds += time.perf_counter() - start
+        self.stats.evaluations += len(jobs)
+
+        self.fitness.update(zip(missing, scores))
+        return [self.fitness[program_hash(genome)] for genome in genomes]
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.jobs)
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "Evolver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _select(self, ranked: list[tuple[float, Genome]]) -> Genome:
+        contenders = self._rng.sample(ranked, min(3, len(ranked)))
+        return max(contenders, key=lambda scored: scored[0])[1]
+
+    def step(self) -> EvolutionStats:
+        scores = self.score(self.population)
+        ranked = sorted(
+            zip(scores, self.population), key=lambda s: s[0], reverse=True,
+        )
+        self.stats.generation += 1
+        self.stats.best_score = ranked[0][0]
+        self.stats.history.append(ranked[0][0])
+
+        next_population = [genome for _, genome in ranked[:self.elite]]
+        while len(next_population) < len(self.population):
+            child = crossover(
+                self._select(ranked), self._select(ranked), self._rng,
+            )
+            next_population.append(
+                mutate(child, self._rng, self.mutation_rate)
+            )
+        self.population = next_population
+        return self.stats
+
+    def run(self, generations: int) -> Genome:
+        for _ in range(generations):
+            self.step()
+        return self.best
+
+    @property
+    def best(self) -> Genome:
+        return max(
+            self.population,
+            key=lambda g: self.fitness.get(program_hash(g), -1.0),
+        )
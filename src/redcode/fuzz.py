@@ -0,0 +1,226 @@
+"""Differential fuzzing of alternative engines against the reference one.
+
+Random scenarios (programs plus a random raw core, which may hold words that
+don't decode) run on both engines in worker processes. Any divergence is
+shrunk to a small scenario that still reproduces it.
+"""
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+import random
+
+from redcode.evolve import random_genome, random_instruction
+from redcode.instruction import Instruction
+from redcode.machine import Machine
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    memory_size: int
+    seed: int
+    max_ticks: int
+    programs: tuple[tuple[int, ...], ...]
+    core: tuple[int, ...] | None = None  # Raw cell values before loading
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Scenario":
+        core = data.get("core")
+        return cls(
+            memory_size=data["memory_size"],
+            seed=data["seed"],
+            max_ticks=data["max_ticks"],
+            programs=tuple(tuple(p) for p in data["programs"]),
+            core=tuple(core) if core is not None else None,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Result:
+    error: tuple[str, str] | None
+    history: tuple
+    core: tuple[int, ...]
+    ips: tuple[int, ...]
+    processes: tuple[tuple[bool, str], ...]
+
+
+def _machine_engine(compiled: bool) -> Callable[[Scenario], Machine]:
+    def build(scenario: Scenario) -> Machine:
+        return Machine(
+            scenario.memory_size, allow_single_process=True,
+            seed=scenario.seed, compiled=compiled,
+        )
+    return build
+
+
+ENGINES: dict[str, Callable[[Scenario], Machine]] = {
+    "reference": _machine_engine(compiled=False),
+    "compiled": _machine_engine(compiled=True),
+}
+
+
+def run_scenario(engine: str, scenario: Scenario) -> Result:
+    machine = ENGINES[engine](scenario)
+    error = None
+    try:
+        if scenario.core is not None:
+            machine.memory._data[:] = scenario.core
+        for i, program in enumerate(scenario.programs):
+            machine.load_program(list(program), f"Player {i}")
+        machine.run(scenario.max_ticks)
+    except Exception as e:  # Crashes are part of the observed behavior
+        error = (type(e).__name__, str(e))
+
+    return Result(
+        error=error,
+        history=tuple(machine.history),
+        core=tuple(int(word) for word in machine.memory._data),
+        ips=tuple(machine.ips),
+        processes=tuple((p.is_alive, p._reason) for p in machine.processes),
+    )
+
+
+def _run_job(job: tuple[str, Scenario]) -> Result:
+    return run_scenario(*job)
+
+
+def _random_word(rng: random.Random) -> int:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return rng.randrange(Instruction.SIZE)  # Mostly undecodable
+    elif kind == 1:
+        return rng.randint(-4096, 4096)  # Arithmetic leftovers
+    return random_instruction(rng)
+
+
+def generate(rng: random.Random) -> Scenario:
+    memory_size = rng.choice([32, 64, 100, 256, 1024])
+    core = None
+    if rng.random() < 0.5:
+        core = tuple(_random_word(rng) for _ in range(memory_size))
+    programs = tuple(
+        random_genome(rng, max_size=8) for _ in range(rng.randint(1, 3))
+    )
+    return Scenario(
+        memory_size=memory_size,
+        seed=rng.randrange(1 << 32),
+        max_ticks=rng.choice([50, 500, 2000]),
+        programs=programs,
+        core=core,
+    )
+
+
+@dataclass
+class Divergence:
+    scenario: Scenario
+    minimized: Scenario
+    reference: Result
+    candidate: Result
+
+    def describe(self) -> str:
+        fields = [
+            name for name in Result.__slots__
+            if getattr(self.reference, name) != getattr(self.candidate, name)
+        ]
+        return f"Diverged on {', '.join(fields)}: {self.minimized.to_dict()}"
+
+
+def _shrink_candidates(scenario: Scenario) -> Iterator[Scenario]:
+    programs = scenario.programs
+    if scenario.max_ticks > 1:
+        yield replace(scenario, max_ticks=scenario.max_ticks // 2)
+        yield replace(scenario, max_ticks=scenario.max_ticks - 1)
+    for i in range(len(programs)):
+        yield replace(scenario, programs=programs[:i] + programs[i + 1:])
+    for i, program in enumerate(programs):
+        for j in range(len(program) if len(program) > 1 else 0):
+            shorter = program[:j] + program[j + 1:]
+            shrunk = programs[:i] + (shorter,) + programs[i + 1:]
+            yield replace(scenario, programs=shrunk)
+    if scenario.core is not None:
+        yield replace(scenario, core=None)
+        core, size = list(scenario.core), len(scenario.core)
+        chunk = size // 2
+        while chunk >= 1:
+            for start in range(0, size, chunk):
+                if any(core[start:start + chunk]):
+                    cleared = core[:start] + [0] * chunk + core[start + chunk:]
+                    yield replace(scenario, core=tuple(cleared[:size]))
+            chunk //= 2
+
+
+def minimize(
+    scenario: Scenario,
+    diverges: Callable[[Scenario], bool],
+    max_attempts: int = 2000,
+) -> Scenario:
+    """Greedily shrink a diverging scenario while it keeps diverging"""
+    attempts = 0
+    progress = True
+    while progress and attempts < max_attempts:
+        progress = False
+        for candidate in _shrink_candidates(scenario):
+            attempts += 1
+            if candidate.programs and diverges(candidate):
+                scenario = candidate
+                progress = True
+                break
+            if attempts >= max_attempts:
+                break
+    return scenario
+
+
+class Fuzzer:
+    def __init__(
+        self,
+        candidate: str = "compiled",
+        reference: str = "reference",
+        jobs: int | None = None,
+    ):
+        self.candidate = candidate
+        self.reference = reference
+        self.jobs = jobs
+        self.scenarios = 0
+
+    def diverges(self, scenario: Scenario) -> bool:
+        return (
+            run_scenario(self.reference, scenario)
+            != run_scenario(self.candidate, scenario)
+        )
+
+    def _results(
+        self, scenarios: list[Scenario],
+    ) -> Iterator[tuple[Result, Result]]:
+        jobs = [
+            (engine, scenario)
+            for scenario in scenarios
+            for engine in (self.reference, self.candidate)
+        ]
+        if self.jobs == 1:
+            results = list(map(_run_job, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(pool.map(_run_job, jobs, chunksize=8))
+        return zip(results[::2], results[1::2])
+
+    def run(
+        self, iterations: int, seed: int | None = None,
+    ) -> list[Divergence]:
+        rng = random.Random(seed)
+        scenarios = [generate(rng) for _ in range(iterations)]
+        divergences = []
+        for scenario, (expected, got) in zip(
+            scenarios, self._results(scenarios),
+        ):
+            self.scenarios += 1
+            if expected == got:
+                continue
+            minimized = minimize(scenario, self.diverges)
+            divergences.append(Divergence(
+                scenario, minimized,
+                run_scenario(self.reference, minimized),
+                run_scenario(self.candidate, minimized),
+            ))
+        return divergences
@@ -0,0 +1,53 @@
+"""Per-cell access counters, accumulated while a battle runs"""
+from array import array
+from collections import Counter
+from collections.abc import Iterator
+
+NO_OWNER = -1
+
+
+class Heatmap:
+    def __init__(self, size: int):
+        self.reads = array("I", bytes(4 * size))
+        self.writes = array("I", bytes(4 * size))
+        self.executes = array("I", bytes(4 * size))
+        self.owners = array("h", [NO_OWNER]) * size  # Last writer's pid
+        self.pid = NO_OWNER  # The process executing right now
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def read(self, index: int) -> None:
+        self.reads[index] += 1
+
+    def write(self, index: int) -> None:
+        self.writes[index] += 1
+        self.owners[index] = self.pid
+
+    def execute(self, index: int, pid: int) -> None:
+        self.executes[index] += 1
+        self.pid = pid
+
+    def claim(self, start: int, end: int, pid: int) -> None:
+        self.owners[start:end] = array("h", [pid]) * (end - start)
+
+    def cells(self) -> Iterator[tuple[int, int, int, int, int]]:
+        """(index, reads, writes, executes, owner) of every touched cell"""
+        for index, counters in enumerate(zip(
+            self.reads, self.writes, self.executes, self.owners,
+        )):
+            if any(counters[:3]) or counters[3] != NO_OWNER:
+                yield index, *counters
+
+    def ownership(self) -> dict[int, int]:
+        """How many cells each process owns at the moment"""
+        owned = Counter(self.owners)
+        owned.pop(NO_OWNER, None)
+        return dict(owned)
+
+    def to_dict(self) -> dict:
+        return {
+            "size": len(self),
+            "cells": [list(cell) for cell in self.cells()],
+            "ownership": self.ownership(),
+        }
@@ -0,0 +1,275 @@
+"""Where a machine keeps its history, one entry per process tick.
+
+Entries are always addressed by their tick, however many of them are kept:
+    KeepAll      every entry, in a list (the default)
+    RingBuffer   only the last `size` entries
+    SpillToDisk  full chunks are sealed into a temporary file, in a compact
+                 binary form, and read back lazily when they are needed
+    Tail         the entries from a given tick on, for resumed battles
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator
+import struct
+import tempfile
+import threading
+from typing import IO
+
+from redcode import config
+from redcode.errors import HistoryEvicted
+from redcode.process import Diff
+
+
+Entry = Diff | None
+
+# kind (0 = None), pid, ip, index, previous ip, overwritten word, value size
+_ENTRY = struct.Struct("<BIIiiqH")
+
+
+class KeepAll(list):
+    @property
+    def first(self) -> int:
+        return 0
+
+
+class _Sink(ABC):
+    """Shared indexing for sinks that don't keep their entries in a list"""
+
+    first = 0  # The oldest tick that is still kept
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Ticks appended so far, including the evicted ones"""
+
+    @abstractmethod
+    def _get(self, tick: int) -> Entry:
+        """The entry of a kept tick, bounds were already checked"""
+
+    def __getitem__(self, key: int | slice) -> Entry | list[Entry]:
+        if isinstance(key, slice):
+            ticks = range(*key.indices(len(self)))
+            if ticks and min(ticks[0], ticks[-1]) < self.first:
+                raise HistoryEvicted(
+                    f"Ticks before {self.first} were evicted from the history"
+                )
+            return [self._get(tick) for tick in ticks]
+
+        tick = key + len(self) if key < 0 else key
+        if not 0 <= tick < len(self):
+            raise IndexError(f"No history entry for tick {key}")
+        if tick < self.first:
+            raise HistoryEvicted(f"Tick {tick} was evicted from the history")
+        return self._get(tick)
+
+    def __iter__(self) -> Iterator[Entry]:
+        for tick in range(self.first, len(self)):
+            yield self._get(tick)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (list, tuple, _Sink)):
+            return NotImplemented
+        return list(self) == list(other)
+
+
+class RingBuffer(_Sink):
+    def __init__(self, size: int = config.HISTORY_SIZE):
+        if size <= 0:
+            raise ValueError("History size must be greater than 0")
+        self.size = size
+        self._entries: list[Entry] = [None] * size
+        self._count = 0
+
+    @property
+    def first(self) -> int:
+        return max(0, self._count - self.size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, entry: Entry) -> None:
+        self._entries[self._count % self.size] = entry
+        self._count += 1
+
+    def _get(self, tick: int) -> Entry:
+        return self._entries[tick % self.size]
+
+    def clear(self) -> None:
+        self._entries = [None] * self.size
+        self._count = 0
+
+
+class Tail(_Sink):
+    def __init__(self, first: int = 0):
+        self.first = first
+        self._entries: list[Entry] = []
+
+    def __len__(self) -> int:
+        return self.first + len(self._entries)
+
+    def append(self, entry: Entry) -> None:
+        self._entries.append(entry)
+
+    def _get(self, tick: int) -> Entry:
+        return self._entries[tick - self.first]
+
+    def clear(self) -> None:
+        self.first = 0
+        self._entries.clear()
+
+
+def _signed_64_bit(word: int) -> int:
+    # Wide words may use the sign bit, which the signed field can't hold
+    return (word + (1 << 63)) % (1 << 64) - (1 << 63)
+
+
+def _unsigned_64_bit(word: int) -> int:
+    return word % (1 << 64)
+
+
+def _pack(entries: list[Entry]) -> bytes:
+    chunks = []
+    for diff in entries:
+        if diff is None:
+            chunks.append(_ENTRY.pack(0, 0, 0, -1, -1, 0, 0))
+            continue
+        value = (diff.value or "").encode()
+        chunks.append(_ENTRY.pack(
+            1, diff.pid, diff.ip,
+            -1 if diff.index is None else diff.index,
+            -1 if diff.prev_ip is None else diff.prev_ip,
+            _signed_64_bit(diff.prev_word or 0),
+            len(value),
+        ))
+        chunks.append(value)
+    return b"".join(chunks)
+
+
+def _unpack(data: bytes) -> list[Entry]:
+    entries: list[Entry] = []
+    offset = 0
+    while offset < len(data):
+        kind, pid, ip, index, prev_ip, prev_word, size = _ENTRY.unpack_from(
+            data, offset,
+        )
+        offset += _ENTRY.size
+        value = data[offset:offset + size].decode()
+        offset += size
+        if kind == 0:
+            entries.append(None)
+            continue
+        entries.append(Diff(
+            pid, ip,
+            None if index == -1 else index,
+            value,
+            None if prev_ip == -1 else prev_ip,
+            None if index == -1 else _unsigned_64_bit(prev_word),
+        ))
+    return entries
+
+
+class SpillToDisk(_Sink):
+    def __init__(
+        self,
+        chunk_size: int = config.HISTORY_SIZE,
+        directory: str | None = None,
+        cached_chunks: int = 2,
+    ):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be greater than 0")
+        self.chunk_size = chunk_size
+        self.directory = directory
+        self._cached_chunks = cached_chunks
+        self._current: list[Entry] = []
+        self._sealed: list[tuple[int, int]] = []  # (offset, length) in file
+        self._cache: OrderedDict[int, list[Entry]] = OrderedDict()
+        self._file: IO[bytes] | None = None  # Opened on the first spill
+        self._lock = threading.Lock()  # Readers may follow a running battle
+
+    def __len__(self) -> int:
+        return len(self._sealed) * self.chunk_size + len(self._current)
+
+    def append(self, entry: Entry) -> None:
+        self._current.append(entry)
+        if len(self._current) >= self.chunk_size:
+            self._seal()
+
+    def _seal(self) -> None:
+        data = _pack(self._current)
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(dir=self.directory)
+            offset = self._file.seek(0, 2)
+            self._file.write(data)
+            self._sealed.append((offset, len(data)))
+            self._current = []
+
+    def _chunk(self, number: int) -> list[Entry]:
+        with self._lock:
+            cached = self._cache.get(number)
+            if cached is not None:
+                self._cache.move_to_end(number)
+                return cached
+
+            if self._file is None or number >= len(self._sealed):
+                raise HistoryEvicted("The history was cleared")
+            offset, length = self._sealed[number]
+            self._file.seek(offset)
+            entries = _unpack(self._file.read(length))
+            self._cache[number] = entries
+            if len(self._cache) > self._cached_chunks:
+                self._cache.popitem(last=False)
+            return entries
+
+    def _get(self, tick: int) -> Entry:
+        number, position = divmod(tick, self.chunk_size)
+        # Sealing appends to _sealed before replacing _current, so reading
+        # _current first never pairs a fresh chunk with a stale count
+        current, sealed = self._current, len(self._sealed)
+        if number >= sealed:
+            return current[position]
+        return self._chunk(number)[position]
+
+    def __iter__(self) -> Iterator[Entry]:
+        for number in range(len(self._sealed)):
+            yield from self._chunk(number)
+        yield from list(self._current)
+
+    def clear(self) -> None:
+        self.close()
+        self._current = []
+        self._sealed = []
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __deepcopy__(self, memo: dict) -> "SpillToDisk":
+        copy = SpillToDisk(
+            self.chunk_size, self.directory, self._cached_chunks,
+        )
+        for entry in self:
+            copy.append(entry)
+        return copy
+
+
+HistorySink = KeepAll | RingBuffer | SpillToDisk | Tail
+
+POLICIES = {
+    "all": lambda size: KeepAll(),
+    "ring": RingBuffer,
+    "spill": SpillToDisk,
+}
+
+
+def create(
+    policy: str = config.HISTORY_POLICY, size: int = config.HISTORY_SIZE,
+) -> HistorySink:
+    """A sink for `policy`, where `size` is the ring or chunk length"""
+    try:
+        factory = POLICIES[policy]
+    except KeyError:
+        raise ValueError(f"Unknown history policy {policy!r}")
+    return factory(size)
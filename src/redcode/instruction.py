@@ -1,4 +1,6 @@
+from collections.abc import Iterable
 from enum import IntEnum
+import hashlib
 from typing import TYPE_CHECKING, NamedTuple, NewType
 
 from redcode.errors import BadOpcode, BadModeForA, BadModeForB, DatError
@@ -40,6 +42,77 @@ class Arguments:
     B = ArgType(1)
 
 
+class Encoding:
+    """Words are opcode (4 bits), mode A and B (2 bits each), then A and B.
+
+    The operand fields are `field_bits` wide, so a core of up to
+    2 ** field_bits cells can be addressed without offsets wrapping.
+    """
+
+    def __init__(self, field_bits: int):
+        self.field_bits = field_bits
+        self.size = 1 << (2 * field_bits + 8)  # Number of distinct words
+        self.max_core_size = 1 << field_bits
+        self._mask = (1 << field_bits) - 1
+        self._mode_b_shift = 2 * field_bits
+        self._mode_a_shift = 2 * field_bits + 2
+        self._opcode_shift = 2 * field_bits + 4
+
+    @classmethod
+    def for_core(cls, memory_size: int) -> "Encoding":
+        for encoding in (STANDARD, WIDE):
+            if memory_size <= encoding.max_core_size:
+                return encoding
+        raise ValueError(f"No encoding can address {memory_size} cells")
+
+    @property
+    def is_standard(self) -> bool:
+        return self is STANDARD
+
+    def signed(self, n: int) -> int:
+        n = int(n) & self._mask
+        return n - (self._mask + 1) if n > (self._mask >> 1) else n
+
+    def encode(self, instruction: "Instruction") -> int:
+        return (
+            (instruction.opcode << self._opcode_shift) |
+            (instruction.mode_a << self._mode_a_shift) |
+            (instruction.mode_b << self._mode_b_shift) |
+            ((instruction.a & self._mask) << self.field_bits) |
+            (instruction.b & self._mask)
+        )
+
+    def decode(self, word: "int | Instruction") -> "Instruction":
+        if self.is_standard:
+            return Instruction.from_int(word)
+
+        word = int(word)
+        opcode = (word >> self._opcode_shift) & 0b1111
+        if opcode not in Instruction._opcodes:
+            raise BadOpcode(opcode)
+
+        mode_a = (word >> self._mode_a_shift) & 0b11
+        if mode_a not in Mode.values():
+            raise BadModeForA(mode_a)
+
+        mode_b = (word >> self._mode_b_shift) & 0b11
+        if mode_b not in Mode.values():
+            raise BadModeForB(mode_b)
+
+        a = (word >> self.field_bits) & self._mask
+        b = word & self._mask
+        return Instruction._opcodes[opcode](
+            mode_a, a, mode_b, b, encoding=self,
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.field_bits})"
+
+
+STANDARD = Encoding(12)  # 32-bit words, `int(Instruction)`
+WIDE = Encoding(28)  # 64-bit words, for cores of up to 2 ** 28 cells
+
+
 class Instruction:
     OPCODE = -1
     ARGUMENTS = []
@@ -50,13 +123,19 @@ class Instruction:
 
     def __init__(
         self, mode_a: Mode, a: int, mode_b: Mode, b: int,
+        encoding: Encoding | None = None,  # None for the standard one
     ):
         self.name = self.__class__.__name__.upper()
         self.opcode = self.OPCODE
+        self.encoding = encoding if encoding is not STANDARD else None
         self.mode_a = mode_a
-        self.a = self._to_signed_12_bit(a)
         self.mode_b = mode_b
-        self.b = self._to_signed_12_bit(b)
+        if self.encoding is None:
+            self.a = self._to_signed_12_bit(a)
+            self.b = self._to_signed_12_bit(b)
+        else:
+            self.a = self.encoding.signed(a)
+            self.b = self.encoding.signed(b)
 
     def __init_subclass__(cls) -> None:
         cls._classes[cls.__name__.upper()] = cls
@@ -112,6 +191,9 @@ class Instruction:
         return f"{opcode_name} {a}, {b}"
 
     def __int__(self):
+        if self.encoding is not None:
+            return self.encoding.encode(self)
+
         mask_12bit = (2 << 11) - 1
         neg_offset = 0x1000
 
@@ -157,6 +239,7 @@ class SingleArgInstruction(Instruction):
         a: int | None = None,
         mode_b: Mode | None = None,
         b: int | None = None,
+        encoding: Encoding | None = None,
     ):
         # Arrange arguments
         if mode_b is None and b is None:
@@ -168,7 +251,7 @@ class SingleArgInstruction(Instruction):
             mode_b = Mode.RELATIVE
 
         assert a is not None and b is not None
-        super().__init__(mode_a, a, mode_b, b)
+        super().__init__(mode_a, a, mode_b, b, encoding)
 
 
 class Dat(SingleArgInstruction):
@@ -177,8 +260,8 @@ class Dat(SingleArgInstruction):
     ARGUMENTS = [Arguments.B]
 
     @classmethod
-    def of(cls, value: int) -> "Dat":
-        return Dat(Mode.IMMEDIATE, value)
+    def of(cls, value: int, encoding: Encoding | None = None) -> "Dat":
+        return Dat(Mode.IMMEDIATE, value, encoding=encoding)
 
     def run(self, ip: int, memory: "Memory") -> InstructionResult:
         raise DatError("DAT instruction encountered")
@@ -204,8 +287,9 @@ class Add(Instruction):
 
     def run(self, ip: int, memory: "Memory") -> InstructionResult:
         op_a = memory.value(self.mode_a, self.a, ip)
-        op_b = memory.value(self.mode_b, self.b, ip)
+        # Reading through the address counts an indirect pointer only once
         address_b = memory.address(self.mode_b, self.b, ip)
+        op_b = memory.safely_read_int(address_b)
         memory[address_b] = answer = int(op_a) + int(op_b)
         jump_to = (ip + 1) % len(memory)
         return InstructionResult(jump_to, address_b, answer)
@@ -218,8 +302,9 @@ class Sub(Instruction):
 
     def run(self, ip: int, memory: "Memory") -> InstructionResult:
         op_a = memory.value(self.mode_a, self.a, ip)
-        op_b = memory.value(self.mode_b, self.b, ip)
+        # Reading through the address counts an indirect pointer only once
         address_b = memory.address(self.mode_b, self.b, ip)
+        op_b = memory.safely_read_int(address_b)
         memory[address_b] = answer = int(op_b) - int(op_a)
         jump_to = (ip + 1) % len(memory)
         return InstructionResult(jump_to, address_b, answer)
@@ -254,7 +339,7 @@ class Djz(Instruction):
 
     def run(self, ip: int, memory: "Memory") -> InstructionResult:
         address_a = memory.address(self.mode_a, self.a, ip)
-        op_a = memory.value(self.mode_a, self.a, ip)
+        op_a = memory.safely_read_int(address_a)
         op_b = memory.value(self.mode_b, self.b, ip)
         answer = int(op_a) - 1
         memory[address_a] = answer
@@ -275,3 +360,16 @@ class Cmp(Instruction):
         new_ip = (ip + add_to_ip) % len(memory)
 
         return InstructionResult(new_ip, None, None)
+
+
+def program_hash(
+    program: Iterable[int | Instruction], encoding: Encoding = STANDARD,
+) -> str:
+    """Stable identity of a program, based on its encoded words"""
+    digest = hashlib.sha256()
+    width = (encoding.size.bit_length() + 6) // 8  # Bytes per word
+    for word in program:
+        if isinstance(word, Instruction) and not encoding.is_standard:
+            word = encoding.encode(word)
+        digest.update((int(word) % encoding.size).to_bytes(width, "little"))
+    return digest.hexdigest()
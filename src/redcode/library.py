@@ -0,0 +1,98 @@
+"""Load whole directory trees of warriors, parsing them in parallel"""
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from redcode.code import parse_code
+from redcode.errors import RedcodeError
+from redcode.instruction import program_hash
+
+
+PATTERNS = ("*.red",)
+
+
+@dataclass(frozen=True, slots=True)
+class Warrior:
+    name: str
+    path: Path
+    words: tuple[int, ...]
+    hash: str
+
+
+@dataclass(frozen=True, slots=True)
+class Diagnostic:
+    path: Path
+    errors: tuple[str, ...]
+
+    def __str__(self):
+        return f"{self.path}: {'; '.join(self.errors)}"
+
+
+def parse_file(path: Path) -> Warrior | Diagnostic:
+    try:
+        code = path.read_text()
+    except (OSError, UnicodeDecodeError) as e:
+        return Diagnostic(path, (f"Can't read file: {e}",))
+
+    try:
+        instructions = parse_code(code)
+    except ExceptionGroup as e:
+        return Diagnostic(path, tuple(map(str, e.exceptions)))
+    except RedcodeError as e:
+        return Diagnostic(path, (str(e),))
+
+    words = tuple(int(instruction) for instruction in instructions)
+    return Warrior(path.stem, path, words, program_hash(words))
+
+
+def scan(root: str | Path, patterns: Iterable[str] = PATTERNS) -> list[Path]:
+    root = Path(root)
+    paths = {path for pattern in patterns for path in root.rglob(pattern)}
+    return sorted(path for path in paths if path.is_file())
+
+
+@dataclass
+class Library:
+    warriors: dict[str, Warrior] = field(default_factory=dict)  # By hash
+    duplicates: dict[str, list[Path]] = field(default_factory=dict)
+    diagnostics: list[Diagnostic] = field(default_factory=list)
+
+    def add(self, result: Warrior | Diagnostic) -> None:
+        if isinstance(result, Diagnostic):
+            self.diagnostics.append(result)
+        elif result.hash in self.warriors:
+            self.duplicates.setdefault(result.hash, []).append(result.path)
+        else:
+            self.warriors[result.hash] = result
+
+    @classmethod
+    def load(
+        cls,
+        root: str | Path,
+        patterns: Iterable[str] = PATTERNS,
+        jobs: int | None = None,
+        chunksize: int = 64,
+    ) -> "Library":
+        library = cls()
+        paths = scan(root, patterns)
+        if jobs == 1 or len(paths) <= chunksize:
+            for result in map(parse_file, paths):
+                library.add(result)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                for result in pool.map(parse_file, paths, chunksize=chunksize):
+                    library.add(result)
+        return library
+
+    def __len__(self) -> int:
+        return len(self.warriors)
+
+    def __iter__(self) -> Iterator[Warrior]:
+        return iter(self.warriors.values())
+
+    def __contains__(self, program_id: object) -> bool:
+        return program_id in self.warriors
+
+    def __getitem__(self, program_id: str) -> Warrior:
+        return self.warriors[program_id]
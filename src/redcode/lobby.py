@@ -0,0 +1,202 @@
+"""Rooms, each with its own uploaded warriors and shared battles.
+
+A room's registry has its own lock, and its battles run in its own broadcast
+hub, so rooms never contend with each other. Rooms are sharded by a stable
+hash of their names, which lets a front proxy spread them across processes.
+Rooms are opened by uploads only, and make way for new ones once they are
+empty or idle.
+"""
+from collections.abc import Callable, Iterator
+import re
+import threading
+import time
+import zlib
+
+from redcode import config, history
+from redcode.broadcast import Broadcast, BroadcastHub
+from redcode.code import canonical_hash
+from redcode.errors import (
+    BadRoomName, NoSuchRoom, PlayerExists, TooManyRooms, WrongShard,
+)
+from redcode.machine import Machine
+
+
+DEFAULT_ROOM = "main"
+MAX_ROOMS = 1024
+IDLE_SECONDS = 3600  # Since the last upload or battle, before eviction
+ROOM_NAME = re.compile(r"[A-Za-z0-9_-]{1,32}")
+
+Uploads = tuple[tuple[str, str], ...]  # (player name, code)
+
+
+def battle_history() -> history.HistorySink:
+    """A sink for the configured policy that viewers can replay from tick 0
+
+    Viewers rebuild every move from the start of the battle, so a ring,
+    which evicts the oldest entries, spills them to disk instead.
+    """
+    policy = config.HISTORY_POLICY
+    if policy == "ring":
+        policy = "spill"
+    return history.create(policy, config.HISTORY_SIZE)
+
+
+def build_battle(uploads: Uploads, heatmap: bool = False) -> Machine:
+    # Heatmap counters need the reference engine, otherwise compile
+    instance = Machine(
+        allow_single_process=False, heatmap=heatmap, compiled=not heatmap,
+        history=battle_history(),
+    )
+    for player_name, code in uploads:
+        instance.load_code(code, player_name)
+    return instance
+
+
+def shard_of(room_name: str, shards: int) -> int:
+    return zlib.crc32(room_name.encode()) % shards
+
+
+class Room:
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[Uploads], Machine] = build_battle,
+        hub: BroadcastHub | None = None,
+    ):
+        self.name = name
+        self.hub = hub if hub is not None else BroadcastHub()
+        self._build = build
+        self._uploads: dict[str, str] = {}
+        self._programs: dict[str, str] = {}  # Canonical hash by player
+        self._lock = threading.Lock()
+        self.used = time.monotonic()
+
+    def submit(self, player_name: str, code: str) -> None:
+        # Parsing is the slow part, so it happens before taking the lock
+        program = canonical_hash(code)
+        with self._lock:
+            if player_name in self._uploads:
+                raise PlayerExists(f"We already have code for {player_name}")
+            self._uploads[player_name] = code
+            self._programs[player_name] = program
+            self.used = time.monotonic()
+
+    @property
+    def uploads(self) -> Uploads:
+        with self._lock:
+            return tuple(self._uploads.items())
+
+    @property
+    def players(self) -> list[str]:
+        return [player_name for player_name, _ in self.uploads]
+
+    def __len__(self) -> int:
+        return len(self._uploads)
+
+    def battle(self) -> Broadcast:
+        # Battles are keyed by player and program hash, so the same players
+        # with reformatted code share one simulation. Names are part of the
+        # key because the battle shows them. Starting under the lock keeps a
+        # reset from clearing the hub in between
+        with self._lock:
+            uploads = tuple(self._uploads.items())
+            key = tuple(self._programs.items())
+            self.used = time.monotonic()
+            return self.hub.start(key, lambda: self._build(uploads))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._uploads.clear()
+            self._programs.clear()
+            self.hub.clear()
+
+
+class Lobby:
+    def __init__(
+        self,
+        build: Callable[[Uploads], Machine] = build_battle,
+        max_rooms: int = MAX_ROOMS,
+        shard: int = 0,
+        shards: int = 1,
+        idle_seconds: float = IDLE_SECONDS,
+    ):
+        if not 0 <= shard < shards:
+            raise ValueError(f"Bad shard {shard} of {shards}")
+        self.shard = shard
+        self.shards = shards
+        self._build = build
+        self._max_rooms = max_rooms
+        self._idle_seconds = idle_seconds
+        self._rooms: dict[str, Room] = {}
+        self._lock = threading.Lock()
+
+    def owns(self, room_name: str) -> bool:
+        return shard_of(room_name, self.shards) == self.shard
+
+    def check(self, name: str) -> None:
+        """Raise if `name` can't be a room of this shard"""
+        if not ROOM_NAME.fullmatch(name):
+            raise BadRoomName(f"Bad room name {name!r}")
+        if not self.owns(name):
+            raise WrongShard(
+                f"Room {name} lives in shard {shard_of(name, self.shards)}"
+            )
+
+    def room(self, name: str) -> Room:
+        """Get a room, opening it on first use"""
+        room = self._rooms.get(name)
+        if room is not None:
+            return room
+
+        self.check(name)
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is None:
+                if len(self._rooms) >= self._max_rooms:
+                    self._evict()
+                if len(self._rooms) >= self._max_rooms:
+                    limit = self._max_rooms
+                    raise TooManyRooms(f"Can't open more than {limit} rooms")
+                room = self._rooms[name] = Room(name, self._build)
+            return room
+
+    def _evict(self) -> None:
+        # Called with the lock held, when a new room needs a place
+        idle_since = time.monotonic() - self._idle_seconds
+        for name, room in list(self._rooms.items()):
+            if name != DEFAULT_ROOM and (
+                not len(room) or room.used < idle_since
+            ):
+                del self._rooms[name]
+                room.reset()
+
+    def get(self, name: str) -> Room | None:
+        return self._rooms.get(name)
+
+    def existing(self, name: str) -> Room:
+        """Get a room without opening it, the default room is always open"""
+        if name == DEFAULT_ROOM:
+            return self.room(name)
+        room = self._rooms.get(name)
+        if room is None:
+            raise NoSuchRoom(f"There is no room {name!r}")
+        return room
+
+    def close(self, name: str) -> None:
+        with self._lock:
+            room = self._rooms.pop(name, None)
+        if room is not None:
+            room.reset()
+
+    @property
+    def players(self) -> int:
+        return sum(len(room) for room in list(self._rooms.values()))
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __iter__(self) -> Iterator[Room]:
+        return iter(list(self._rooms.values()))
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._rooms
@@ -1,14 +1,45 @@
+from collections.abc import Sequence
 import copy
 import dataclasses
+import functools
 import json
 from pathlib import Path
+import secrets
+import time
 
-from redcode import config
-from redcode.code import Parser, Validator
-from redcode.errors import MachineAlreadyRunning
-from redcode.instruction import Instruction
+from redcode import config, metrics
+from redcode.code import parse_code
+from redcode.compiler import BlockCompiler, CompiledProcess
+from redcode.errors import (
+    HistoryEvicted, MachineAlreadyRunning, RedcodeRuntimeError,
+)
+from redcode.heatmap import Heatmap
+from redcode.history import HistorySink, create as create_history
+from redcode.instruction import STANDARD, Encoding, Instruction
 from redcode.memory import Memory
-from redcode.process import Diff, Process
+from redcode.process import Diff, Process, ProcessTable
+from redcode.shared import SharedCore
+
+
+@functools.lru_cache(maxsize=4096)
+def word_text(word: int, encoding: Encoding = STANDARD) -> str:
+    try:
+        return str(encoding.decode(word % encoding.size))
+    except RedcodeRuntimeError:
+        return "???"
+
+
+def as_move(
+    diff: Diff,
+    prev_owner: int | None = None,
+    encoding: Encoding = STANDARD,
+) -> dict:
+    """A diff as a dict, with what it overwrote so it can be undone"""
+    move = dataclasses.asdict(diff)
+    if diff.prev_word is not None:
+        move["prev_value"] = word_text(diff.prev_word, encoding)
+        move["prev_owner"] = prev_owner
+    return move
 
 
 class Machine:
@@ -16,13 +47,28 @@ class Machine:
         self,
         memory_size: int = config.MEMORY_SIZE,
         allow_single_process: bool = False,
+        seed: int | None = None,
+        compiled: bool = False,
+        heatmap: bool = False,
+        history: HistorySink | None = None,
+        encoding: Encoding | None = None,  # The narrowest that fits the core
     ):
-        self.memory = Memory(memory_size)
+        self.seed = seed if seed is not None else secrets.randbits(32)
+        self.compiled = compiled
+        self.track_heatmap = heatmap
+        self.encoding = encoding or Encoding.for_core(memory_size)
+        self.memory = Memory(memory_size, self.seed, self.encoding)
+        self._compiler: BlockCompiler | None = None
+        self._prepare_memory()
         self.processes: list[Process] = []
+        self.table = ProcessTable()
+        self.programs: list[tuple[str, list[int]]] = []
         self.start_state: Machine | None = None
         self.start_map: list[int | None] = [None] * len(self.memory)
-        self._history: list[Diff | None] = []
+        self.max_ticks = config.MAX_TICKS
+        self._history = history if history is not None else create_history()
         self._ticks = 0
+        self._run_seconds = 0.0  # Simulated so far, over every resume
         self._allow_single_process = allow_single_process
 
     def __getitem__(self, address: int) -> int | Instruction:
@@ -31,39 +77,78 @@ class Machine:
     def __setitem__(self, address: int, value: Instruction) -> None:
         self.memory[address] = value
 
+    def _prepare_memory(self) -> None:
+        if self.track_heatmap:
+            # Compiled steps skip the counters, so the reference engine runs
+            self.memory.heatmap = Heatmap(len(self.memory))
+        elif self.compiled and self.encoding.is_standard:
+            # Compiled steps are generated for 32-bit words only
+            self._compiler = BlockCompiler(self.memory)
+
+    @property
+    def heatmap(self) -> Heatmap | None:
+        return self.memory.heatmap
+
     def reset(self):
-        self.memory = Memory(len(self.memory))
+        shared = self.memory.shared
+        self.memory = Memory(len(self.memory), self.seed, self.encoding)
+        self._compiler = None
+        self._prepare_memory()
+        if shared is not None:
+            self.memory.share(shared)
         self.processes.clear()
+        self.table = ProcessTable()
+        self.programs.clear()
         self.start_state = None
         self._history.clear()
         self._ticks = 0
+        self._run_seconds = 0.0
 
     def _spawn_process(
-        self, program: list[Instruction], player_name: str,
+        self, program: Sequence[int | Instruction], player_name: str,
     ) -> None:
         code_starts = self.memory.allocate(program, override=False)
         code_ends = code_starts + len(program)
-        process = Process(
-            len(self.processes),
-            code_starts,
-            self.memory,
-            player_name,
-        )
+        if self._compiler is not None:
+            process: Process = CompiledProcess(
+                len(self.processes),
+                code_starts,
+                self.memory,
+                player_name,
+                table=self.table,
+                compiler=self._compiler,
+            )
+        else:
+            process = Process(
+                len(self.processes),
+                code_starts,
+                self.memory,
+                player_name,
+                table=self.table,
+            )
         self.start_map[code_starts:code_ends] = [process._id] * len(program)
+        if self.memory.heatmap is not None:
+            self.memory.heatmap.claim(code_starts, code_ends, process._id)
         self.processes.append(process)
+        self.programs.append(
+            (player_name, [int(instruction) for instruction in program])
+        )
 
     def _create_code_from_text(self, code: str) -> list[Instruction]:
-        validator = Validator(code)
-        if not validator.is_valid():
-            raise ExceptionGroup("Code parsing failed", validator.errors)
-
-        program = Parser(code)
-        program.parse()
-        return program.instructions
+        with metrics.PARSE_SECONDS.time():
+            try:
+                return parse_code(code, encoding=self.encoding)
+            except ExceptionGroup:
+                metrics.PARSE_FAILURES.inc()
+                raise
 
     @property
     def _processes_alive(self) -> int:
-        return sum(process.is_alive for process in self.processes)
+        return self.table.alive_count
+
+    @property
+    def survivors(self) -> list[Process]:
+        return [self.processes[slot] for slot in self.table.running()]
 
     @property
     def halted(self) -> bool:
@@ -76,6 +161,28 @@ class Machine:
         program = self._create_code_from_text(code)
         self._spawn_process(program, player_name)
 
+    def load_program(
+        self,
+        program: Sequence[int | Instruction],
+        player_name: str,
+        encoding: Encoding = STANDARD,  # Of the words in `program`
+    ) -> None:
+        if encoding is not self.encoding or not encoding.is_standard:
+            words = [self._transcode(word, encoding) for word in program]
+            self._spawn_process(words, player_name)
+            return
+
+        # Encoded words are placed as they are, without building instructions
+        words = [int(word) % Instruction.SIZE for word in program]
+        for word in words:
+            Instruction.from_int(word)  # Might fire RedcodeRuntimeError
+        self._spawn_process(words, player_name)
+
+    def _transcode(self, word: int | Instruction, encoding: Encoding) -> int:
+        if not isinstance(word, Instruction):
+            word = encoding.decode(int(word) % encoding.size)  # Might raise
+        return self.encoding.encode(word)
+
     def load_file(self, path: str | Path, player_name: str) -> None:
         path = Path(path)
         text = path.read_text()
@@ -86,28 +193,98 @@ class Machine:
         return [process._ip for process in self.processes]
 
     @property
-    def history(self) -> list[Diff | None]:
+    def history(self) -> HistorySink:
         return self._history
 
     @property
     def json_history(self) -> str:
-        return json.dumps(
-            [act and dataclasses.asdict(act) for act in self._history]
-        )
+        return json.dumps(self.moves())
+
+    def moves(self) -> list[dict | None]:
+        if self._history.first:
+            # Owners are replayed from the start, evicted ticks included
+            raise HistoryEvicted("Moves need the whole history")
+        owners = list(self.start_map)
+        moves: list[dict | None] = []
+        for diff in self._history:
+            if diff is None or diff.index is None:
+                moves.append(diff and as_move(diff, encoding=self.encoding))
+                continue
+            moves.append(as_move(diff, owners[diff.index], self.encoding))
+            owners[diff.index] = diff.pid
+        return moves
 
     def round(self):
         if self.halted:
             return
 
-        for process in self.processes:
-            self._history.append(process.tick())
-            self._ticks += 1
+        # Dead processes aren't ticked, but they keep their place in the
+        # history: entry i always belongs to process i % len(processes)
+        append, processes = self._history.append, self.processes
+        shared = self.memory.shared
+        if shared is not None:
+            shared.begin()
+        try:
+            expected = 0
+            for slot in self.table.running():
+                for _ in range(expected, slot):
+                    append(None)
+                append(processes[slot].tick())
+                expected = slot + 1
+            for _ in range(expected, len(processes)):
+                append(None)
+            self._ticks += len(processes)
+        finally:
+            # Readers wait for the counter to be even again, even if we fail
+            if shared is not None:
+                shared.end(self._ticks, self.table.ips, self.table.alive)
+
+    def share(self, name: str | None = None) -> SharedCore:
+        """Mirror the core into a new shared block, after loading programs.
+
+        Other processes attach to it by name, see `redcode.shared`. The
+        caller owns the block and unlinks it when the readers are done.
+        """
+        core = SharedCore.create(
+            len(self.memory), len(self.processes), self.encoding, name,
+        )
+        self.memory.share(core)
+        core.begin()
+        core.end(self._ticks, self.table.ips, self.table.alive)
+        return core
 
-    def run(self, max_ticks: int = config.MAX_TICKS):
+    @property
+    def finished(self) -> bool:
+        return self._ticks > self.max_ticks or self.halted
+
+    def run(
+        self, max_ticks: int = config.MAX_TICKS, budget: int | None = None,
+    ):
         if self._ticks > 0:
             raise MachineAlreadyRunning()
+        self.max_ticks = max_ticks
         if self.start_state is None:
             self.start_state = copy.deepcopy(self)
 
-        while self._ticks <= max_ticks and not self.halted:
+        self.resume(budget)
+
+    def resume(self, budget: int | None = None):
+        """Continue running for at most `budget` rounds (None = to the end)"""
+        if self.finished:
+            return
+
+        ticks_before = self._ticks
+        started = time.perf_counter()
+        rounds = 0
+        while not self.finished:
+            if budget is not None and rounds >= budget:
+                break
             self.round()
+            rounds += 1
+        self._run_seconds += time.perf_counter() - started
+
+        metrics.TICKS.inc(self._ticks - ticks_before)
+        if self.finished:
+            # Once per battle, however many chunks it was resumed in
+            metrics.RUN_SECONDS.observe(self._run_seconds)
+            metrics.BATTLES.inc()
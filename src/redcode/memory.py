@@ -1,19 +1,24 @@
 import bisect
 from copy import deepcopy
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator, Sequence
 from dataclasses import dataclass
 import json
+import random
 import secrets
 from typing import Optional, TypeVar
 
 from redcode.errors import (
     BadMode, RedcodeIndexError, RedcodeOutOfMemoryError, RedcodeRuntimeError
 )
-from redcode.instruction import Dat, Instruction, Mode
+from redcode.heatmap import Heatmap
+from redcode.instruction import STANDARD, Dat, Encoding, Instruction, Mode
+from redcode.shared import SharedCore
 
 
 T = TypeVar("T")
 
+_SYSTEM_RANDOM = secrets.SystemRandom()
+
 
 @dataclass(frozen=True)
 class Sector:
@@ -91,18 +96,20 @@ class Sectors:
 
     @staticmethod
     def _sub(mem: "Sectors", taken: Sector) -> "Sectors":
-        sectors = []
-        for sector in mem._sectors:
-            if taken.start <= sector.end and taken.end >= sector.start:
-                if sector.start < taken.start:
-                    bisect.insort(sectors, Sector(sector.start, taken.start))
-                if sector.end > taken.end:
-                    bisect.insort(sectors, Sector(taken.end, sector.end))
-            else:
-                bisect.insort(sectors, sector)
-
-        mem._sectors = sectors
-        mem.consolidate()
+        # Sectors are sorted and disjoint, so only a run of them can overlap
+        sectors = mem._sectors
+        first = bisect.bisect_right(sectors, taken.start, key=lambda s: s.end)
+        last = first
+        while last < len(sectors) and sectors[last].start < taken.end:
+            last += 1
+
+        remains = []
+        for sector in sectors[first:last]:
+            if sector.start < taken.start:
+                remains.append(Sector(sector.start, taken.start))
+            if sector.end > taken.end:
+                remains.append(Sector(taken.end, sector.end))
+        sectors[first:last] = remains
         return mem
 
     def find_block(self, minimum_size: int = 0) -> Iterator[Sector]:
@@ -149,25 +156,56 @@ class Sectors:
 
 
 class Memory:
-    def __init__(self, size: int):
+    def __init__(
+        self,
+        size: int,
+        seed: int | None = None,
+        encoding: Encoding = STANDARD,
+    ):
         if size <= 0:
             raise ValueError("Memory size must be greater than 0")
-
-        self._data: list[int | Instruction] = [Dat.of(0) for _ in range(size)]
+        if size > encoding.max_core_size:
+            raise ValueError(f"{encoding} can't address {size} cells")
+
+        self.encoding = encoding
+        self._word_size = encoding.size
+        # The standard encoding skips a call, it's the hot path of every tick
+        self._decode = (
+            Instruction.from_int if encoding.is_standard else encoding.decode
+        )
+        self._data: list[int | Instruction] = [
+            Dat.of(0, encoding) for _ in range(size)
+        ]
         self._free = Sectors([Sector(0, size)])
         self._index = 0
+        # Seeded memories place code deterministically, to allow replays
+        self._random = random.Random(seed) if seed is not None else None
+        # Called with the index of every overwritten cell, if set
+        self.on_write: Callable[[int], None] | None = None
+        self.heatmap: Heatmap | None = None
+        self.shared: SharedCore | None = None  # Mirror of the cells, if set
+        self.overwritten: int | Instruction = 0  # By the last write
 
     def allocate(
-        self, code: list[Instruction], override: bool = True,
+        self, code: Sequence[int | Instruction], override: bool = True,
     ) -> int:
         free_sectors = self._get_free_sectors(len(code), override)
-        sector = secrets.choice(free_sectors)
-        code_start_i = secrets.randbelow(len(sector) - len(code) + 1)
+        rng = self._random or _SYSTEM_RANDOM
+        sector = rng.choice(free_sectors)
+        code_start_i = rng.randrange(len(sector) - len(code) + 1)
         code_start = code_start_i + sector.start
         code_end = code_start + len(code)
         code_sector = Sector(code_start, code_end)
         self._data[code_sector.to_slice()] = code
         self._free -= code_sector
+        if self.shared is not None:
+            self.shared.begin()
+            for index, word in enumerate(code, code_sector.start):
+                self.shared.write(index, word)
+            self.shared.end()
+        if self.on_write is not None:
+            for index in range(code_sector.start, code_sector.end):
+                self.on_write(index)
         return code_sector.start
 
     def address(self, mode: Mode, value: int, ip: int) -> int:
@@ -175,6 +213,8 @@ class Memory:
             return (ip + value) % len(self)
         elif mode == Mode.INDIRECT:
             pointer = self.address(Mode.RELATIVE, value, ip)
+            if self.heatmap is not None:
+                self.heatmap.read(pointer)
             address_a = (pointer + int(self[pointer])) % len(self)
             return address_a
         else:
@@ -206,8 +246,23 @@ class Memory:
             )
         return free_sectors
 
+    def share(self, core: SharedCore) -> None:
+        """Mirror every write into `core`, starting with the current cells"""
+        if len(core) != len(self) or (
+            core.encoding.field_bits != self.encoding.field_bits
+        ):
+            raise ValueError("The shared core doesn't match this memory")
+        core.begin()
+        for index, word in enumerate(self._data):
+            core.write(index, word)
+        core.end()
+        self.shared = core
+
     def safely_read_int(self, address: int) -> int:
-        return int(self._data[address % len(self)])
+        index = address % len(self)
+        if self.heatmap is not None:
+            self.heatmap.read(index)
+        return int(self._data[index])
 
     def safely_read_instruction(
         self, address: int | None, default: T = None,
@@ -228,19 +283,26 @@ class Memory:
 
     def __getitem__(self, address: int) -> Instruction:
         try:
-            data = int(self._data[address % len(self)]) % Instruction.SIZE
-            return Instruction.from_int(data)  # Might fire RedcodeRuntimeError
+            data = int(self._data[address % len(self)]) % self._word_size
+            return self._decode(data)  # Might fire RedcodeRuntimeError
         except IndexError:
             raise RedcodeIndexError(f"Address {address} is out of bounds")
 
     def __setitem__(self, address: int, value: int | Instruction):
         try:
             index = int(address) % len(self)
+            self.overwritten = self._data[index]
             self._data[index] = value
         except IndexError:
             raise RedcodeIndexError(f"Address {address} is out of bounds")
         else:
             self._free -= Sector(index, index + 1)
+            if self.heatmap is not None:
+                self.heatmap.write(index)
+            if self.shared is not None:
+                self.shared.write(index, value)
+            if self.on_write is not None:
+                self.on_write(index)
 
     def __len__(self):
         return len(self._data)
@@ -0,0 +1,226 @@
+"""Minimal Prometheus-style metrics, exposed in the text format"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+import math
+import threading
+import time
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape(value)}"' for key, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, "Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+
+    def __getitem__(self, name: str) -> "Metric":
+        return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    TYPE = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], Metric] = {}
+        if registry is not None:  # Labeled children aren't registered
+            registry.register(self)
+
+    def labels(self, **labels: str) -> "Metric":
+        values = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._new_child()
+                self._children[values] = child
+        return child
+
+    def _new_child(self) -> "Metric":
+        return type(self)(self.name, self.documentation, registry=None)
+
+    def _samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        raise NotImplementedError
+
+    def collect(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        if not self.labelnames:
+            yield from self._samples()
+            return
+
+        for values, child in sorted(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            for name, extra, value in child._samples():
+                yield name, {**labels, **extra}, value
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        for name, labels, value in self.collect():
+            lines.append(
+                f"{name}{_format_labels(labels)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def __init__(self, *args, **kwargs):
+        self._value = 0
+        super().__init__(*args, **kwargs)
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def _samples(self):
+        yield self.name, {}, self._value
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        self._value = 0
+        super().__init__(*args, **kwargs)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def _samples(self):
+        yield self.name, {}, self._value
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs,
+    ):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(
+            self.name, self.documentation,
+            buckets=self.buckets[:-1], registry=None,
+        )
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def _samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            le = _format_value(bound)
+            yield f"{self.name}_bucket", {"le": le}, cumulative
+        yield f"{self.name}_sum", {}, self._sum
+        yield f"{self.name}_count", {}, cumulative
+
+
+BATTLES = Counter(
+    "redcode_battles_total", "Battles that ran to completion",
+)
+TICKS = Counter(
+    "redcode_ticks_total", "Process ticks simulated",
+)
+RUN_SECONDS = Histogram(
+    "redcode_machine_run_seconds", "Time to simulate a whole battle",
+)
+PARSE_SECONDS = Histogram(
+    "redcode_parse_seconds", "Time spent validating and parsing code",
+)
+PARSE_FAILURES = Counter(
+    "redcode_parse_failures_total", "Programs rejected by the validator",
+)
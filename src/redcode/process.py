@@ -1,3 +1,5 @@
+from array import array
+from collections.abc import Callable
 from dataclasses import dataclass
 from redcode.errors import RedcodeRuntimeError
 from redcode.instruction import Dat, Instruction
@@ -10,40 +12,136 @@ class Diff:
     ip: int
     index: int | None
     value: str | None
+    prev_ip: int | None = None  # Where the process was before the tick
+    prev_word: int | None = None  # Raw word that was overwritten at index
+
+
+class ProcessTable:
+    """State of a machine's processes, in parallel arrays indexed by slot.
+
+    The living slots are kept in a run list, in slot order, which is only
+    rebuilt after a death, so a round costs as much as the processes that
+    are still alive.
+    """
+
+    def __init__(self):
+        self.ips = array("q")
+        self.alive = bytearray()
+        self.owners = array("i")  # Slot of the warrior a process belongs to
+        self.reasons = array("H")  # Codes of death reasons, see `reason`
+        self.alive_count = 0
+        # Called with the slot and reason of every process that dies, if set
+        self.on_death: Callable[[int, str], None] | None = None
+        self._texts = ["OK"]
+        self._codes = {"OK": 0}
+        self._running: list[int] = []
+        self._stale = False  # Whether the run list still has dead slots
+
+    def __len__(self) -> int:
+        return len(self.alive)
+
+    def add(
+        self, ip: int, owner: int | None = None, alive: bool = True,
+    ) -> int:
+        slot = len(self.alive)
+        self.ips.append(ip)
+        self.alive.append(alive)
+        self.owners.append(slot if owner is None else owner)
+        self.reasons.append(0)
+        if alive:
+            self.alive_count += 1
+            self._running.append(slot)
+        return slot
+
+    def kill(self, slot: int) -> None:
+        if not self.alive[slot]:
+            return
+        self.alive[slot] = False
+        self.alive_count -= 1
+        self._stale = True
+        if self.on_death is not None:
+            self.on_death(slot, self.reason(slot))
+
+    def running(self) -> list[int]:
+        """Living slots, the list isn't changed by deaths while iterating"""
+        if self._stale:
+            self._running = [
+                slot for slot in self._running if self.alive[slot]
+            ]
+            self._stale = False
+        return self._running
+
+    def reason(self, slot: int) -> str:
+        return self._texts[self.reasons[slot]]
+
+    def set_reason(self, slot: int, reason: str) -> None:
+        code = self._codes.get(reason)
+        if code is None:
+            code = self._codes[reason] = len(self._texts)
+            self._texts.append(reason)
+        self.reasons[slot] = code
 
 
 class Process:
+    """A view of one slot in a `ProcessTable`"""
+
     def __init__(
         self, proc_id: int, code_start: int, memory: Memory,
         name: str | None = None, alive: bool = True,
-        parent_id: int | None = None,
+        parent_id: int | None = None, table: ProcessTable | None = None,
     ):
         self.name = name or f"Process {proc_id or 'Unnamed'}"
         self._code_start = code_start
-        self._ip = code_start  # Instruction pointer - next line to execute
-        self._reason = "OK"
-        self._alive = alive
         self._memory = memory
         self._id = proc_id
         self._parent_id = parent_id
+        self._table = table if table is not None else ProcessTable()
+        self._slot = self._table.add(code_start, parent_id, alive)
+
+    @property
+    def _ip(self) -> int:  # Instruction pointer - next line to execute
+        return self._table.ips[self._slot]
+
+    @_ip.setter
+    def _ip(self, ip: int) -> None:
+        self._table.ips[self._slot] = ip
+
+    @property
+    def _alive(self) -> bool:
+        return bool(self._table.alive[self._slot])
+
+    @property
+    def _reason(self) -> str:
+        return self._table.reason(self._slot)
+
+    @_reason.setter
+    def _reason(self, reason: str) -> None:
+        self._table.set_reason(self._slot, reason)
 
     @property
     def is_alive(self) -> bool:
         return self._alive
 
     def tick(self) -> Diff | None:
-        instruction = self._ensure_instruction(self._memory[self._ip])
-        if not self._alive:
+        table, slot = self._table, self._slot
+        ip = table.ips[slot]
+        heatmap = self._memory.heatmap
+        if heatmap is not None and table.alive[slot]:
+            heatmap.execute(ip, self._id)
+        instruction = self._ensure_instruction(self._memory[ip])
+        if not table.alive[slot]:
             return
 
         try:
-            self._ip, mem, value = instruction.run(self._ip, self._memory)
+            next_ip, mem, value = instruction.run(ip, self._memory)
         except RedcodeRuntimeError as e:
             self._reason = str(e)
             self.die()
         else:
+            table.ips[slot] = next_ip
             value = str(self._memory.safely_read_instruction(mem, "???"))
-            return Diff(self._id, self._ip, mem, value)
+            prev_word = None if mem is None else int(self._memory.overwritten)
+            return Diff(self._id, next_ip, mem, value, ip, prev_word)
 
     def _ensure_instruction(
         self, instruction: int | Instruction,
@@ -52,14 +150,14 @@ class Process:
             return instruction
 
         try:
-            return Instruction.from_int(instruction)
+            return self._memory.encoding.decode(instruction)
         except RedcodeRuntimeError as e:
             self._reason = str(e)
             self.die()
             return Dat.of(0)
 
     def die(self) -> None:
-        self._alive = False
+        self._table.kill(self._slot)
 
     def __str__(self):
         alive = "alive" if self._alive else "dead"
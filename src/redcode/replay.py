@@ -0,0 +1,185 @@
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, replace
+import hashlib
+import json
+from pathlib import Path
+
+from redcode.machine import Machine
+from redcode.process import Diff
+
+
+@dataclass(frozen=True, slots=True)
+class BattleRecord:
+    """Everything needed to re-simulate a battle, and its outcome"""
+    seed: int
+    memory_size: int
+    max_ticks: int
+    allow_single_process: bool
+    programs: tuple[tuple[str, tuple[int, ...]], ...]
+    winners: tuple[str, ...] = ()
+    ticks: int = 0
+
+    @classmethod
+    def setup(cls, machine: Machine) -> "BattleRecord":
+        """The record without an outcome, safe while the battle runs"""
+        return cls(
+            seed=machine.seed,
+            memory_size=len(machine.memory),
+            max_ticks=machine.max_ticks,
+            allow_single_process=machine._allow_single_process,
+            programs=tuple(
+                (name, tuple(words)) for name, words in machine.programs
+            ),
+        )
+
+    @classmethod
+    def from_machine(cls, machine: Machine) -> "BattleRecord":
+        return replace(
+            cls.setup(machine),
+            winners=tuple(p.name for p in machine.survivors),
+            ticks=machine._ticks,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BattleRecord":
+        programs = tuple(
+            (name, tuple(words)) for name, words in data["programs"]
+        )
+        return cls(**{
+            **data, "programs": programs, "winners": tuple(data["winners"]),
+        })
+
+    @property
+    def battle_id(self) -> str:
+        setup = [
+            self.seed, self.memory_size, self.max_ticks,
+            self.allow_single_process, self.programs,
+        ]
+        encoded = json.dumps(setup, separators=(",", ":")).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def simulate(self) -> Machine:
+        machine = Machine(
+            memory_size=self.memory_size,
+            allow_single_process=self.allow_single_process,
+            seed=self.seed,
+        )
+        for name, words in self.programs:
+            machine.load_program(list(words), name, machine.encoding)
+        machine.run(self.max_ticks)
+        return machine
+
+
+class BattleLog:
+    """Append-only JSON lines store of battle records"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._records: dict[str, BattleRecord] = {}
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with self.path.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = BattleRecord.from_dict(json.loads(line))
+                self._records[record.battle_id] = record
+
+    def add(self, record: BattleRecord) -> str:
+        battle_id = record.battle_id
+        if battle_id in self._records:
+            return battle_id
+
+        with self.path.open("a") as f:
+            f.write(json.dumps(asdict(record), separators=(",", ":")) + "\n")
+        self._records[battle_id] = record
+        return battle_id
+
+    def record(self, machine: Machine) -> str:
+        return self.add(BattleRecord.from_machine(machine))
+
+    def __getitem__(self, battle_id: str) -> BattleRecord:
+        return self._records[battle_id]
+
+    def __contains__(self, battle_id: object) -> bool:
+        return battle_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[BattleRecord]:
+        return iter(self._records.values())
+
+
+class ReplayService:
+    """Regenerates battle histories on demand, caching the latest ones"""
+
+    def __init__(self, log: BattleLog, cache_size: int = 8):
+        self.log = log
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, Machine] = OrderedDict()
+
+    def replay(self, battle_id: str) -> Machine:
+        if battle_id in self._cache:
+            self._cache.move_to_end(battle_id)
+            return self._cache[battle_id]
+
+        machine = self.log[battle_id].simulate()
+        self._cache[battle_id] = machine
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return machine
+
+    def history(self, battle_id: str) -> list[Diff | None]:
+        return self.replay(battle_id).history
+
+    def json_history(self, battle_id: str) -> str:
+        return self.replay(battle_id).json_history
+
+
+class Cursor:
+    """Steps through a battle both ways, applying one move per step"""
+
+    def __init__(self, machine: Machine):
+        start = machine.start_state
+        if start is None:
+            raise ValueError("The battle didn't start yet")
+        self.cells: list[str] = json.loads(start.memory.as_json())
+        self.owners = list(machine.start_map)
+        self.ips = start.ips
+        self.moves = machine.moves()
+        self.position = 0
+
+    def forward(self) -> bool:
+        if self.position >= len(self.moves):
+            return False
+        move = self.moves[self.position]
+        self.position += 1
+        if move is not None:
+            self.ips[move["pid"]] = move["ip"]
+            if move["index"] is not None:
+                self.cells[move["index"]] = move["value"]
+                self.owners[move["index"]] = move["pid"]
+        return True
+
+    def back(self) -> bool:
+        if self.position <= 0:
+            return False
+        self.position -= 1
+        move = self.moves[self.position]
+        if move is not None:
+            self.ips[move["pid"]] = move["prev_ip"]
+            if move["index"] is not None:
+                self.cells[move["index"]] = move["prev_value"]
+                self.owners[move["index"]] = move["prev_owner"]
+        return True
+
+    def seek(self, position: int) -> None:
+        position = max(0, min(position, len(self.moves)))
+        while self.position < position:
+            self.forward()
+        while self.position > position:
+            self.back()
@@ -0,0 +1,111 @@
+"""Persistent results of tournament pairings, in a SQLite file.
+
+A pairing is keyed by the hashes of both programs and by the settings it was
+played with, so a hill only simulates the pairings it hasn't seen yet. Pairs
+are stored once, with the smaller hash first.
+"""
+from collections.abc import Iterator
+import json
+from pathlib import Path
+import sqlite3
+import threading
+
+
+VERSION = 1  # Bump when the engine's battle results change
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairings (
+    first TEXT NOT NULL,
+    second TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    wins INTEGER NOT NULL,
+    ties INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    PRIMARY KEY (first, second, settings)
+);
+CREATE INDEX IF NOT EXISTS pairings_second ON pairings (second);
+"""
+
+Result = tuple[int, int, int]  # Wins, ties and losses of the first program
+
+
+def settings_key(**settings: object) -> str:
+    return json.dumps(
+        {"version": VERSION, **settings}, sort_keys=True, default=repr,
+    )
+
+
+class ScoreStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ScoreStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get(self, first: str, second: str, settings: str) -> Result | None:
+        """The result of `first` against `second`, if it was stored"""
+        key, flipped = _ordered(first, second)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT wins, ties, losses FROM pairings"
+                " WHERE first = ? AND second = ? AND settings = ?",
+                (*key, settings),
+            ).fetchone()
+        if row is None:
+            return None
+        wins, ties, losses = row
+        return (losses, ties, wins) if flipped else (wins, ties, losses)
+
+    def put(
+        self, first: str, second: str, settings: str, result: Result,
+    ) -> None:
+        key, flipped = _ordered(first, second)
+        wins, ties, losses = result
+        if flipped:
+            wins, losses = losses, wins
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pairings VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, settings, wins, ties, losses),
+            )
+
+    def invalidate(self, program: str) -> int:
+        """Forget every pairing of `program`, returns how many there were"""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM pairings WHERE first = ? OR second = ?",
+                (program, program),
+            )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            count, = self._db.execute(
+                "SELECT COUNT(*) FROM pairings",
+            ).fetchone()
+        return count
+
+    def __iter__(self) -> Iterator[tuple[str, str, str, Result]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT first, second, settings, wins, ties, losses"
+                " FROM pairings ORDER BY first, second, settings",
+            ).fetchall()
+        for first, second, settings, *result in rows:
+            yield first, second, settings, tuple(result)
+
+
+def _ordered(first: str, second: str) -> tuple[tuple[str, str], bool]:
+    if first <= second:
+        return (first, second), False
+    return (second, first), True
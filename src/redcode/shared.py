@@ -0,0 +1,233 @@
+"""A core mirrored into a shared memory block, for readers in other processes.
+
+The simulation stays the only writer. It makes the block's sequence counter
+odd before a round and even again after it, so a reader that sees the same
+even counter before and after reading has seen one whole round (a seqlock).
+Readers look at the words in place, through memoryviews, and only copy them
+when they ask for a snapshot.
+
+Block layout, in native byte order:
+    header  sequence and tick (u64), cells, field bits and process slots
+            (u32), then 4 bytes of padding
+    ips     an i64 per process slot
+    alive   a byte per process slot, padded to 8 bytes
+    words   the encoded cells, u32 for standard words and u64 for wide ones
+"""
+from array import array
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import struct
+import sys
+import time
+from typing import TypeVar
+
+from redcode.errors import SharedCoreTimeout
+from redcode.instruction import STANDARD, WIDE, Encoding, Instruction
+
+
+T = TypeVar("T")
+
+READ_TIMEOUT = 5.0  # Seconds a reader waits for a consistent round
+
+_HEADER = struct.Struct("=QQIII4x")
+
+
+def _encoding(field_bits: int) -> Encoding:
+    for encoding in (STANDARD, WIDE):
+        if encoding.field_bits == field_bits:
+            return encoding
+    return Encoding(field_bits)
+
+
+def _typecode(encoding: Encoding) -> str:
+    return "I" if encoding.size <= 1 << 32 else "Q"
+
+
+def _words_start(slots: int) -> int:
+    return -(-(_HEADER.size + 9 * slots) // 8) * 8  # Aligned to 8 bytes
+
+
+def _attach(name: str) -> SharedMemory:
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    return _attach_before_313(name)
+
+
+def _attach_before_313(name: str) -> SharedMemory:
+    """Attach without letting this process's resource tracker unlink it.
+
+    Before Python 3.13 attaching registers the block with a resource
+    tracker, which unlinks it when its processes exit (bpo-39959). Readers
+    started by multiprocessing share the writer's tracker, and the writer
+    unregisters the block when it unlinks it, but a reader that had to
+    start a tracker of its own must unregister it. Telling them apart needs
+    the tracker's private file descriptor, so this goes once 3.12 does.
+    """
+    tracker = getattr(resource_tracker, "_resource_tracker", None)
+    had_tracker = getattr(tracker, "_fd", None) is not None
+    block = SharedMemory(name)
+    if os.name == "posix" and not had_tracker:
+        resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    tick: int
+    ips: list[int]
+    alive: list[bool]
+    words: array
+    encoding: Encoding = STANDARD
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, address: int) -> Instruction:
+        return self.encoding.decode(self.words[address % len(self.words)])
+
+
+class SharedCore:
+    def __init__(self, block: SharedMemory, owner: bool = False):
+        self._block = block
+        self._owner = owner  # Only the writer unlinks the block
+        _, _, cells, field_bits, slots = _HEADER.unpack_from(block.buf)
+        self.encoding = _encoding(field_bits)
+        self._word_size = self.encoding.size
+        typecode = _typecode(self.encoding)
+        alive_end = _HEADER.size + 9 * slots
+        words_start = _words_start(slots)
+        words_end = words_start + cells * struct.calcsize(typecode)
+        buf = block.buf  # The block may be rounded up to whole pages
+        self._counters = buf[:16].cast("Q")  # Sequence, tick
+        self.ips = buf[_HEADER.size:_HEADER.size + 8 * slots].cast("q")
+        self.alive = buf[_HEADER.size + 8 * slots:alive_end]
+        self.words = buf[words_start:words_end].cast(typecode)
+
+    @classmethod
+    def create(
+        cls,
+        cells: int,
+        slots: int = 0,
+        encoding: Encoding = STANDARD,
+        name: str | None = None,
+    ) -> "SharedCore":
+        """A new block for `cells` words and `slots` processes"""
+        word_bytes = struct.calcsize(_typecode(encoding))
+        block = SharedMemory(
+            name, create=True, size=_words_start(slots) + cells * word_bytes,
+        )
+        _HEADER.pack_into(
+            block.buf, 0, 0, 0, cells, encoding.field_bits, slots,
+        )
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedCore":
+        return cls(_attach(name))
+
+    @property
+    def name(self) -> str:
+        return self._block.name
+
+    @property
+    def slots(self) -> int:
+        return len(self.ips)
+
+    # Writer side
+
+    def write(self, index: int, word: int | Instruction) -> None:
+        self.words[index] = int(word) % self._word_size
+
+    def begin(self) -> None:
+        self._counters[0] += 1
+
+    def end(
+        self,
+        tick: int | None = None,
+        ips: Sequence[int] | None = None,
+        alive: Sequence[int] | None = None,
+    ) -> None:
+        if tick is not None:
+            self._counters[1] = tick
+        if ips is not None and alive is not None:
+            count = min(len(self.ips), len(ips))
+            self.ips[:count] = ips[:count]
+            self.alive[:count] = alive[:count]
+        self._counters[0] += 1
+
+    # Reader side
+
+    @property
+    def sequence(self) -> int:
+        return self._counters[0]
+
+    @property
+    def tick(self) -> int:
+        return self._counters[1]
+
+    def read(
+        self,
+        function: Callable[["SharedCore"], T],
+        timeout: float = READ_TIMEOUT,
+    ) -> T:
+        """`function` of this core, called again until no round raced it.
+
+        Raises SharedCoreTimeout if no consistent round was seen in time,
+        for example because the writer died in the middle of one.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            sequence = self._counters[0]
+            if sequence % 2 == 0:
+                try:
+                    result = function(self)
+                except Exception:
+                    if self._counters[0] == sequence:
+                        raise
+                else:
+                    if self._counters[0] == sequence:
+                        return result
+            if time.monotonic() >= deadline:
+                raise SharedCoreTimeout(
+                    f"No consistent round of {self.name} in {timeout}s"
+                )
+            time.sleep(0)
+
+    def snapshot(self, timeout: float = READ_TIMEOUT) -> Snapshot:
+        typecode = _typecode(self.encoding)
+        return self.read(lambda core: Snapshot(
+            core.tick,
+            core.ips.tolist(),
+            [bool(alive) for alive in core.alive],
+            array(typecode, core.words.tobytes()),
+            core.encoding,
+        ), timeout)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, address: int) -> Instruction:
+        """The instruction at `address` right now, use `read` for rounds"""
+        return self.encoding.decode(self.words[address % len(self.words)])
+
+    def close(self) -> None:
+        for view in (self._counters, self.ips, self.alive, self.words):
+            view.release()
+        self._block.close()
+
+    def unlink(self) -> None:
+        self._block.unlink()
+
+    def __enter__(self) -> "SharedCore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __deepcopy__(self, memo: dict) -> None:
+        return None  # Copies of a machine don't publish into its block
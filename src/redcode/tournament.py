@@ -0,0 +1,275 @@
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+import hashlib
+import itertools
+import math
+from statistics import NormalDist
+
+from redcode import config
+from redcode.instruction import Instruction, program_hash
+from redcode.machine import Machine
+from redcode.scores import ScoreStore, settings_key
+
+
+Program = Sequence[int | Instruction]
+
+
+class Outcome(IntEnum):
+    LOSS = 0
+    TIE = 1
+    WIN = 3
+
+    @property
+    def points(self) -> int:
+        return int(self)
+
+
+def duel(
+    warrior: Program,
+    opponent: Program,
+    memory_size: int = config.MEMORY_SIZE,
+    max_ticks: int = config.MAX_TICKS,
+    seed: int | None = None,
+    compiled: bool = False,
+) -> Outcome:
+    """Battle two encoded programs, from the first program's perspective"""
+    machine = Machine(memory_size, seed=seed, compiled=compiled)
+    machine.load_program(list(warrior), "warrior")
+    machine.load_program(list(opponent), "opponent")
+    machine.run(max_ticks)
+
+    warrior_alive, opponent_alive = (p.is_alive for p in machine.processes)
+    if warrior_alive == opponent_alive:
+        return Outcome.TIE
+    return Outcome.WIN if warrior_alive else Outcome.LOSS
+
+
+@dataclass
+class Standing:
+    name: str
+    wins: int = 0
+    ties: int = 0
+    losses: int = 0
+    duplicates: list[str] = field(default_factory=list)  # Same program
+
+    @property
+    def points(self) -> int:
+        return self.wins * Outcome.WIN.points + self.ties * Outcome.TIE.points
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.ties + self.losses
+
+    def record(self, outcome: Outcome) -> None:
+        if outcome == Outcome.WIN:
+            self.wins += 1
+        elif outcome == Outcome.TIE:
+            self.ties += 1
+        else:
+            self.losses += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "wins": self.wins, "ties": self.ties,
+            "losses": self.losses, "points": self.points,
+            "duplicates": self.duplicates,
+        }
+
+
+@dataclass(frozen=True)
+class EarlyStop:
+    """Stop a pairing once its score is known to `confidence`.
+
+    A game scores 1, 1/2 or 0 for a win, tie or loss. The pairing is decided
+    when the confidence interval of the mean score excludes 1/2 (a warrior
+    is better), or when it's narrower than `precision` on each side (they're
+    even). One pseudo win and one pseudo loss keep the interval from
+    collapsing after a few identical games.
+    """
+    confidence: float = 0.95
+    min_rounds: int = 10
+    precision: float = 0.05
+
+    def __post_init__(self):
+        if not 0 < self.confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1")
+
+    def decided(self, wins: int, ties: int, losses: int) -> bool:
+        games = wins + ties + losses
+        if games < self.min_rounds:
+            return False
+
+        n = games + 2
+        mean = (wins + ties / 2 + 1) / n
+        variance = (wins + ties / 4 + 1) / n - mean ** 2
+        z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        half_width = z * math.sqrt(max(variance, 0.0) / n)
+        low, high = mean - half_width, mean + half_width
+        return low > 0.5 or high < 0.5 or half_width < self.precision
+
+
+_MIRROR = {Outcome.WIN: Outcome.LOSS, Outcome.LOSS: Outcome.WIN}
+
+
+def _pairing_job(job: tuple) -> list[Outcome]:
+    (
+        warrior, opponent, rounds, memory_size, max_ticks, seed, compiled,
+        stop,
+    ) = job
+    outcomes: list[Outcome] = []
+    so_far = Standing("warrior")
+    for round_number in range(rounds):
+        outcome = duel(
+            warrior, opponent, memory_size, max_ticks,
+            seed=None if seed is None else seed + round_number,
+            compiled=compiled,
+        )
+        outcomes.append(outcome)
+        so_far.record(outcome)
+        if stop is not None and stop.decided(
+            so_far.wins, so_far.ties, so_far.losses,
+        ):
+            break
+    return outcomes
+
+
+def deduplicate(
+    warriors: Sequence[tuple[str, Program]],
+) -> tuple[list[tuple[str, Program]], list[list[str]]]:
+    """The first warrior of every program, and the names of its duplicates"""
+    unique: dict[str, int] = {}
+    kept: list[tuple[str, Program]] = []
+    duplicates: list[list[str]] = []
+    for name, words in warriors:
+        key = program_hash(words)
+        if key in unique:
+            duplicates[unique[key]].append(name)
+            continue
+        unique[key] = len(kept)
+        kept.append((name, words))
+        duplicates.append([])
+    return kept, duplicates
+
+
+def round_robin(
+    warriors: Sequence[tuple[str, Program]],
+    rounds: int = 1,
+    memory_size: int = config.MEMORY_SIZE,
+    max_ticks: int = config.MAX_TICKS,
+    seed: int | None = None,
+    jobs: int | None = None,
+    compiled: bool = False,
+    stop: EarlyStop | None = None,
+) -> list[Standing]:
+    """Every warrior duels every other one `rounds` times, best first.
+
+    With `stop`, a pairing stops early once its result is decided, so it
+    plays a prefix of the rounds it would have played without it. Warriors
+    with the same program enter once, as the first of them.
+    """
+    warriors, duplicates = deduplicate(warriors)
+    standings = [
+        Standing(name, duplicates=names)
+        for (name, _), names in zip(warriors, duplicates)
+    ]
+    pairs = list(itertools.combinations(range(len(warriors)), 2))
+    work = [
+        (
+            list(warriors[i][1]), list(warriors[j][1]), rounds,
+            memory_size, max_ticks,
+            None if seed is None else seed + number * rounds,
+            compiled, stop,
+        )
+        for number, (i, j) in enumerate(pairs)
+    ]
+    for (i, j), outcomes in zip(pairs, _play(work, jobs)):
+        for outcome in outcomes:
+            standings[i].record(outcome)
+            standings[j].record(_MIRROR.get(outcome, outcome))
+    return sorted(standings, key=lambda s: s.points, reverse=True)
+
+
+def _play(work: list[tuple], jobs: int | None) -> Iterable[list[Outcome]]:
+    if jobs == 1 or len(work) <= 1:
+        return map(_pairing_job, work)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_pairing_job, work))
+
+
+def _pairing_seed(seed: int | None, first: str, second: str) -> int | None:
+    # Depends only on the pair, so adding warriors keeps stored results valid
+    if seed is None:
+        return None
+    key = f"{seed}:{first}:{second}".encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:4], "little")
+
+
+def incremental_round_robin(
+    warriors: Sequence[tuple[str, Program]],
+    scores: ScoreStore,
+    rounds: int = 1,
+    memory_size: int = config.MEMORY_SIZE,
+    max_ticks: int = config.MAX_TICKS,
+    seed: int | None = 0,
+    jobs: int | None = None,
+    compiled: bool = False,
+    stop: EarlyStop | None = None,
+) -> tuple[list[Standing], int]:
+    """Like `round_robin`, but only pairings missing from `scores` are played.
+
+    Returns the standings, recomputed from the stored results, and how many
+    games were simulated.
+    """
+    warriors, duplicates = deduplicate(warriors)
+    settings = settings_key(
+        rounds=rounds, memory_size=memory_size, max_ticks=max_ticks,
+        seed=seed, stop=stop,
+    )
+    hashes = [program_hash(words) for _, words in warriors]
+    pairs = list(itertools.combinations(range(len(warriors)), 2))
+
+    missing: dict[tuple[str, str], tuple[int, int]] = {}
+    for i, j in pairs:
+        if hashes[j] < hashes[i]:
+            i, j = j, i  # The smaller hash always plays first
+        key = hashes[i], hashes[j]
+        if key not in missing and scores.get(*key, settings) is None:
+            missing[key] = i, j
+
+    work = [
+        (
+            list(warriors[i][1]), list(warriors[j][1]), rounds,
+            memory_size, max_ticks, _pairing_seed(seed, *key), compiled, stop,
+        )
+        for key, (i, j) in missing.items()
+    ]
+    played = 0
+    for key, outcomes in zip(missing, _play(work, jobs)):
+        result = Standing("first")
+        for outcome in outcomes:
+            result.record(outcome)
+        scores.put(*key, settings, (result.wins, result.ties, result.losses))
+        played += len(outcomes)
+
+    standings = [
+        Standing(name, duplicates=names)
+        for (name, _), names in zip(warriors, duplicates)
+    ]
+    for i, j in pairs:
+        result = scores.get(hashes[i], hashes[j], settings)
+        assert result is not None
+        wins, ties, losses = result
+        standings[i].wins += wins
+        standings[i].ties += ties
+        standings[i].losses += losses
+        standings[j].wins += losses
+        standings[j].ties += ties
+        standings[j].losses += wins
+    ranked = sorted(standings, key=lambda s: s.points, reverse=True)
+    return ranked, played
+
+
+def simulations(standings: Sequence[Standing]) -> int:
+    return sum(standing.games for standing in standings) // 2
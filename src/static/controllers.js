@@ -25,20 +25,12 @@ playerDeathHtmlElement = Array.from(
 
 instruction = 0;
 
-memoryHistory = Array.from(
-  { length: memory.length },
-  (_, address) => [{
-    player: startMap[address],
-    value: memory[address],
-  }],
-);
-playerIpHistory = Array.from(
-  moves.slice(0, playerCount),
-  inst => [mod(inst.ip - 1, memory.length)],
-);
+// Every move knows what it overwrote (prev_ip, prev_value, prev_owner),
+// so stepping back needs no per-cell history.
 memoryIpPointers = Array.from({ length: memory.length }, () => []);
-playerIpHistory.forEach((ipHistory, pid) => {
-  memoryIpPointers[ipHistory[0]].push(pid);
+ips.forEach((ip, pid) => {
+  memoryIpPointers[ip].push(pid);
+  updateCellIp(pid, ip);
 });
 updateState(instruction);
 
@@ -82,22 +74,23 @@ function updatePlayerInstructions(pid, ip) {
   }
 }
 
-function loadNextInstruction(instruction) {
-  const {pid, ip, index, value} = moves[instruction];
-  const previousIp = playerIpHistory[pid].at(-1);
-  // remove the last instance of pid from memoryIpPointers[previousIp]
-  const ipIndexToRemove = memoryIpPointers[previousIp].lastIndexOf(pid);
-  memoryIpPointers[previousIp].splice(ipIndexToRemove, 1)
+function moveIp(pid, from, to) {
+  const ipIndexToRemove = memoryIpPointers[from].lastIndexOf(pid);
+  if (ipIndexToRemove !== -1) {
+    memoryIpPointers[from].splice(ipIndexToRemove, 1);
+  }
+  // Color the cell by the next player in line for it, or clear it
+  updateCellIp(memoryIpPointers[from].at(-1), from);
 
-  const lastPlayerWithThisIp = memoryIpPointers[previousIp].at(-1);
-  updateCellIp(lastPlayerWithThisIp, previousIp);
+  memoryIpPointers[to].push(pid);
+  updateCellIp(pid, to);
+}
 
-  memoryIpPointers[ip].push(pid);
-  updateCellIp(pid, ip);
-  playerIpHistory[pid].push(ip);
+function loadNextInstruction(instruction) {
+  const {pid, ip, index, value, prev_ip} = moves[instruction];
+  moveIp(pid, prev_ip, ip);
 
   if (index !== null && index !== undefined) {
-    memoryHistory[index].push({ player: pid, value });
     updateCellMemValue(pid, index, value);
   }
 
@@ -170,36 +163,13 @@ function loadPreviousInstruction(instruction) {
     return;
   }
 
-  const {pid, index, value} = move;
-  const lastMemEntry = memoryHistory[index].pop();  // Retrieve the last historical entry for this memory cell
-
-  if (memoryHistory[index].length > 0) {
-    const previousMemEntry = memoryHistory[index][memoryHistory[index].length - 1];  // Get the previous state from history
-    updateCellMemValue(previousMemEntry.player, index, previousMemEntry.value);  // Restore the memory cell to its previous state
-  } else {
-    updateCellMemValue(null, index, memory[index]);  // Restore to the initial state if no previous modifications
-  }
-
-  const currentIp = playerIpHistory[pid].pop();
-  const ipIndexToRemove = memoryIpPointers[currentIp].lastIndexOf(pid);
-  if (ipIndexToRemove !== -1) {
-    memoryIpPointers[currentIp].splice(ipIndexToRemove, 1);
-  }
-
-  // Update cell IP color based on the next PID in line for that IP, or clear it if none left
-  const nextPlayerForIp = memoryIpPointers[currentIp].at(-1);
-  if (nextPlayerForIp !== undefined) {
-    updateCellIp(nextPlayerForIp, currentIp);
-  } else {
-    updateCellIp(null, currentIp); // Clear the IP marker if no players are left
+  const {pid, ip, index, prev_ip, prev_value, prev_owner} = move;
+  if (index !== null && index !== undefined) {
+    updateCellMemValue(prev_owner, index, prev_value);
   }
 
-  // Handle visual update for the previous IP if available
-  const previousIp = playerIpHistory[pid].at(-1);
-  if (previousIp !== undefined) {
-    updateCellIp(pid, previousIp);
-  }
-  updatePlayerInstructions(pid, previousIp);
+  moveIp(pid, ip, prev_ip);
+  updatePlayerInstructions(pid, prev_ip);
 }
 
 backButton.addEventListener("click", () => {
@@ -0,0 +1,150 @@
+import dataclasses
+import functools
+import gzip
+
+import pytest
+
+import src as web
+from redcode import assets, config
+from redcode.config import MAX_PROGRAM_SIZE
+from redcode.history import SpillToDisk
+from redcode.lobby import Lobby, build_battle
+
+
+IMP = "MOV 0, 1"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web, "LOBBY", Lobby(web.LOBBY._build))
+    return web.app.test_client()
+
+
+def test_viewing_a_room_never_opens_it(client):
+    for path in ("battle", "battle/heatmap", "battle/cells/3", "reset"):
+        assert client.get(f"/rooms/nowhere/{path}").status_code == 404
+    assert client.get("/rooms/nowhere/code").status_code == 200
+    assert "nowhere" not in web.LOBBY
+
+
+def test_uploads_open_the_room_and_redirect_to_it(client):
+    response = client.post(
+        "/rooms/arena/code/send", data={"player-name": "Imp", "code": IMP},
+    )
+    assert response.status_code == 200
+    assert response.headers["HX-Redirect"] == "/rooms/arena/battle"
+    assert web.LOBBY.existing("arena").players == ["Imp"]
+
+
+def test_heatmaps_are_opt_in(client, monkeypatch):
+    client.post(
+        "/rooms/arena/code/send", data={"player-name": "Imp", "code": IMP},
+    )
+    instance = web.LOBBY.existing("arena").battle().machine
+    assert instance.heatmap is None and instance._compiler is not None
+    assert client.get("/rooms/arena/battle/heatmap").status_code == 404
+
+    heatmaps = Lobby(functools.partial(build_battle, heatmap=True))
+    monkeypatch.setattr(web, "LOBBY", heatmaps)
+    client.post(
+        "/rooms/arena/code/send", data={"player-name": "Imp", "code": IMP},
+    )
+    response = client.get("/rooms/arena/battle/heatmap")
+    assert response.status_code == 200
+    assert response.get_json()["players"] == ["Imp"]
+
+
+def test_ring_histories_still_replay_from_the_start(client, monkeypatch):
+    monkeypatch.setattr(config, "HISTORY_POLICY", "ring")
+    monkeypatch.setattr(config, "HISTORY_SIZE", 8)
+    for name in ("First", "Second"):
+        client.post(
+            "/rooms/arena/code/send", data={"player-name": name, "code": IMP},
+        )
+    live = web.LOBBY.existing("arena").battle()
+    assert isinstance(live.machine._history, SpillToDisk)
+    for path in ("battle", "battle/cells/0", "battle/players/0/writes"):
+        assert client.get(f"/rooms/arena/{path}").status_code == 200
+    assert live.machine.moves()
+
+
+def test_validation_caps_the_program_size(client):
+    code = "MOV 0, 1\n" * (MAX_PROGRAM_SIZE + 1)
+    response = client.post("/code/validate", json={"code": code})
+    assert response.get_json()["errors"][0]["type"] == "SizeLimitExceeded"
+    response = client.post("/code/validate", json={"code": IMP})
+    assert response.get_json() == {"valid": True, "errors": []}
+
+
+def test_assets_are_immutable_and_conditional(client):
+    stylesheet = web.ASSETS["app.css"]
+    response = client.get(f"/assets/{stylesheet.hashed_name}")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == assets.IMMUTABLE
+    assert response.headers["ETag"] == f'"{stylesheet.digest}"'
+    assert response.get_data() == stylesheet.data
+
+    response = client.get(
+        f"/assets/{stylesheet.hashed_name}",
+        headers={"If-None-Match": f'"{stylesheet.digest}"'},
+    )
+    assert response.status_code == 304
+    assert client.get("/assets/app.css").status_code == 404
+
+
+def test_assets_negotiate_their_encoding(client, monkeypatch):
+    stylesheet = web.ASSETS["app.css"]
+    # Brotli is optional, a fake body shows that it's preferred when there
+    monkeypatch.setitem(
+        web.ASSETS._by_hashed_name, stylesheet.hashed_name,
+        dataclasses.replace(stylesheet, compressed={
+            "br": b"brotli body", **stylesheet.compressed,
+        }),
+    )
+    url = f"/assets/{stylesheet.hashed_name}"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == f'"{stylesheet.digest}-gzip"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()) == stylesheet.data
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.get_data() == b"brotli body"
+    assert response.headers["ETag"] == f'"{stylesheet.digest}-br"'
+    response = client.get(url, headers={
+        "Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"],
+    })
+    assert response.status_code == 200  # A br tag doesn't match gzip
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == stylesheet.data
+    assert response.headers["ETag"] == f'"{stylesheet.digest}"'
+
+
+def test_battles_revalidate_with_their_etag(client):
+    for name in ("First", "Second"):
+        client.post(
+            "/rooms/arena/code/send", data={"player-name": name, "code": IMP},
+        )
+    response = client.get(
+        "/rooms/arena/battle", headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/rooms/arena/battle", headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    live = web.LOBBY.existing("arena").battle()
+    assert etag == f'W/"{live.battle_id}-{web.ASSETS.version}"'
+    response = client.get(
+        "/rooms/arena/battle", headers={"If-None-Match": 'W/"other"'},
+    )
+    assert response.status_code == 200
@@ -0,0 +1,78 @@
+import pytest
+
+from redcode import archive
+from redcode.errors import ArchiveError
+from redcode.instruction import program_hash
+from redcode.machine import Machine
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+IMP = "MOV 0, 1"
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = tmp_path / "warriors.rcwa"
+    archive.write(path, [
+        ("Dwarf", archive.compile_source(DWARF)),
+        ("Imp", archive.compile_source(IMP)),
+    ])
+    return path
+
+
+def test_words_round_trip(archive_path):
+    with archive.Archive(archive_path) as warriors:
+        assert len(warriors) == 2
+        assert warriors.names == ["Dwarf", "Imp"]
+        dwarf = warriors["Dwarf"]
+        assert list(dwarf) == archive.compile_source(DWARF)
+        assert warriors.hash(0) == program_hash(dwarf)
+    assert list(dwarf) == archive.compile_source(DWARF)
+
+
+def test_disassemble_compiles_back_to_same_words():
+    words = archive.compile_source(DWARF + "JMZ -1, @2\nDJZ 1, 2\n")
+    source = archive.disassemble(words)
+    assert archive.compile_source(source) == words
+
+
+def test_loaded_program_matches_source_battle(archive_path):
+    expected = Machine(256, seed=3)
+    expected.load_code(DWARF, "Dwarf")
+    expected.load_code(IMP, "Imp")
+    expected.run(500)
+
+    machine = Machine(256, seed=3)
+    with archive.Archive(archive_path) as warriors:
+        for name, words in warriors:
+            machine.load_program(words, name)
+    machine.run(500)
+
+    assert machine.history == expected.history
+    assert machine.programs == expected.programs
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / "bad.rcwa"
+    path.write_bytes(b"NOPE" + bytes(32))
+    with pytest.raises(ArchiveError):
+        archive.Archive(path)
+
+
+def test_truncated_archive(tmp_path, archive_path):
+    path = tmp_path / "truncated.rcwa"
+    path.write_bytes(archive_path.read_bytes()[:-4])
+    with pytest.raises(ArchiveError):
+        archive.Archive(path)
+
+
+def test_empty_archive(tmp_path):
+    path = tmp_path / "empty.rcwa"
+    path.write_bytes(b"")
+    with pytest.raises(ArchiveError):
+        archive.Archive(path)
@@ -0,0 +1,72 @@
+import gzip
+from pathlib import Path
+import shutil
+import subprocess
+
+import pytest
+
+from redcode import assets
+
+
+def test_negotiate():
+    available = ("br", "gzip")
+    assert assets.negotiate("gzip, deflate, br", available) == "br"
+    assert assets.negotiate("gzip, br;q=0", available) == "gzip"
+    assert assets.negotiate("identity", available) is None
+    assert assets.negotiate(None, available) is None
+    assert assets.negotiate("*", ("gzip",)) == "gzip"
+    assert assets.negotiate("*, gzip;q=0", ("gzip",)) is None
+
+
+def test_etag_matches():
+    assert assets.etag_matches('"abc"', "abc")
+    assert assets.etag_matches('W/"abc", "def"', "abc")
+    assert assets.etag_matches("*", "abc")
+    assert not assets.etag_matches('"abcd"', "abc")
+    assert not assets.etag_matches(None, "abc")
+
+
+def test_store_hashes_and_compresses(tmp_path):
+    (tmp_path / "app.js").write_text("console.log('hi');\n" * 200)
+    (tmp_path / "tiny.css").write_text("a{}")
+    store = assets.AssetStore(tmp_path)
+    assert len(store) == 2
+
+    script = store["app.js"]
+    assert script.hashed_name == f"app.{script.digest}.js"
+    assert store.get(script.hashed_name) is script
+    assert gzip.decompress(script.body("gzip")) == script.data
+    assert script.body(None) == script.data
+    assert store["tiny.css"].compressed == {}  # Compression wouldn't pay
+
+    version = store.version
+    (tmp_path / "app.js").write_text("changed")
+    assert assets.AssetStore(tmp_path).version != version
+
+
+def test_unsupported_encoding():
+    with pytest.raises(ValueError):
+        assets.compress(b"data", "deflate")
+
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Needs node")
+def test_stylesheet_is_up_to_date():
+    # Run `node tools/build_css.js` after changing classes in the templates
+    build = subprocess.run(
+        ["node", str(ROOT / "tools" / "build_css.js"), "--check"],
+        capture_output=True, text=True,
+    )
+    assert build.returncode == 0, build.stderr
+
+
+def test_stylesheet_covers_player_colors():
+    css = (ROOT / "src" / "static" / "app.css").read_text()
+    for color in ("red", "emerald", "slate"):
+        assert f".bg-{color}-400{{" in css
+        assert f".bg-{color}-300{{" in css
+        assert f".hover\\:bg-{color}-300:hover{{" in css
+        assert f".border-{color}-600\\/75{{" in css
+        assert f".hover\\:border-{color}-500\\/75:hover{{" in css
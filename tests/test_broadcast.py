@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from redcode.broadcast import Broadcast, BroadcastHub
+from redcode.machine import Machine
+
+
+def imps() -> Machine:
+    machine = Machine(64, seed=1)
+    machine.load_code("MOV 0, 1", "Imp 1")
+    machine.load_code("MOV 0, 1", "Imp 2")
+    return machine
+
+
+def parse(event: str) -> tuple[str, dict]:
+    kind, data = event.strip().split("\n")
+    data = json.loads(data.removeprefix("data: "))
+    return kind.removeprefix("event: "), data
+
+
+def collect_moves(events: list[str]) -> list:
+    moves = []
+    for kind, data in map(parse, events):
+        if kind in ("snapshot", "delta"):
+            assert data["position"] == len(moves) or kind == "snapshot"
+            moves = moves[:data["position"]] + data["moves"]
+    return moves
+
+
+def test_hub_simulates_each_battle_once():
+    hub = BroadcastHub(max_ticks=200)
+    created = []
+
+    def factory():
+        created.append(imps())
+        return created[-1]
+
+    first = hub.start("battle", factory)
+    second = hub.start("battle", factory)
+    assert first is second
+    assert len(created) == 1
+    assert first.wait(5)
+
+
+def test_late_joiner_gets_snapshot_with_full_history():
+    live = Broadcast("battle", imps(), max_ticks=200, chunk_rounds=10)
+    live.start()
+    assert live.wait(5)
+
+    events = list(live.subscribe().events(timeout=5))
+    assert parse(events[0])[0] == "snapshot"
+    assert parse(events[-1])[0] == "end"
+    expected = json.loads(live.machine.json_history)
+    assert collect_moves(events) == expected
+    assert live.spectators == 0
+    assert live.changes.ticks == len(live.machine.history)
+
+
+def test_slow_subscriber_is_coalesced_into_a_snapshot():
+    live = Broadcast(
+        "battle", imps(), max_ticks=400, chunk_rounds=1, max_pending=2,
+    )
+    subscriber = live.subscribe()
+    stream = subscriber.events(timeout=5)
+    assert parse(next(stream))[0] == "snapshot"
+
+    live.start()
+    assert live.wait(5)
+    events = list(stream)
+    assert subscriber.coalesced >= 1
+    assert parse(events[0])[0] == "snapshot"
+    assert parse(events[-1])[1]["winners"] == ["Imp 1", "Imp 2"]
+    assert collect_moves(events) == json.loads(live.machine.json_history)
+
+
+def test_json_history_is_serialized_once(monkeypatch):
+    live = Broadcast("battle", imps(), max_ticks=200)
+    live.start()
+    history = live.json_history
+    assert history == live.machine.json_history
+
+    monkeypatch.setattr(Machine, "json_history", property(
+        lambda machine: pytest.fail("Serialized the history again"),
+    ))
+    assert live.json_history is history
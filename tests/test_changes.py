@@ -0,0 +1,80 @@
+from redcode.changes import ChangeIndex
+from redcode.machine import Machine
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+IMP = "MOV 0, 1"
+
+
+def new_battle() -> Machine:
+    machine = Machine(256, seed=5)
+    machine.load_code(DWARF, "Dwarf")
+    machine.load_code(IMP, "Imp")
+    return machine
+
+
+def scan_last_write(history, cell, before):
+    for tick in range(min(before, len(history)) - 1, -1, -1):
+        diff = history[tick]
+        if diff is not None and diff.index == cell:
+            return tick
+    return None
+
+
+def test_queries_match_history_scan():
+    machine = new_battle()
+    machine.run(1000)
+    index = ChangeIndex(len(machine.memory), machine.start_map)
+    index.sync(machine.history)
+    history = machine.history
+
+    for cell in range(0, 256, 7):
+        for before in (0, 1, 50, 333, len(history)):
+            tick = index.last_write(cell, before)
+            assert tick == scan_last_write(history, cell, before)
+            if tick is not None:
+                assert index.owner(cell, before) == history[tick].pid
+            else:
+                assert index.owner(cell, before) == machine.start_map[cell]
+
+    for pid in (0, 1):
+        expected = [
+            tick for tick, diff in enumerate(history[100:400], 100)
+            if diff is not None and diff.index is not None and diff.pid == pid
+        ]
+        assert index.player_writes(pid, 100, 400) == expected
+
+
+def test_incremental_sync_matches_full_sync():
+    machine = new_battle()
+    machine.run(1000, budget=0)
+    index = ChangeIndex(len(machine.memory), machine.start_map)
+    while not machine.finished:
+        machine.resume(37)
+        index.sync(machine.history)
+
+    full = ChangeIndex(len(machine.memory), machine.start_map)
+    full.sync(machine.history)
+    assert index.ticks == full.ticks == len(machine.history)
+    assert all(
+        index.writes(cell) == full.writes(cell) for cell in range(256)
+    )
+
+
+def test_next_write():
+    machine = new_battle()
+    machine.run(200)
+    index = ChangeIndex(len(machine.memory))
+    index.sync(machine.history)
+    cell = next(d.index for d in machine.history if d and d.index is not None)
+    ticks = index.writes(cell)
+    assert index.next_write(cell) == ticks[0]
+    assert index.next_write(cell, after=ticks[0]) == (
+        ticks[1] if len(ticks) > 1 else None
+    )
+    assert index.last_write(cell) == ticks[-1]
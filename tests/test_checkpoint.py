@@ -0,0 +1,66 @@
+import pytest
+
+from redcode import checkpoint
+from redcode.errors import CheckpointError, HistoryEvicted
+from redcode.machine import Machine
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+IMP = "MOV 0, 1"
+
+
+def new_battle(seed: int = 5) -> Machine:
+    machine = Machine(256, seed=seed)
+    machine.load_code(DWARF, "Dwarf")
+    machine.load_code(IMP, "Imp")
+    return machine
+
+
+def test_resumed_battle_matches_uninterrupted_one():
+    reference = new_battle()
+    reference.run(2000)
+
+    interrupted = new_battle()
+    interrupted.run(2000, budget=100)
+    assert not interrupted.finished
+    data = checkpoint.dumps(interrupted)
+    resumed = checkpoint.loads(data)
+    resumed.resume()
+
+    assert resumed.finished
+    assert list(resumed.memory) == [int(w) for w in reference.memory]
+    assert resumed.ips == reference.ips
+    assert [p.is_alive for p in resumed.processes] == [
+        p.is_alive for p in reference.processes
+    ]
+    assert resumed.history == reference.history[len(interrupted.history):]
+
+
+def test_checkpoint_keeps_history_tail_and_random_state(tmp_path):
+    machine = new_battle()
+    machine.run(2000, budget=10)
+    path = tmp_path / "battle.ckpt"
+    checkpoint.dump(machine, path, history_tail=5)
+    resumed = checkpoint.load(path)
+
+    assert resumed.history == machine.history[-5:]
+    assert len(resumed.history) == len(machine.history)
+    assert resumed.history[-1] == machine.history[-1]
+    with pytest.raises(HistoryEvicted):
+        resumed.moves()
+    assert resumed.programs == machine.programs
+    assert resumed.start_map == machine.start_map
+    original_random = machine.memory._random.getstate()
+    assert resumed.memory._random.getstate() == original_random
+
+
+def test_checkpoint_rejects_garbage():
+    with pytest.raises(CheckpointError):
+        checkpoint.loads(b"not a checkpoint at all, really not one")
+    with pytest.raises(CheckpointError):
+        checkpoint.loads(checkpoint.dumps(new_battle())[:20])
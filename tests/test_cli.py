@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+from redcode import archive
+from redcode.cli import main
+
+
+code_dir = Path(__file__).parent / "codes"
+GOOD = str(code_dir / "good.red")
+SMALL = str(code_dir / "small_code.red")
+
+
+def run(capsys, *argv: str) -> tuple[int, dict]:
+    status = main(argv)
+    return status, json.loads(capsys.readouterr().out)
+
+
+def test_battle_is_reproducible(capsys):
+    argv = ("battle", GOOD, SMALL, "--rounds", "3", "--seed", "7")
+    status, first = run(capsys, *argv)
+    assert status == 0
+    assert len(first["rounds"]) == 3
+    assert sum(w["wins"] for w in first["warriors"]) <= 3
+    assert run(capsys, *argv, "--jobs", "2")[1] == first
+
+
+def test_battle_keeps_warriors_with_the_same_name_apart(capsys, tmp_path):
+    for folder in ("one", "two"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "imp.red").write_text("MOV 0, 1\n")
+    (tmp_path / "one" / "imp.red").write_text("DAT #0\n")
+    paths = [str(tmp_path / folder / "imp.red") for folder in ("one", "two")]
+    status, output = run(capsys, "battle", *paths, "--rounds", "2")
+    assert status == 0
+    assert [w["name"] for w in output["warriors"]] == ["imp", "imp"]
+    assert [w["path"] for w in output["warriors"]] == paths
+    assert [w["wins"] for w in output["warriors"]] == [0, 2]
+
+
+def test_tournament_standings(capsys):
+    argv = ("tournament", GOOD, SMALL, str(code_dir / "simple.red"))
+    status, output = run(capsys, *argv, "--rounds", "2", "--seed", "1")
+    assert status == 0
+    standings = output["standings"]
+    assert len(standings) == 3
+    assert sum(s["wins"] for s in standings) == sum(
+        s["losses"] for s in standings
+    )
+    assert sum(s["wins"] + s["ties"] + s["losses"] for s in standings) == 12
+
+
+def test_archive_warriors(capsys, tmp_path):
+    path = tmp_path / "warriors.rcwa"
+    archive.write(path, [("imp", archive.compile_source("MOV 0, 1"))])
+    status, output = run(capsys, "battle", str(path), GOOD, "--seed", "1")
+    assert status == 0
+    assert [w["name"] for w in output["warriors"]] == ["imp", "good"]
+    assert output["warriors"][0]["path"] == f"{path}:imp"
+
+
+def test_validate_exit_status(capsys):
+    assert run(capsys, "validate", GOOD)[0] == 0
+    status, output = run(capsys, "validate", str(code_dir))
+    assert status == 1
+    invalid = {Path(f["path"]).name for f in output["files"] if f["errors"]}
+    assert invalid == {p.name for p in code_dir.glob("bad_*.red")}
+
+
+def test_invalid_warrior_is_reported(capsys):
+    bad = str(code_dir / "bad_operator.red")
+    status, output = run(capsys, "battle", GOOD, bad)
+    assert status == 2
+    assert "XYZ" in output["error"]
+
+
+def test_does_not_import_flask():
+    code = "import sys, redcode.cli; print('flask' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        check=True, cwd=Path(__file__).parent.parent / "src",
+    )
+    assert output.stdout.strip() == "False"
+
+
+def test_tournament_early_stop(capsys):
+    argv = ("tournament", GOOD, SMALL, "--rounds", "40", "--seed", "1")
+    status, output = run(capsys, *argv, "--early-stop", "0.95")
+    assert status == 0
+    assert output["simulations"] + output["simulations_saved"] == 40
+    assert output["simulations"] >= 10
+
+
+def test_tournament_scores_are_reused(capsys, tmp_path):
+    argv = ("tournament", GOOD, SMALL, "--scores", str(tmp_path / "s.db"))
+    assert run(capsys, *argv)[1]["simulations"] == 1
+    status, output = run(capsys, *argv)
+    assert status == 0
+    assert output["simulations"] == 0
+    games = [s["wins"] + s["ties"] + s["losses"] for s in output["standings"]]
+    assert games == [1, 1]
@@ -3,7 +3,10 @@ from pathlib import Path
 import pytest
 
 from redcode.config import MAX_PROGRAM_SIZE
-from redcode.code import Parser, Validator
+from redcode.code import (
+    LINE_CACHE, LineCache, Parser, Validator, canonical_hash, parse_code,
+    validate_lines,
+)
 from redcode.errors import EmptyCode, SizeLimitExceeded
 from redcode.instruction import Add, Mode, Mov, Jmp
 
@@ -103,3 +106,71 @@ def test_disabled_size_limit():
         Parser(code, instruction_limit=None).parse()
     except Exception:
         assert False, "Code should be valid"
+
+
+def test_canonical_hash_ignores_formatting():
+    code = "ADD #4, 3\nMOV 2, @2\nJMP -2\nDAT #0"
+    reformatted = (
+        "; Dwarf\n  add   #4, 3   ; bomb step\n\nmov 2, @2\nJMP 4094\ndat #0"
+    )
+    assert canonical_hash(code) == canonical_hash(reformatted)
+    assert canonical_hash("DAT #0") != canonical_hash("DAT 0")
+
+
+def test_canonical_hash_rejects_invalid_code():
+    with pytest.raises(ExceptionGroup):
+        canonical_hash("XYZ 1, 2")
+
+
+def test_validate_lines_matches_validator():
+    for codefile in code_dir.glob("*.red"):
+        code = codefile.read_text()
+        validator = Validator(code)
+        validator.is_valid()
+        expected = [(type(e), str(e)) for e in validator.errors]
+        assert [(type(e), str(e)) for e in validate_lines(code)] == expected
+
+
+def test_validate_lines_checks_each_line_once():
+    LINE_CACHE.clear()
+    code = "MOV 0, 1\nXYZ 1, 2\n"
+    validate_lines(code, client="editor")
+    before = LINE_CACHE.misses
+    errors = validate_lines(code + "ADD #4, 3\n", client="editor")
+    assert LINE_CACHE.misses == before + 1
+    assert [e.line_index for e in errors] == [2]
+    assert validate_lines("; only a comment")[0].msg == "Empty code"
+
+
+def test_validate_lines_rejects_long_programs_unchecked():
+    LINE_CACHE.clear()
+    code = "".join(f"DAT #{i}\n" for i in range(MAX_PROGRAM_SIZE + 1))
+    errors = validate_lines(code)
+    assert [type(e) for e in errors] == [SizeLimitExceeded]
+    assert len(LINE_CACHE) == 0
+    assert validate_lines(code, instruction_limit=None) == []
+
+
+def test_clients_only_flush_their_own_lines():
+    cache = LineCache(clients=2, lines=3)
+    cache.check("editor", "MOV 0, 1")
+    for i in range(10):
+        cache.check("flood", f"DAT #{i}")
+    misses = cache.misses
+    cache.check("editor", "MOV 0, 1")
+    assert cache.misses == misses
+    assert len(cache) == 4
+
+
+def test_parse_code_validates_once(monkeypatch):
+    calls = []
+    is_valid = Validator.is_valid
+    monkeypatch.setattr(
+        Validator, "is_valid",
+        lambda self: calls.append(self) or is_valid(self),
+    )
+    assert parse_code("JMP 1") == [Jmp(Mode.RELATIVE, 1)]
+    assert len(calls) == 1
+    with pytest.raises(ExceptionGroup) as group:
+        parse_code("XYZ 1, 2\nMOV 0")
+    assert len(group.value.exceptions) == 2
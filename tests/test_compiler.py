@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from redcode.compiler import BlockCompiler, CompiledProcess
+from redcode.evolve import random_genome
+from redcode.instruction import Add, Dat, Jmp, Mode, Mov
+from redcode.machine import Machine
+from redcode.memory import Memory
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+
+
+def battle(programs: list, compiled: bool, seed: int, size: int = 256):
+    machine = Machine(size, seed=seed, compiled=compiled)
+    for i, program in enumerate(programs):
+        if isinstance(program, str):
+            machine.load_code(program, f"Player {i}")
+        else:
+            machine.load_program(list(program), f"Player {i}")
+    machine.run(2000)
+    return machine
+
+
+def assert_same_battle(reference: Machine, compiled: Machine):
+    assert compiled.history == reference.history
+    assert list(compiled.memory) == list(reference.memory)
+    assert compiled.ips == reference.ips
+    assert [str(p) for p in compiled.processes] == [
+        str(p) for p in reference.processes
+    ]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_compiled_dwarves_match_reference(seed):
+    programs = [DWARF, DWARF, "MOV 0, 1"]
+    assert_same_battle(
+        battle(programs, False, seed), battle(programs, True, seed),
+    )
+
+
+def test_compiled_random_programs_match_reference():
+    rng = random.Random(0)
+    for seed in range(40):
+        programs = [random_genome(rng, 6) for _ in range(2)]
+        assert_same_battle(
+            battle(programs, False, seed), battle(programs, True, seed),
+        )
+
+
+def test_hot_blocks_are_compiled_and_invalidated():
+    memory = Memory(16)
+    memory[0] = Add(Mode.IMMEDIATE, 4, Mode.RELATIVE, 3)
+    memory[1] = Mov(Mode.RELATIVE, 2, Mode.INDIRECT, 2)
+    memory[2] = Jmp(Mode.RELATIVE, -2)
+    compiler = BlockCompiler(memory, hot_threshold=2)
+    assert compiler.step(0) is None
+    assert compiler.step(0) is not None
+    assert len(compiler) == 3  # The block ends at the jump
+
+    memory[1] = Dat.of(0)
+    assert len(compiler) == 2
+    assert compiler.step(1) is None
+
+
+def test_compiled_processes_execute_one_instruction_per_tick():
+    machine = battle([DWARF, DWARF], True, seed=1)
+    assert all(isinstance(p, CompiledProcess) for p in machine.processes)
+    assert len(machine.history) == machine._ticks
+    assert [d.pid for d in machine.history[:6]] == [0, 1] * 3
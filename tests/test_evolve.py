@@ -0,0 +1,57 @@
+import random
+
+from redcode import config
+from redcode.evolve import (
+    Evolver, crossover, evaluate, mutate, random_genome,
+)
+from redcode.instruction import Instruction, Mode, Mov, program_hash
+from redcode.tournament import Outcome, duel
+
+
+IMP = (int(Mov(Mode.RELATIVE, 0, Mode.RELATIVE, 1)),)
+
+
+def test_mutations_stay_valid_and_bounded():
+    rng = random.Random(0)
+    genome = random_genome(rng)
+    for _ in range(300):
+        genome = mutate(genome, rng, rate=0.9, max_size=10)
+        assert 1 <= len(genome) <= 10
+        for word in genome:
+            Instruction.from_int(word)  # Doesn't raise
+
+
+def test_crossover_respects_program_size():
+    rng = random.Random(1)
+    long = IMP * config.MAX_PROGRAM_SIZE
+    for _ in range(50):
+        child = crossover(long, long, rng)
+        assert 1 <= len(child) <= config.MAX_PROGRAM_SIZE
+
+
+def test_imps_tie():
+    assert duel(IMP, IMP, memory_size=64, max_ticks=100, seed=0) == Outcome.TIE
+    assert evaluate(IMP, [IMP], rounds=2, memory_size=64, max_ticks=100) == 1
+
+
+def test_evolver_caches_fitness_by_program_hash():
+    evolver = Evolver(
+        [IMP], population_size=6, rounds=1, memory_size=64, max_ticks=50,
+        jobs=1, seed=3, population=[IMP] * 6,
+    )
+    evolver.step()
+    assert evolver.stats.evaluations == 1
+    assert evolver.stats.cache_hits == 5
+    assert evolver.fitness[program_hash(IMP)] == 1
+
+
+def test_evolver_runs_in_a_process_pool():
+    with Evolver(
+        [IMP], population_size=8, rounds=1, memory_size=64, max_ticks=50,
+        jobs=2, seed=4,
+    ) as evolver:
+        best = evolver.run(2)
+    assert program_hash(best) in evolver.fitness
+    assert evolver.stats.generation == 2
+    assert evolver.stats.evaluations_per_second > 0
+    assert "evaluations/s" in str(evolver.stats)
@@ -0,0 +1,37 @@
+import random
+
+from redcode import fuzz
+from redcode.machine import Machine
+
+
+def test_generated_scenarios_are_reproducible():
+    first = fuzz.generate(random.Random(3))
+    assert first == fuzz.generate(random.Random(3))
+    assert fuzz.Scenario.from_dict(first.to_dict()) == first
+
+
+def test_compiled_engine_matches_reference():
+    fuzzer = fuzz.Fuzzer(jobs=2)
+    assert fuzzer.run(40, seed=0) == []
+    assert fuzzer.scenarios == 40
+
+
+def test_divergences_are_minimized(monkeypatch):
+    def broken(scenario):  # Wraps addresses in a slightly bigger core
+        return Machine(
+            scenario.memory_size + 1, allow_single_process=True,
+            seed=scenario.seed,
+        )
+
+    monkeypatch.setitem(fuzz.ENGINES, "broken", broken)
+    fuzzer = fuzz.Fuzzer(candidate="broken", jobs=1)
+    divergences = fuzzer.run(10, seed=1)
+    assert divergences
+    for divergence in divergences:
+        minimized = divergence.minimized
+        assert fuzzer.diverges(minimized)
+        assert len(minimized.programs) == 1
+        assert len(minimized.programs[0]) == 1
+        assert minimized.max_ticks == 1
+        assert minimized.core is None
+        assert "Diverged on" in divergence.describe()
@@ -0,0 +1,99 @@
+from redcode.heatmap import NO_OWNER, Heatmap
+from redcode.machine import Machine
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+IMP = "MOV 0, 1"
+
+
+def test_imp_counters():
+    machine = Machine(64, allow_single_process=True, seed=1, heatmap=True)
+    machine.load_code(IMP, "Imp")
+    start = machine.ips[0]
+    machine.run(10)
+
+    heatmap = machine.heatmap
+    assert heatmap is not None
+    ticks = machine._ticks
+    touched = [(start + i) % 64 for i in range(ticks)]
+    for index in touched:
+        assert heatmap.executes[index] == 1
+        assert heatmap.reads[index] == 1
+    assert sum(heatmap.writes) == ticks
+    assert heatmap.owners[(start + ticks) % 64] == 0
+    assert heatmap.ownership() == {0: ticks + 1}
+
+
+def test_indirect_reads_and_owners():
+    machine = Machine(256, seed=5, heatmap=True)
+    machine.load_code(DWARF, "Dwarf")
+    machine.load_code(IMP, "Imp")
+    machine.run(300)
+
+    heatmap = machine.heatmap
+    dwarf_start = machine.start_state.ips[0]
+    assert heatmap.executes[dwarf_start + 1] > 1
+    assert heatmap.reads[dwarf_start + 3] >= heatmap.executes[dwarf_start + 1]
+    assert set(heatmap.ownership()) <= {0, 1}
+    assert sum(heatmap.executes) == sum(
+        1 for diff in machine.history if diff is not None
+    ) + sum(not p.is_alive for p in machine.processes)
+
+
+def test_heatmap_does_not_change_the_battle():
+    battles = []
+    for heatmap, compiled in [(False, False), (True, False), (True, True)]:
+        machine = Machine(256, seed=9, heatmap=heatmap, compiled=compiled)
+        machine.load_code(DWARF, "Dwarf")
+        machine.load_code(IMP, "Imp")
+        machine.run(2000)
+        battles.append(machine.history)
+    assert battles[0] == battles[1] == battles[2]
+
+
+def test_indirect_pointers_are_read_once():
+    heatmaps = []
+    for compiled in (False, True):
+        machine = Machine(
+            64, allow_single_process=True, seed=3, heatmap=True,
+            compiled=compiled,
+        )
+        machine.load_code("ADD #1, @1\nDAT #2\nDAT #0\nDAT #5", "Adder")
+        start = machine.ips[0]
+        machine.run(10)
+        heatmap = machine.heatmap
+        assert heatmap.reads[start + 1] == 1  # The pointer
+        assert heatmap.reads[start + 3] == 1  # What it points to
+        assert heatmap.writes[start + 3] == 1
+        heatmaps.append(heatmap.to_dict())
+    assert heatmaps[0] == heatmaps[1]
+
+
+def test_compact_output():
+    heatmap = Heatmap(8)
+    heatmap.claim(2, 4, 1)
+    heatmap.execute(2, 1)
+    heatmap.write(6)
+    heatmap.read(7)
+    assert heatmap.to_dict() == {
+        "size": 8,
+        "cells": [
+            [2, 0, 0, 1, 1], [3, 0, 0, 0, 1],
+            [6, 0, 1, 0, 1], [7, 1, 0, 0, NO_OWNER],
+        ],
+        "ownership": {1: 3},
+    }
+
+
+def test_reset_keeps_tracking():
+    machine = Machine(64, allow_single_process=True, heatmap=True)
+    machine.load_code(IMP, "Imp")
+    machine.run(5)
+    machine.reset()
+    assert machine.heatmap is not None
+    assert not any(machine.heatmap.executes)
@@ -0,0 +1,118 @@
+import copy
+
+import pytest
+
+from redcode.errors import HistoryEvicted
+from redcode.history import KeepAll, RingBuffer, SpillToDisk, create
+from redcode.instruction import WIDE
+from redcode.machine import Machine
+from redcode.process import Diff
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+IMP = "MOV 0, 1"
+
+
+def run_battle(history=None) -> Machine:
+    machine = Machine(256, seed=5, history=history)
+    machine.load_code(DWARF, "Dwarf")
+    machine.load_code(IMP, "Imp")
+    machine.run(1000)
+    return machine
+
+
+def test_default_keeps_everything():
+    machine = run_battle()
+    assert isinstance(machine.history, KeepAll)
+    assert machine.history.first == 0
+
+
+def test_ring_buffer_keeps_the_last_entries():
+    expected = run_battle().history
+    history = RingBuffer(100)
+    machine = run_battle(history)
+
+    assert len(history) == len(expected)
+    assert history.first == len(expected) - 100
+    assert list(history) == expected[-100:]
+    assert history[-1] == expected[-1]
+    assert history[len(expected) - 50] == expected[-50]
+    with pytest.raises(HistoryEvicted):
+        history[0]
+    with pytest.raises(IndexError):
+        history[len(expected)]
+    assert machine.finished
+
+
+def test_spill_to_disk_reads_back_lazily(tmp_path):
+    expected = run_battle().history
+    history = SpillToDisk(chunk_size=64, directory=str(tmp_path))
+    machine = run_battle(history)
+
+    assert len(history) == len(expected)
+    assert history == expected
+    assert history[100:300] == expected[100:300]
+    assert history[-5:] == expected[-5:]
+    assert [history[i] for i in range(0, len(expected), 97)] == (
+        expected[::97]
+    )
+    assert machine.json_history == run_battle().json_history
+    assert len(history._cache) <= 2
+
+    copied = copy.deepcopy(history)
+    assert copied == expected
+    machine.reset()
+    assert len(history) == 0
+
+
+def test_slices_never_return_evicted_entries(tmp_path):
+    entries = [Diff(0, tick, None, "DAT #0, #0") for tick in range(10)]
+    ring = RingBuffer(4)
+    spill = SpillToDisk(chunk_size=3, directory=str(tmp_path))
+    for entry in entries:
+        ring.append(entry)
+        spill.append(entry)
+
+    assert ring[6:10] == entries[6:10]
+    assert ring[-2:] == entries[-2:]
+    assert ring[9:5:-1] == entries[9:5:-1]
+    for evicted in (slice(0, 3), slice(5, 8), slice(-5, None)):
+        with pytest.raises(HistoryEvicted):
+            ring[evicted]
+    assert spill[0:10] == entries
+    assert spill[2:7] == entries[2:7]
+    assert spill[-4:] == entries[-4:]
+
+    spill.close()
+    with pytest.raises(HistoryEvicted):
+        spill[0:3]
+
+
+def test_spilled_wide_words_round_trip(tmp_path):
+    top = WIDE.size - 1  # Every bit set, the sign bit of the field too
+    entries = [
+        Diff(0, 1, 7, "DAT #-1", 0, top), Diff(1, 2, 8, "DAT #0", 1, 5),
+    ]
+    history = SpillToDisk(chunk_size=1, directory=str(tmp_path))
+    for entry in entries:
+        history.append(entry)
+    assert history[0:2] == entries
+
+
+def test_moves_need_the_whole_history():
+    machine = run_battle(RingBuffer(10))
+    with pytest.raises(HistoryEvicted):
+        machine.moves()
+
+
+def test_create_policies():
+    assert isinstance(create("all"), KeepAll)
+    assert create("ring", 10).size == 10
+    assert create("spill", 10).chunk_size == 10
+    with pytest.raises(ValueError):
+        create("everything")
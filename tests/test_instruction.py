@@ -6,12 +6,16 @@ from redcode.instruction import (
     Cmp,
     Dat,
     Djz,
+    Encoding,
     Instruction,
     Jmp,
     Jmz,
     Mode,
     Mov,
+    STANDARD,
     Sub,
+    WIDE,
+    program_hash,
 )
 from redcode.memory import Memory
 from src.redcode.instruction import InstructionResult
@@ -286,3 +290,41 @@ def test_indirect():
     """, "")
     machine.run()
     assert machine.memory[1] == Dat.of(8)
+
+
+@pytest.mark.parametrize("encoding", [STANDARD, WIDE])
+def test_encoding_round_trip(encoding):
+    instruction = Mov(Mode.RELATIVE, -3, Mode.INDIRECT, 5, encoding=encoding)
+    decoded = encoding.decode(int(instruction))
+    assert str(decoded) == "MOV -3, @5"
+    assert int(decoded) == int(instruction)
+
+
+def test_standard_encoding_matches_int():
+    instruction = Djz(Mode.INDIRECT, -1, Mode.RELATIVE, 2000)
+    assert STANDARD.encode(instruction) == int(instruction)
+
+
+def test_wide_encoding_keeps_large_offsets():
+    instruction = Jmp(Mode.RELATIVE, 100_000, encoding=WIDE)
+    assert instruction.b == 100_000
+    assert Jmp(Mode.RELATIVE, 100_000).b != 100_000  # Wrapped to 12 bits
+
+
+def test_encoding_for_core():
+    assert Encoding.for_core(4096) is STANDARD
+    assert Encoding.for_core(4097) is WIDE
+    with pytest.raises(ValueError):
+        Encoding.for_core(2 ** 29)
+
+
+def test_wide_program_hashes_keep_large_offsets():
+    near = [Jmp(Mode.RELATIVE, 5, encoding=WIDE)]
+    far = [Jmp(Mode.RELATIVE, 5 + (1 << 12), encoding=WIDE)]
+    assert program_hash(near, WIDE) != program_hash(far, WIDE)
+    assert program_hash([WIDE.encode(near[0])], WIDE) == (
+        program_hash(near, WIDE)
+    )
+    assert program_hash([Jmp(Mode.RELATIVE, 5)]) == program_hash(
+        [int(Jmp(Mode.RELATIVE, 5))]
+    )
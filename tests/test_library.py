@@ -0,0 +1,35 @@
+from pathlib import Path
+import shutil
+
+from redcode.library import Diagnostic, Library, Warrior, parse_file, scan
+
+
+code_dir = Path(__file__).parent / "codes"
+
+
+def test_parse_file_reports_diagnostics():
+    assert isinstance(parse_file(code_dir / "good.red"), Warrior)
+    diagnostic = parse_file(code_dir / "bad_line_check.red")
+    assert isinstance(diagnostic, Diagnostic)
+    assert len(diagnostic.errors) == 2
+
+
+def test_library_loads_codes_dir():
+    library = Library.load(code_dir, jobs=1)
+    bad = {path.name for path in code_dir.glob("bad_*.red")}
+    assert {d.path.name for d in library.diagnostics} == bad
+    loaded = len(library) + sum(map(len, library.duplicates.values()))
+    assert loaded == len(scan(code_dir)) - len(bad)
+
+
+def test_library_deduplicates_by_program(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "imp.red").write_text("MOV 0, 1")
+    (tmp_path / "nested" / "imp2.red").write_text("mov 0 1 ; Same imp")
+    shutil.copy(code_dir / "simple.red", tmp_path / "nested")
+
+    library = Library.load(tmp_path, jobs=2, chunksize=1)
+    assert len(library) == 2
+    [paths] = library.duplicates.values()
+    assert [path.name for path in paths] == ["imp2.red"]
+    assert not library.diagnostics
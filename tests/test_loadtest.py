@@ -0,0 +1,40 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+PATH = Path(__file__).parent.parent / "tools" / "loadtest.py"
+spec = importlib.util.spec_from_file_location("loadtest", PATH)
+loadtest = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(loadtest)
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile([3.0], 90) == 3
+    assert loadtest.percentile([], 50) == 0
+
+
+def test_parse_mix():
+    assert loadtest.parse_mix("upload=1,battle") == {
+        "upload": 1.0, "battle": 1.0,
+    }
+    with pytest.raises(ValueError):
+        loadtest.parse_mix("delete=1")
+
+
+def test_run_and_compare(tmp_path):
+    output = tmp_path / "report.json"
+    argv = ["--requests", "12", "--concurrency", "3"]
+    assert loadtest.main([*argv, "--output", str(output)]) == 0
+    assert loadtest.main([*argv, "--compare", str(output)]) == 0
+
+    report = loadtest.json.loads(output.read_text())
+    assert report["total"]["requests"] >= 12
+    assert report["total"]["errors"] == 0
+    assert set(report["endpoints"]) >= {"upload", "battle"}
+    assert set(report["endpoints"]) <= {"upload", "test", "battle", "reset"}
+    assert set(report["endpoints"]["test"]["latency_ms"]) >= {"p50", "p99"}
@@ -0,0 +1,131 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from redcode.errors import (
+    BadRoomName, NoSuchRoom, PlayerExists, TooManyRooms, WrongShard,
+)
+from redcode.lobby import DEFAULT_ROOM, Lobby, Room, shard_of
+
+
+IMP = "MOV 0, 1"
+
+
+def test_rooms_are_isolated():
+    lobby = Lobby()
+    lobby.room("alpha").submit("Imp", IMP)
+    lobby.room("beta").submit("Imp", IMP)
+    lobby.room("beta").submit("Other", IMP)
+    assert lobby.room("alpha").players == ["Imp"]
+    assert lobby.players == 3
+
+    lobby.room("beta").reset()
+    assert lobby.room("alpha").players == ["Imp"]
+    assert lobby.room("beta").players == []
+
+
+def test_duplicate_and_invalid_uploads():
+    room = Room("alpha")
+    room.submit("Imp", IMP)
+    with pytest.raises(PlayerExists):
+        room.submit("Imp", IMP)
+    with pytest.raises(ExceptionGroup):
+        room.submit("Bad", "XYZ 1, 2")
+    assert room.players == ["Imp"]
+
+
+def test_concurrent_uploads():
+    room = Room("alpha")
+    names = [f"Player {i}" for i in range(64)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda name: room.submit(name, IMP), names))
+    assert sorted(room.players) == sorted(names)
+
+
+def test_concurrent_submissions_of_same_name_conflict():
+    room = Room("alpha")
+
+    def submit(_):
+        try:
+            room.submit("Imp", IMP)
+        except PlayerExists:
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert sum(pool.map(submit, range(32))) == 1
+
+
+def test_battles_are_shared_within_a_room():
+    room = Room("alpha")
+    room.submit("First", IMP)
+    room.submit("Second", IMP)
+    live = room.battle()
+    assert room.battle() is live
+    assert live.wait(timeout=30)
+    assert [p.name for p in live.machine.processes] == ["First", "Second"]
+
+
+def test_room_names_and_limits():
+    lobby = Lobby(max_rooms=2)
+    with pytest.raises(BadRoomName):
+        lobby.room("../etc")
+    lobby.room("one").submit("Imp", IMP)
+    lobby.room("two").submit("Imp", IMP)
+    assert lobby.room("one") is lobby.room("one")
+    with pytest.raises(TooManyRooms):
+        lobby.room("three")
+    lobby.close("one")
+    lobby.room("three")
+    assert "one" not in lobby
+
+
+def test_empty_and_idle_rooms_make_way():
+    lobby = Lobby(max_rooms=2, idle_seconds=60)
+    lobby.room("empty")
+    lobby.room("busy").submit("Imp", IMP)
+    lobby.room("new").submit("Imp", IMP)
+    assert "empty" not in lobby and "busy" in lobby
+
+    lobby.room("busy").used -= 120
+    lobby.room("newer")
+    assert "busy" not in lobby and "new" in lobby
+
+
+def test_existing_rooms_are_never_opened():
+    lobby = Lobby()
+    with pytest.raises(NoSuchRoom):
+        lobby.existing("alpha")
+    assert "alpha" not in lobby
+    assert lobby.existing(DEFAULT_ROOM) is lobby.room(DEFAULT_ROOM)
+    lobby.room("alpha").submit("Imp", IMP)
+    assert lobby.existing("alpha").players == ["Imp"]
+
+
+def test_sharding():
+    shards = [Lobby(shard=i, shards=3) for i in range(3)]
+    for name in ["alpha", "beta", "gamma", "delta"]:
+        owner = shard_of(name, 3)
+        assert shards[owner].room(name).name == name
+        for i, lobby in enumerate(shards):
+            if i != owner:
+                with pytest.raises(WrongShard):
+                    lobby.room(name)
+
+
+def test_reformatted_uploads_share_a_battle():
+    room = Room("alpha")
+    room.submit("First", IMP)
+    room.submit("Second", "; imp\nmov 0, 1")
+
+    same_hub = Room("beta", hub=room.hub)
+    same_hub.submit("First", "MOV 0, 1 ; again")
+    same_hub.submit("Second", IMP)
+    live = room.battle()
+    assert same_hub.battle() is live
+    assert live.wait(timeout=30)
+
+    renamed = Room("gamma", hub=room.hub)
+    renamed.submit("Third", IMP)
+    renamed.submit("Fourth", IMP)
+    assert renamed.battle() is not live  # The battle shows player names
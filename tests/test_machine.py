@@ -1,7 +1,7 @@
 import pytest
 
 from redcode import config
-from redcode.instruction import Dat, Instruction
+from redcode.instruction import STANDARD, WIDE, Dat, Instruction, Mode, Mov
 from redcode.machine import Machine
 
 
@@ -80,3 +80,41 @@ def test_right_process_ids_multiple_machines():
     machine.load_code("DAT #0", "Player 1")
     process_ids = [p._id for p in machine.processes]
     assert process_ids == [0]
+
+
+def test_default_machine_uses_standard_encoding():
+    assert Machine().encoding is STANDARD
+    assert Machine(65536).encoding is WIDE
+
+
+def test_wide_core_reaches_far_cells():
+    machine = Machine(65536, allow_single_process=True, seed=1)
+    machine.load_code("MOV 0, 30000", "Far")
+    machine.run(2)
+    start = machine.processes[0]._code_start
+    assert str(machine[start + 30000]) == "MOV 0, 30000"
+    assert machine.moves()[0]["prev_value"] == "DAT #0, #0"
+
+
+def test_wide_core_loads_standard_words():
+    machine = Machine(8192, allow_single_process=True, seed=1)
+    machine.load_program([int(Mov(Mode.RELATIVE, 0, Mode.RELATIVE, 1))], "Imp")
+    machine.run(3)
+    assert machine.survivors and machine.moves()[-1]["value"] == "MOV 0, 1"
+
+
+def test_free_for_all_skips_dead_processes():
+    machine = Machine(256, seed=2)
+    deaths = []
+    machine.table.on_death = lambda slot, reason: deaths.append(slot)
+    for i in range(6):
+        machine.load_code("DAT #0" if i % 2 else "MOV 0, 1", f"Player {i}")
+    machine.run(60)
+
+    assert sorted(deaths) == [1, 3, 5]
+    assert machine._processes_alive == 3
+    assert [p._id for p in machine.survivors] == [0, 2, 4]
+    # Dead processes keep their place in the history
+    later = machine.history[6:]
+    assert all(diff is None for diff in later[1::2])
+    assert all(diff.pid % 2 == 0 for diff in later[0::2])
@@ -0,0 +1,72 @@
+import pytest
+
+from redcode import metrics
+from redcode.machine import Machine
+
+
+def test_counter_renders_text_format():
+    registry = metrics.Registry()
+    counter = metrics.Counter("things_total", "Things", registry=registry)
+    counter.inc()
+    counter.inc(2)
+    assert registry.render() == (
+        "# HELP things_total Things\n"
+        "# TYPE things_total counter\n"
+        "things_total 3\n"
+    )
+
+
+def test_counter_cannot_decrease():
+    counter = metrics.Counter("c", "C", registry=None)
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_duplicate_metric_names_are_rejected():
+    registry = metrics.Registry()
+    metrics.Gauge("g", "G", registry=registry)
+    with pytest.raises(ValueError):
+        metrics.Gauge("g", "G", registry=registry)
+
+
+def test_labeled_gauge_tracks_in_progress():
+    gauge = metrics.Gauge("g", "G", labelnames=("room",), registry=None)
+    with gauge.labels(room="a").track_inprogress():
+        assert gauge.labels(room="a").value == 1
+    assert gauge.labels(room="a").value == 0
+    assert 'g{room="a"} 0' in gauge.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("h", "H", buckets=(1, 5), registry=None)
+    for value in (0.5, 2, 3, 10):
+        histogram.observe(value)
+    rendered = histogram.render()
+    assert 'h_bucket{le="1"} 1' in rendered
+    assert 'h_bucket{le="5"} 3' in rendered
+    assert 'h_bucket{le="+Inf"} 4' in rendered
+    assert "h_sum 15.5" in rendered
+    assert "h_count 4" in rendered
+
+
+def test_machine_run_updates_engine_metrics():
+    battles, ticks = metrics.BATTLES.value, metrics.TICKS.value
+    parses = metrics.PARSE_SECONDS.count
+    machine = Machine(64, allow_single_process=True)
+    machine.load_code("MOV 0, 1", "Imp")
+    machine.run(100)
+    assert metrics.PARSE_SECONDS.count == parses + 1
+    assert metrics.BATTLES.value == battles + 1
+    assert metrics.TICKS.value == ticks + machine._ticks
+
+
+def test_run_seconds_are_observed_once_per_battle():
+    runs = metrics.RUN_SECONDS.count
+    machine = Machine(64, allow_single_process=True)
+    machine.load_code("MOV 0, 1", "Imp")
+    machine.run(100, budget=0)
+    while not machine.finished:
+        machine.resume(budget=10)
+        assert metrics.RUN_SECONDS.count == runs + machine.finished
+    machine.resume()
+    assert metrics.RUN_SECONDS.count == runs + 1
@@ -3,7 +3,7 @@ import pytest
 from redcode.errors import DatError, RedcodeRuntimeError
 from redcode.instruction import Add, Dat, Jmp, Mode, Mov
 from redcode.memory import Memory
-from redcode.process import Process
+from redcode.process import Process, ProcessTable
 
 
 def test_process_ticks_without_crashing(code):
@@ -60,3 +60,23 @@ def test_process_imp():
         assert process.is_alive
         process.tick()
     assert all(m[i] == imp for i in range(5))
+
+
+def test_table_tracks_deaths():
+    m = Memory(8)
+    table = ProcessTable()
+    deaths = []
+    table.on_death = lambda slot, reason: deaths.append((slot, reason))
+    imp_code = [Mov(Mode.RELATIVE, 0, Mode.RELATIVE, 1)]
+    dat = Process(0, m.allocate([Dat.of(0)], override=False), m, table=table)
+    imp = Process(1, m.allocate(imp_code, override=False), m, table=table)
+    assert table.alive_count == 2
+    assert table.running() == [0, 1]
+
+    dat.tick()
+    imp.tick()
+    assert table.alive_count == 1
+    assert table.running() == [1]
+    assert deaths == [(0, "DAT instruction encountered")]
+    assert dat._reason == "DAT instruction encountered"
+    assert imp._ip == table.ips[1]
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+from redcode.changes import ChangeIndex
+from redcode.machine import Machine
+from redcode.replay import BattleLog, BattleRecord, Cursor, ReplayService
+
+
+code_dir = Path(__file__).parent / "codes"
+
+
+def run_battle(seed: int) -> Machine:
+    machine = Machine(256, seed=seed)
+    machine.load_file(code_dir / "simple.red", "Dwarf")
+    machine.load_file(code_dir / "small_code.red", "Small")
+    machine.run(500)
+    return machine
+
+
+def test_seeded_battles_are_deterministic():
+    first, second = run_battle(7), run_battle(7)
+    assert first.start_map == second.start_map
+    assert first.history == second.history
+
+
+def test_record_simulate_regenerates_history():
+    machine = run_battle(11)
+    record = BattleRecord.from_machine(machine)
+    replayed = record.simulate()
+    assert replayed.json_history == machine.json_history
+    assert BattleRecord.from_machine(replayed) == record
+
+
+def test_battle_log_persists_records(tmp_path):
+    path = tmp_path / "battles.jsonl"
+    log = BattleLog(path)
+    battle_id = log.record(run_battle(3))
+    assert log.record(run_battle(3)) == battle_id
+    assert len(log) == 1
+
+    reloaded = BattleLog(path)
+    assert battle_id in reloaded
+    assert reloaded[battle_id] == log[battle_id]
+
+
+def test_replay_service_caches_recent_replays(tmp_path):
+    log = BattleLog(tmp_path / "battles.jsonl")
+    ids = [log.record(run_battle(seed)) for seed in range(3)]
+    service = ReplayService(log, cache_size=2)
+
+    machine = service.replay(ids[0])
+    assert service.replay(ids[0]) is machine
+    service.replay(ids[1])
+    service.replay(ids[2])
+    assert service.replay(ids[0]) is not machine
+    assert service.json_history(ids[0]) == machine.json_history
+
+
+def test_cursor_steps_both_ways():
+    machine = Machine(256, seed=5)
+    machine.load_code("ADD #4, 3\nMOV 2, @2\nJMP -2\nDAT #0", "Dwarf")
+    machine.load_code("MOV 0, 1", "Imp")
+    machine.run(1000)
+    start = machine.start_state
+    changes = ChangeIndex(len(machine.memory), machine.start_map)
+    changes.sync(machine.history)
+
+    cursor = Cursor(machine)
+    cursor.seek(len(machine.history))
+    assert cursor.cells == json.loads(machine.memory.as_json())
+    assert cursor.ips == machine.ips
+    assert cursor.owners == [changes.owner(i) for i in range(256)]
+
+    cursor.seek(700)
+    assert cursor.owners == [changes.owner(i, 700) for i in range(256)]
+    cursor.seek(0)
+    assert cursor.cells == json.loads(start.memory.as_json())
+    assert cursor.ips == start.ips
+    assert cursor.owners == machine.start_map
+    assert not cursor.back()
+
+
+def test_reverse_deltas_restore_the_raw_core():
+    machine = run_battle(3)
+    words = [int(word) for word in machine.memory]
+    for diff in reversed(machine.history):
+        if diff is not None and diff.index is not None:
+            words[diff.index] = diff.prev_word
+    assert words == [int(word) for word in machine.start_state.memory]
@@ -0,0 +1,30 @@
+from redcode.scores import ScoreStore, settings_key
+
+
+SETTINGS = settings_key(rounds=3, memory_size=256)
+
+
+def test_results_are_stored_once_per_pair(tmp_path):
+    with ScoreStore(tmp_path / "scores.db") as scores:
+        scores.put("b", "a", SETTINGS, (2, 1, 0))
+        assert scores.get("b", "a", SETTINGS) == (2, 1, 0)
+        assert scores.get("a", "b", SETTINGS) == (0, 1, 2)
+        assert len(scores) == 1
+        assert scores.get("a", "b", settings_key(rounds=4)) is None
+
+
+def test_results_persist(tmp_path):
+    path = tmp_path / "scores.db"
+    with ScoreStore(path) as scores:
+        scores.put("a", "b", SETTINGS, (1, 0, 2))
+    with ScoreStore(path) as scores:
+        assert list(scores) == [("a", "b", SETTINGS, (1, 0, 2))]
+
+
+def test_invalidate(tmp_path):
+    with ScoreStore(tmp_path / "scores.db") as scores:
+        scores.put("a", "b", SETTINGS, (1, 0, 0))
+        scores.put("a", "c", SETTINGS, (1, 0, 0))
+        scores.put("b", "c", SETTINGS, (1, 0, 0))
+        assert scores.invalidate("a") == 2
+        assert len(scores) == 1
@@ -0,0 +1,113 @@
+import multiprocessing
+
+import pytest
+
+from redcode.errors import SharedCoreTimeout
+from redcode.instruction import WIDE
+from redcode.machine import Machine
+from redcode.memory import Memory
+from redcode.shared import SharedCore
+
+
+DWARF = """
+ADD #4, 3
+MOV 2, @2
+JMP -2
+DAT #0
+"""
+IMP = "MOV 0, 1"
+
+
+@pytest.fixture
+def machine():
+    machine = Machine(256, seed=5)
+    machine.load_code(DWARF, "Dwarf")
+    machine.load_code(IMP, "Imp")
+    return machine
+
+
+def _summary(name, queue):
+    with SharedCore.attach(name) as core:
+        snapshot = core.snapshot()
+        queue.put((snapshot.tick, snapshot.ips, list(snapshot.words)))
+
+
+def test_mirrors_a_running_machine(machine):
+    with machine.share() as core:
+        machine.run(200)
+        with SharedCore.attach(core.name) as reader:
+            snapshot = reader.snapshot()
+            assert snapshot.tick == machine._ticks
+            assert snapshot.ips == machine.ips
+            assert snapshot.alive == [True, True]
+            assert [snapshot[i] for i in range(256)] == [
+                machine.memory[i] for i in range(256)
+            ]
+            assert reader[machine.ips[1]] == machine.memory[machine.ips[1]]
+
+
+def test_reader_in_another_process(machine):
+    context = multiprocessing.get_context()
+    queue = context.Queue()
+    with machine.share() as core:
+        machine.run(100)
+        reader = context.Process(target=_summary, args=(core.name, queue))
+        reader.start()
+        tick, ips, words = queue.get(timeout=30)
+        reader.join()
+        assert (tick, ips) == (machine._ticks, machine.ips)
+        assert words == list(core.words)
+
+
+def test_read_retries_a_raced_round():
+    memory = Memory(8)
+    with SharedCore.create(8) as core:
+        memory.share(core)
+        calls = []
+
+        def racing(core):
+            calls.append(core.sequence)
+            if len(calls) == 1:
+                core.begin()
+                memory[3] = 7
+                core.end()
+            return core.words[3]
+
+        assert core.read(racing) == 7
+        assert len(calls) == 2 and calls[1] == calls[0] + 2
+
+
+def test_wide_words():
+    machine = Machine(8192, seed=2)
+    machine.load_code(IMP, "Imp")
+    machine.load_code(DWARF, "Dwarf")
+    with machine.share() as core:
+        machine.run(50)
+        assert core.encoding is WIDE
+        snapshot = core.snapshot()
+        assert snapshot[machine.ips[0]] == machine.memory[machine.ips[0]]
+
+
+def test_share_must_match_the_memory():
+    with SharedCore.create(16) as core:
+        with pytest.raises(ValueError):
+            Memory(8).share(core)
+
+
+def test_failed_rounds_release_readers(machine, monkeypatch):
+    with machine.share() as core:
+        def crash():
+            raise RuntimeError("Boom")
+
+        monkeypatch.setattr(machine.processes[0], "tick", crash)
+        with pytest.raises(RuntimeError):
+            machine.round()
+        assert core.sequence % 2 == 0
+        assert core.snapshot(timeout=1).ips == machine.ips
+
+
+def test_reads_time_out_mid_round():
+    with SharedCore.create(8) as core:
+        core.begin()
+        with pytest.raises(SharedCoreTimeout):
+            core.read(lambda core: core.words[0], timeout=0.05)
@@ -0,0 +1,72 @@
+import pytest
+
+from redcode.archive import compile_source
+from redcode.scores import ScoreStore
+from redcode.tournament import (
+    EarlyStop, incremental_round_robin, round_robin, simulations,
+)
+
+
+DWARF = compile_source("ADD #4, 3\nMOV 2, @2\nJMP -2\nDAT #0")
+IMP = compile_source("MOV 0, 1")
+BOMB = compile_source("DAT #0")
+
+
+def test_early_stop_decides_lopsided_pairings():
+    stop = EarlyStop(0.95, min_rounds=10)
+    assert not stop.decided(9, 0, 0)  # Too few rounds
+    assert stop.decided(10, 0, 0)
+    assert stop.decided(0, 0, 10)
+    assert not stop.decided(5, 0, 5)
+
+
+def test_early_stop_rejects_bad_confidence():
+    with pytest.raises(ValueError):
+        EarlyStop(1.5)
+
+
+def test_early_stop_plays_a_prefix_of_the_rounds():
+    warriors = [("dwarf", DWARF), ("imp", IMP), ("bomb", BOMB)]
+    full = round_robin(warriors, rounds=30, memory_size=256, seed=4)
+    early = round_robin(
+        warriors, rounds=30, memory_size=256, seed=4,
+        stop=EarlyStop(0.95, min_rounds=5),
+    )
+
+    assert simulations(full) == 90
+    assert simulations(early) < simulations(full)
+    by_name = {standing.name: standing for standing in full}
+    for standing in early:
+        assert standing.wins <= by_name[standing.name].wins
+        assert standing.losses <= by_name[standing.name].losses
+    assert [s.name for s in early][0] == [s.name for s in full][0]
+
+
+def test_incremental_round_robin_plays_only_new_pairings(tmp_path):
+    paper = compile_source("JMP 2\nDAT #0\nMOV -1, 5\nJMP -1")
+    warriors = [("dwarf", DWARF), ("imp", IMP), ("bomb", BOMB)]
+    with ScoreStore(tmp_path / "scores.db") as scores:
+        first, played = incremental_round_robin(
+            warriors, scores, rounds=2, memory_size=256,
+        )
+        assert played == 6
+        again, played = incremental_round_robin(
+            list(reversed(warriors)), scores, rounds=2, memory_size=256,
+        )
+        assert played == 0
+        assert [s.to_dict() for s in again] == [s.to_dict() for s in first]
+
+        warriors.append(("paper", paper))
+        standings, played = incremental_round_robin(
+            warriors, scores, rounds=2, memory_size=256,
+        )
+        assert played == 3 * 2  # Only the new warrior's pairings
+        assert simulations(standings) == 6 * 2
+
+
+def test_duplicate_warriors_enter_once():
+    warriors = [("dwarf", DWARF), ("imp", IMP), ("copy", list(DWARF))]
+    standings = round_robin(warriors, rounds=2, memory_size=256, seed=1)
+    assert [s.name for s in standings] == ["dwarf", "imp"]
+    assert standings[0].duplicates == ["copy"]
+    assert simulations(standings) == 2
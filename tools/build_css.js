@@ -0,0 +1,93 @@
+// Compile the Tailwind classes used by the templates and scripts into a
+// static stylesheet, so browsers don't run the Tailwind compiler.
+//
+//     node tools/build_css.js            writes src/static/app.css
+//     node tools/build_css.js --check    fails if app.css is out of date
+//
+// The compiler is the vendored Tailwind Play build (tools/tailwind.js), run
+// against a stub DOM whose only element carries every candidate class.
+const fs = require("fs");
+const path = require("path");
+
+const ROOT = path.join(__dirname, "..");
+const SOURCES = [
+  path.join(ROOT, "src", "templates"),
+  path.join(ROOT, "src", "static", "controllers.js"),
+];
+const OUTPUT = path.join(ROOT, "src", "static", "app.css");
+// `{{ color }}`, `{{ colors[...] }}` and `${color}` stand for any player color
+const COLOR = /\{\{\s*(?:color|colors\[[^\]]*\])\s*\}\}|\$\{color\}/g;
+const PLACEHOLDER = "__color__";
+
+function files(source) {
+  if (!fs.statSync(source).isDirectory()) {
+    return [source];
+  }
+  return fs.readdirSync(source, {withFileTypes: true}).flatMap(
+    (entry) => files(path.join(source, entry.name)),
+  ).sort();
+}
+
+function colors() {
+  // Class names like `bg-${color}-400` are built from the palette in base.html
+  const base = fs.readFileSync(
+    path.join(ROOT, "src", "templates", "base.html"), "utf8",
+  );
+  const palette = base.match(/set colors = \[([^\]]*)\]/)[1];
+  return [...palette.matchAll(/'([a-z]+)'/g)].map((match) => match[1]);
+}
+
+function candidates() {
+  const palette = colors();
+  const found = new Set();
+  for (const file of SOURCES.flatMap(files)) {
+    const text = fs.readFileSync(file, "utf8").replace(COLOR, PLACEHOLDER);
+    // Template tags and quotes can't be part of a class name
+    for (const token of text.split(/[\s"'`<>=;{}%]+/)) {
+      if (!token) {
+        continue;
+      }
+      const expanded = token.includes(PLACEHOLDER) ?
+        palette.map((color) => token.replaceAll(PLACEHOLDER, color)) :
+        [token];
+      expanded.forEach((name) => found.add(name));
+    }
+  }
+  return [...found].sort();
+}
+
+function compile(classes) {
+  let observer;
+  const style = {textContent: "", isConnected: true};
+  globalThis.window = globalThis.self = globalThis;
+  globalThis.MutationObserver = class {
+    constructor(callback) {
+      this.callback = callback;
+      observer = observer || this;
+    }
+
+    observe() {}
+  };
+  globalThis.document = {
+    body: {},
+    head: {append() {}},
+    documentElement: {},
+    createElement: () => style,
+    querySelectorAll: (selector) =>
+      selector === "[class]" ? [{classList: classes}] : [],
+  };
+  const warn = console.warn;
+  console.warn = () => {};  // The "not for production" banner
+  require(path.join(__dirname, "tailwind.js"));
+  console.warn = warn;
+  return observer.callback([]).then(() => style.textContent + "\n");
+}
+
+compile(candidates()).then((css) => {
+  if (!process.argv.includes("--check")) {
+    fs.writeFileSync(OUTPUT, css);
+  } else if (fs.readFileSync(OUTPUT, "utf8") !== css) {
+    console.error(`${path.relative(ROOT, OUTPUT)} is out of date`);
+    process.exit(1);
+  }
+});
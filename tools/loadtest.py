@@ -0,0 +1,304 @@
+"""Load test the web app: `python tools/loadtest.py [options]`.
+
+Starts the app on a local port (or targets `--url`), then runs concurrent
+virtual users that upload warriors, run test battles and view battles, in a
+configurable mix. Prints a JSON report with throughput and latency
+percentiles per endpoint, and saves it so versions can be compared:
+
+    python tools/loadtest.py --requests 500 --concurrency 16 \
+        --mix upload=1,test=2,battle=4 --output before.json
+    python tools/loadtest.py ... --compare before.json
+"""
+import argparse
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import random
+import secrets
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+
+
+WARRIORS = {
+    "imp": "MOV 0, 1",
+    "dwarf": "ADD #4, 3\nMOV 2, @2\nJMP -2\nDAT #0",
+    "stone": "MOV 3, @3\nADD #-3, 2\nJMP -2\nDAT #0",
+    "gate": "JMZ 0, -1\nMOV 1, -1\nJMP -2",
+    "bomber": (
+        "; Drops bombs every 7 cells\n"
+        "ADD #7, 4\nMOV 3, @3\nJMP -2\nDAT #0\nDAT #0"
+    ),
+    "scanner": "ADD #5, 4\nJMZ -1, @3\nMOV 2, @2\nJMP -3\nDAT #0",
+}
+
+OPERATIONS = ("upload", "test", "battle")
+PERCENTILES = (50, 90, 99)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # A redirect is the response we're timing
+
+
+_OPENER = urllib.request.build_opener(_NoRedirect)
+
+
+def request(url: str, form: dict[str, str] | None = None) -> int:
+    data = urllib.parse.urlencode(form).encode() if form is not None else None
+    try:
+        with _OPENER.open(url, data=data, timeout=120) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r} in the mix")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+@dataclass
+class Samples:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, seconds: float) -> dict:
+        latencies = sorted(self.latencies)
+        ms = {f"p{p}": percentile(latencies, p) * 1000 for p in PERCENTILES}
+        if latencies:
+            ms["max"] = latencies[-1] * 1000
+            ms["mean"] = sum(latencies) / len(latencies) * 1000
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput": len(latencies) / seconds if seconds else 0.0,
+            "latency_ms": ms,
+        }
+
+
+class LoadTest:
+    def __init__(
+        self,
+        url: str,
+        mix: dict[str, float],
+        rooms: int = 8,
+        players: int = 4,
+        seed: int = 0,
+    ):
+        self.url = url.rstrip("/")
+        self.mix = mix
+        self.rooms = rooms
+        self.players = players  # Uploads in a room before it's reset
+        self.seed = seed
+        self.samples = {name: Samples() for name in (*OPERATIONS, "reset")}
+        self._uploads = [0] * rooms
+        self._ready: set[int] = set()  # Rooms with an upload, to watch
+        self._lock = threading.Lock()
+        self._run = secrets.token_hex(4)  # Player names never clash
+
+    def _timed(self, name: str, call: Callable[[], int]) -> int:
+        start = time.perf_counter()
+        try:
+            status = call()
+        except OSError:
+            status = 0
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            samples = self.samples[name]
+            samples.latencies.append(elapsed)
+            samples.errors += not 200 <= status < 400
+        return status
+
+    def _upload(self, rng: random.Random, room: int, player: str) -> None:
+        with self._lock:
+            full = self._uploads[room] >= self.players
+            self._uploads[room] = 1 if full else self._uploads[room] + 1
+        base = f"{self.url}/rooms/load{room}"
+        if full:
+            self._timed("reset", lambda: request(f"{base}/reset"))
+        code = rng.choice(list(WARRIORS.values()))
+        form = {"player-name": player, "code": code}
+        status = self._timed(
+            "upload", lambda: request(f"{base}/code/send", form),
+        )
+        if 200 <= status < 400:
+            with self._lock:
+                self._ready.add(room)
+
+    def _user(self, number: int, deadline: float, remaining: list[int]):
+        rng = random.Random(self.seed + number)
+        names, weights = list(self.mix), list(self.mix.values())
+        sent = 0
+        while time.perf_counter() < deadline:
+            with self._lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            operation = rng.choices(names, weights)[0]
+            room = rng.randrange(self.rooms)
+            if operation == "battle":
+                # Only rooms someone uploaded to exist, the rest are 404s
+                with self._lock:
+                    ready = sorted(self._ready)
+                if ready:
+                    room = rng.choice(ready)
+                else:
+                    operation = "upload"
+            if operation == "upload":
+                self._upload(rng, room, f"{self._run}-{number}-{sent}")
+            elif operation == "test":
+                name, code = rng.choice(list(WARRIORS.items()))
+                form = {"player-name": name, "code": code}
+                self._timed("test", lambda: request(f"{self.url}/test", form))
+            else:
+                url = f"{self.url}/rooms/load{room}/battle"
+                self._timed("battle", lambda: request(url))
+            sent += 1
+
+    def run(
+        self, requests: int, concurrency: int, duration: float | None = None,
+    ) -> dict:
+        for room in range(self.rooms):  # Leftovers of an earlier run
+            request(f"{self.url}/rooms/load{room}/reset")
+        started = datetime.now(timezone.utc).isoformat()
+        deadline = time.perf_counter() + (duration or float("inf"))
+        remaining = [requests]
+        users = [
+            threading.Thread(target=self._user, args=(i, deadline, remaining))
+            for i in range(concurrency)
+        ]
+        start = time.perf_counter()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        seconds = time.perf_counter() - start
+
+        endpoints = {
+            name: samples.summary(seconds)
+            for name, samples in self.samples.items() if samples.latencies
+        }
+        everything = Samples(
+            [t for s in self.samples.values() for t in s.latencies],
+            sum(s.errors for s in self.samples.values()),
+        )
+        return {
+            "target": self.url,
+            "started": started,
+            "seconds": seconds,
+            "settings": {
+                "requests": requests, "concurrency": concurrency,
+                "duration": duration, "mix": self.mix, "rooms": self.rooms,
+                "players": self.players, "seed": self.seed,
+            },
+            "total": everything.summary(seconds),
+            "endpoints": endpoints,
+        }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Ratios of this run to the baseline, below 1 is faster for latencies"""
+    ratios = {}
+    for name, current in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+        ratio = {
+            key: value / before["latency_ms"][key]
+            for key, value in current["latency_ms"].items()
+            if before["latency_ms"].get(key)
+        }
+        if before["throughput"]:
+            ratio["throughput"] = current["throughput"] / before["throughput"]
+        ratios[name] = ratio
+    return ratios
+
+
+def serve() -> tuple[str, Callable[[], None]]:
+    """Start the app on a free local port, returns its url and a stopper"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import src as web
+
+    class Quiet(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(
+        "127.0.0.1", 0, web.app, threaded=True, request_handler=Quiet,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{server.port}", server.shutdown
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python tools/loadtest.py")
+    parser.add_argument("--url", help="Target a running server instead")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Stop after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default="upload=1,test=1,battle=2",
+                        help="Weights of upload, test and battle requests")
+    parser.add_argument("--rooms", type=int, default=8)
+    parser.add_argument("--players", type=int, default=4,
+                        help="Uploads to a room before it's reset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Save the report")
+    parser.add_argument("--compare", default=None,
+                        help="A saved report to compare against")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+        baseline = (
+            json.loads(Path(args.compare).read_text())
+            if args.compare else None
+        )
+    except (ValueError, OSError) as e:
+        print(json.dumps({"error": str(e)}))
+        return 2
+
+    url, stop = (args.url, lambda: None) if args.url else serve()
+    try:
+        test = LoadTest(url, mix, args.rooms, args.players, args.seed)
+        report = test.run(args.requests, args.concurrency, args.duration)
+    finally:
+        stop()
+
+    if baseline is not None:
+        report["comparison"] = compare(report, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(json.dumps(report, indent=2))
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())